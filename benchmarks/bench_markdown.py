@@ -0,0 +1,163 @@
+"""Micro-benchmark of the markdown to Notion blocks conversion.
+
+Compares the original per-line regex converter with markdown_converter on generated reports.
+
+Usage:
+    python benchmarks/bench_markdown.py --lines 100,1000,10000
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import contextlib
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "functions"))
+
+from markdown_converter import markdown_to_blocks
+from logger import setup_logger
+
+logger = setup_logger()
+
+
+class LegacyConverter:
+    # Copied from the original NotionInterface so both converters can be timed side by side
+    h_re_pattern = r"^#+ "
+    numbered_list_re_pattern = r"^\d+\. "
+    bulleted_list_re_pattern = r"^[-*] "
+    bold_re_pattern = r"\*\*[^*]+\*\*"
+    italic_re_pattern = r"\*[^*]+\*"
+    link_re_pattern = r"\[.*?\)"
+
+    h1_pattern = "# "
+    h2_pattern = "## "
+    h3_pattern = "###"
+
+    def identify_block_type(self, text: str) -> str:
+        if text.startswith(self.h3_pattern):
+            return "heading_3"
+        if text.startswith(self.h2_pattern):
+            return "heading_2"
+        if text.startswith(self.h1_pattern):
+            return "heading_1"
+        if re.match(self.numbered_list_re_pattern, text):
+            return "numbered_list_item"
+        if re.match(self.bulleted_list_re_pattern, text):
+            return "bulleted_list_item"
+        return "paragraph"
+
+    def create_block(self, text: str, block_type: str) -> dict:
+        if block_type.startswith("heading"):
+            text = re.sub(self.h_re_pattern, "", text)
+        if block_type == "numbered_list_item":
+            text = re.sub(self.numbered_list_re_pattern, "", text)
+        if block_type == "bulleted_list_item":
+            text = re.sub(self.bulleted_list_re_pattern, "", text)
+
+        combined_pattern = (
+            f"({self.bold_re_pattern}|{self.italic_re_pattern}|{self.link_re_pattern})"
+        )
+        split_text = [part for part in re.split(combined_pattern, text) if part]
+
+        rich_text = []
+        for part in split_text:
+            logger.info(f"Assigning rich text to block: {block_type}")
+            if part.startswith("**"):
+                rich_text.append(
+                    {"type": "text", "text": {"content": part.replace("**", "")}, "annotations": {"bold": True}}
+                )
+            elif part.startswith("*"):
+                rich_text.append(
+                    {"type": "text", "text": {"content": part.replace("*", "")}, "annotations": {"italic": True}}
+                )
+            elif part.startswith("[") and part.endswith(")"):
+                print(part)
+                link_text, link_url = part[1:-1].split("](")
+                rich_text.append({"type": "text", "text": {"content": link_text, "link": {"url": link_url}}})
+            else:
+                rich_text.append({"type": "text", "text": {"content": part}})
+
+        return {"object": "block", "type": block_type, block_type: {"rich_text": rich_text}}
+
+    def convert(self, text: str) -> list:
+        blocks = []
+        for block in text.split("\n"):
+            block = block.strip()
+            if not block:
+                continue
+            blocks.append(self.create_block(block, self.identify_block_type(block)))
+        return blocks
+
+
+def generate_report(lines: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = "notion report summary content analysis video website key point detail".split()
+
+    def sentence() -> str:
+        parts = [rng.choice(words) for _ in range(rng.randint(8, 24))]
+        parts[rng.randrange(len(parts))] = f"**{rng.choice(words)}**"
+        parts[rng.randrange(len(parts))] = f"*{rng.choice(words)}*"
+        if rng.random() < 0.3:
+            parts[rng.randrange(len(parts))] = f"[{rng.choice(words)}](https://example.com/{rng.randint(0, 999)})"
+        return " ".join(parts)
+
+    output = []
+    while len(output) < lines:
+        kind = rng.random()
+        if kind < 0.1:
+            output.append(f"{'#' * rng.randint(1, 3)} {sentence()}")
+        elif kind < 0.35:
+            output.append(f"- {sentence()}")
+        elif kind < 0.5:
+            output.append(f"{rng.randint(1, 9)}. {sentence()}")
+        else:
+            output.append(sentence())
+        output.append("")
+    return "\n".join(output[:lines])
+
+
+def check_equivalent(legacy: LegacyConverter, text: str) -> int:
+    # The generated reports only use markdown both converters support, so their blocks must match
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        expected = legacy.convert(text)
+    actual = markdown_to_blocks(text)
+    if len(expected) != len(actual):
+        raise AssertionError(f"Converters returned {len(expected)} and {len(actual)} blocks")
+    for i, (legacy_block, block) in enumerate(zip(expected, actual)):
+        if legacy_block != block:
+            raise AssertionError(f"Block {i} differs:\nlegacy:   {legacy_block}\ncompiled: {block}")
+    return len(actual)
+
+
+def measure(convert, text: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        convert(text)
+        timings.append(time.perf_counter() - started_at)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", default="100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    legacy = LegacyConverter()
+    for lines in map(int, args.lines.split(",")):
+        text = generate_report(lines)
+        check_equivalent(legacy, text)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            legacy_secs = measure(legacy.convert, text, args.repeat)
+        compiled_secs = measure(markdown_to_blocks, text, args.repeat)
+        print(
+            f"lines={lines:<7} chars={len(text):<9} legacy={legacy_secs * 1000:>9.2f}ms "
+            f"compiled={compiled_secs * 1000:>9.2f}ms speedup={legacy_secs / compiled_secs:>5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Memory benchmark: peak RSS of one create_notion_page run against the size of the scraped page.
+
+Every size runs in a fresh interpreter. To compare with an earlier version of the pipeline, check
+it out next to this one and pass its functions directory:
+
+Usage:
+    python benchmarks/bench_memory.py --content-words 10000,100000,1000000
+    git worktree add /tmp/notionify-before <commit>
+    python benchmarks/bench_memory.py --compare /tmp/notionify-before/functions
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+FUNCTIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "functions")
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in the child interpreter, which prints a single JSON line with its measurements
+CHILD_SCRIPT = """
+import json
+import time
+import resource
+
+from fakes import FakeConfig, install_fakes
+
+config = FakeConfig(content_words=1000)
+install_fakes(config)
+
+import pipeline
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+# A small page first, so imports and first-use allocations are not counted against the large one
+pipeline.run_pipeline("https://bench.example.com/warmup")
+baseline_mb = peak_rss_mb()
+
+config.content_words = {content_words}
+started_at = time.perf_counter()
+pipeline.run_pipeline("https://bench.example.com/large")
+elapsed_secs = time.perf_counter() - started_at
+
+print(json.dumps({{
+    "baseline_rss_mb": baseline_mb,
+    "peak_rss_mb": peak_rss_mb(),
+    "elapsed_secs": elapsed_secs,
+}}))
+"""
+
+
+def run_child(functions_dir: str, content_words: int) -> dict:
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([functions_dir, BENCHMARKS_DIR]),
+        "NOTION_WEBSITES_DATABASE_ID": "websites",
+        "NOTION_VIDEOS_DATABASE_ID": "videos",
+        "CACHE_BACKEND": "memory",
+    }
+    for name in ["NOTION_TOKEN", "OPENAI_API_KEY", "APIFY_API_TOKEN", "CHROME_EXTENSION_ID", "METRICS_TOKEN"]:
+        env.setdefault(name, "benchmark")
+
+    script = CHILD_SCRIPT.format(content_words=content_words)
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=functions_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--content-words", default="10000,100000,1000000")
+    parser.add_argument("--compare", help="functions directory of another version to measure as well")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    args = parser.parse_args()
+
+    versions = [("current", FUNCTIONS_DIR)]
+    if args.compare:
+        versions.insert(0, ("compare", args.compare))
+
+    for content_words in map(int, args.content_words.split(",")):
+        for label, functions_dir in versions:
+            run = run_child(functions_dir, content_words)
+            result = {
+                "version": label,
+                "content_words": content_words,
+                "baseline_rss_mb": round(run["baseline_rss_mb"], 1),
+                "peak_rss_mb": round(run["peak_rss_mb"], 1),
+                "growth_mb": round(run["peak_rss_mb"] - run["baseline_rss_mb"], 1),
+                "elapsed_secs": round(run["elapsed_secs"], 2),
+            }
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print(
+                    f"{result['version']:<8} words={content_words:<8} "
+                    f"baseline={result['baseline_rss_mb']:>7.1f}MB peak={result['peak_rss_mb']:>7.1f}MB "
+                    f"growth={result['growth_mb']:>7.1f}MB time={result['elapsed_secs']:>6.2f}s"
+                )
+
+
+if __name__ == "__main__":
+    main()
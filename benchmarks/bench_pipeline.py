@@ -0,0 +1,136 @@
+"""End-to-end benchmark of create_notion_page and get_notion_page against local fakes.
+
+Usage:
+    python benchmarks/bench_pipeline.py --concurrency 1,4,16 --content-words 1000,20000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "functions"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--endpoint", choices=["create", "get", "both"], default="both")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--content-words", default="1000,10000")
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--report-lines", type=int, default=40)
+    parser.add_argument("--apify-latency", type=float, default=0.5)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--notion-latency", type=float, default=0.05)
+    parser.add_argument("--http-latency", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--notion-rps", type=float, default=3)
+    parser.add_argument("--no-http-fast-path", action="store_true")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    return parser.parse_args()
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    for name in ["NOTION_TOKEN", "OPENAI_API_KEY", "APIFY_API_TOKEN", "CHROME_EXTENSION_ID", "METRICS_TOKEN"]:
+        os.environ.setdefault(name, "benchmark")
+    os.environ.setdefault("NOTION_WEBSITES_DATABASE_ID", "websites")
+    os.environ.setdefault("NOTION_VIDEOS_DATABASE_ID", "videos")
+    os.environ.setdefault("JOB_DISPATCHER", "local")
+    os.environ.setdefault("JOB_STORE_BACKEND", "memory")
+    os.environ.setdefault("SCRAPE_HEDGE_DELAY_SECS", str(args.apify_latency * 2))
+    os.environ["NOTION_REQUESTS_PER_SEC"] = str(args.notion_rps)
+
+
+def percentile(latencies: list[float], q: int) -> float:
+    if len(latencies) < 2:
+        return latencies[0] if latencies else 0.0
+    return statistics.quantiles(latencies, n=100, method="inclusive")[q - 1]
+
+
+def run_scenario(name: str, handler, urls: list[str], concurrency: int) -> dict:
+    from flask import Flask
+
+    app = Flask(__name__)
+
+    def call(url: str) -> tuple[float, int]:
+        with app.test_request_context("/", query_string={"url": url}) as context:
+            started_at = time.perf_counter()
+            response = handler(context.request)
+            return time.perf_counter() - started_at, response.status_code
+
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(call, urls))
+    elapsed = time.perf_counter() - started_at
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = [latency for latency, _ in results]
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": len(urls),
+        "errors": sum(status >= 400 for _, status in results),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "throughput_rps": round(len(urls) / elapsed, 2),
+        "peak_memory_mb": round(peak_memory / 2**20, 1),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    configure_environment(args)
+
+    from fakes import FakeConfig, Latency, install_fakes
+
+    config = FakeConfig(
+        report_lines=args.report_lines,
+        apify=Latency(args.apify_latency, args.apify_latency / 4, args.failure_rate),
+        llm=Latency(args.llm_latency, args.llm_latency / 4, args.failure_rate),
+        notion=Latency(args.notion_latency, args.notion_latency / 4, args.failure_rate),
+        http=Latency(args.http_latency, args.http_latency / 4, args.failure_rate),
+        youtube=Latency(args.http_latency, args.http_latency / 4, args.failure_rate),
+        http_fast_path=not args.no_http_fast_path,
+    )
+    store = install_fakes(config)
+
+    import main as functions
+
+    run = 0
+    for content_words in map(int, args.content_words.split(",")):
+        config.content_words = content_words
+        for concurrency in map(int, args.concurrency.split(",")):
+            run += 1
+            # Unique URLs per run so caches and request coalescing do not hide the work
+            urls = [f"https://bench.example.com/{run}/{i}" for i in range(args.requests)]
+            scenarios = []
+            if args.endpoint in ("create", "both"):
+                scenarios.append(("create_notion_page", functions.create_notion_page))
+            if args.endpoint in ("get", "both"):
+                for url in urls[: args.requests // 2]:
+                    store.add_page(os.environ["NOTION_WEBSITES_DATABASE_ID"], url, "Existing page")
+                scenarios.append(("get_notion_page", functions.get_notion_page))
+
+            for name, handler in scenarios:
+                result = {"content_words": content_words, **run_scenario(name, handler, urls, concurrency)}
+                if args.json:
+                    print(json.dumps(result))
+                else:
+                    print(
+                        f"{result['scenario']:<20} words={content_words:<7} c={concurrency:<3} "
+                        f"n={result['requests']:<4} err={result['errors']:<3} "
+                        f"p50={result['p50_ms']:>8.1f}ms p95={result['p95_ms']:>8.1f}ms "
+                        f"p99={result['p99_ms']:>8.1f}ms {result['throughput_rps']:>7.2f} req/s "
+                        f"peak={result['peak_memory_mb']:.1f}MB"
+                    )
+
+
+if __name__ == "__main__":
+    main()
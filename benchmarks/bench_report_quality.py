@@ -0,0 +1,131 @@
+"""Report quality per model: runs the report chain of each model on the same sources and scores the results.
+
+Unlike the other benchmarks this one calls the real OpenAI API (OPENAI_API_KEY must be set), since
+the fakes cannot tell a good report from a bad one. Sources are text or markdown files, or URLs
+scraped over plain HTTP. The first model is the reference the others are compared with:
+
+Usage:
+    python benchmarks/bench_report_quality.py --models gpt-4.1,gpt-4.1-mini,gpt-4.1-nano article.md https://example.com/post
+
+Per model and source it reports:
+    parsed       the report parsed into a title and content (a failure falls back to the next model)
+    grounded     share of the report's numbers that appear in the source (made-up figures lower it)
+    numbers      share of the reference report's numbers the report also contains
+    links        share of the reference report's links the report also contains
+    words        length of the report relative to the reference
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "functions"))
+
+NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+LINK_RE = re.compile(r"\]\((https?://[^)\s]+)\)")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sources", nargs="+", help="Text or markdown files, or URLs")
+    parser.add_argument("--models", default="gpt-4.1,gpt-4.1-mini,gpt-4.1-nano", help="Reference model first")
+    parser.add_argument("--guidance", default="")
+    parser.add_argument("--timeout-secs", type=float, default=120)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    return parser.parse_args()
+
+
+def numbers(text: str) -> set[str]:
+    # Thousands separators differ between source and report, so they are dropped
+    return {number.replace(",", "") for number in NUMBER_RE.findall(text)}
+
+
+def share(part: set, whole: set) -> float | None:
+    return len(part & whole) / len(whole) if whole else None
+
+
+def load_source(source: str) -> str:
+    if source.startswith(("http://", "https://")):
+        from pipeline import scrape
+
+        return scrape(source, use_cache=False)["content"]
+    with open(source, encoding="utf-8") as f:
+        return f.read()
+
+
+def score(report, source: str, reference) -> dict:
+    if report is None:
+        return {"parsed": False}
+    report_numbers = numbers(report.content)
+    result = {
+        "parsed": True,
+        "grounded": share(report_numbers, numbers(source)),
+        "words": len(report.content.split()),
+    }
+    if reference is not None:
+        result["numbers"] = share(report_numbers, numbers(reference.content))
+        result["links"] = share(set(LINK_RE.findall(report.content)), set(LINK_RE.findall(reference.content)))
+        result["words"] = round(result["words"] / max(1, len(reference.content.split())), 2)
+    return result
+
+
+def main() -> None:
+    args = parse_args()
+    if not os.environ.get("OPENAI_API_KEY"):
+        sys.exit("OPENAI_API_KEY is required: this benchmark scores the output of the real models")
+    for name in ["NOTION_TOKEN", "APIFY_API_TOKEN"]:
+        os.environ.setdefault(name, "benchmark")
+    os.environ.setdefault("NOTION_WEBSITES_DATABASE_ID", "websites")
+    os.environ.setdefault("NOTION_VIDEOS_DATABASE_ID", "videos")
+
+    from langchain_core.exceptions import OutputParserException
+    from llm_usage import track_llm_usage
+    from tokens import count_tokens
+    from utils import get_report_chain, report_router
+
+    models = args.models.split(",")
+    for source_name in args.sources:
+        source = load_source(source_name)
+        tokens = count_tokens(source)
+        reference = None
+        for model in models:
+            span = {}
+            started_at = time.perf_counter()
+            try:
+                with track_llm_usage(span, model) as callbacks:
+                    report = get_report_chain(model, args.timeout_secs).invoke(
+                        {"content": source, "guidance": args.guidance}, {"callbacks": callbacks}
+                    )
+            except OutputParserException:
+                report = None
+            elapsed_secs = time.perf_counter() - started_at
+            if reference is None:
+                reference = report
+
+            result = {
+                "source": source_name,
+                "tokens": tokens,
+                "route": report_router.route(tokens).name,
+                "model": model,
+                **score(report, source, None if model == models[0] else reference),
+                "elapsed_secs": round(elapsed_secs, 2),
+                "cost_usd": span.get("cost_usd"),
+            }
+            if args.json:
+                print(json.dumps(result))
+            else:
+                scores = " ".join(
+                    f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                    for key, value in result.items()
+                    if key in ["parsed", "grounded", "numbers", "links", "words"]
+                )
+                print(
+                    f"{source_name} ({tokens} tokens, route {result['route']}) {model:<14} {scores} "
+                    f"time={result['elapsed_secs']:.2f}s cost=${result['cost_usd'] or 0:.4f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
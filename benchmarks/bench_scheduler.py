@@ -0,0 +1,138 @@
+"""Interactive latency of create_notion_page while bulk imports saturate the LLM, against local fakes.
+
+Run once with the scheduler and once with --no-scheduler to compare:
+
+Usage:
+    python benchmarks/bench_scheduler.py --bulk-jobs 3 --interactive 20
+    python benchmarks/bench_scheduler.py --bulk-jobs 3 --interactive 20 --no-scheduler
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "functions"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bulk-jobs", type=int, default=3, help="Concurrent bulk imports, one user each")
+    parser.add_argument("--bulk-urls", type=int, default=40)
+    parser.add_argument("--interactive", type=int, default=20, help="Sequential one-click requests")
+    parser.add_argument("--interactive-users", type=int, default=4)
+    parser.add_argument("--content-words", type=int, default=5000)
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    parser.add_argument("--llm-capacity", type=int, default=4, help="Concurrent completions the fake serves")
+    parser.add_argument("--http-latency", type=float, default=0.05)
+    parser.add_argument("--notion-latency", type=float, default=0.05)
+    parser.add_argument("--notion-rps", type=float, default=20)
+    parser.add_argument("--no-scheduler", action="store_true")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    return parser.parse_args()
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    for name in ["NOTION_TOKEN", "OPENAI_API_KEY", "APIFY_API_TOKEN", "CHROME_EXTENSION_ID", "METRICS_TOKEN"]:
+        os.environ.setdefault(name, "benchmark")
+    os.environ.setdefault("NOTION_WEBSITES_DATABASE_ID", "websites")
+    os.environ.setdefault("NOTION_VIDEOS_DATABASE_ID", "videos")
+    os.environ.setdefault("JOB_DISPATCHER", "local")
+    os.environ.setdefault("JOB_STORE_BACKEND", "memory")
+    os.environ["NOTION_REQUESTS_PER_SEC"] = str(args.notion_rps)
+    os.environ.setdefault("SCHEDULER_LLM_CONCURRENCY", str(args.llm_capacity))
+    if args.no_scheduler:
+        for resource in ["SCRAPE", "LLM", "NOTION"]:
+            os.environ[f"SCHEDULER_{resource}_CONCURRENCY"] = "0"
+
+
+def percentile(latencies: list[float], q: int) -> float:
+    if len(latencies) < 2:
+        return latencies[0] if latencies else 0.0
+    return statistics.quantiles(latencies, n=100, method="inclusive")[q - 1]
+
+
+def main() -> None:
+    args = parse_args()
+    configure_environment(args)
+
+    from flask import Flask
+    from fakes import FakeConfig, Latency, install_fakes
+
+    config = FakeConfig(
+        content_words=args.content_words,
+        llm=Latency(args.llm_latency, args.llm_latency / 4),
+        http=Latency(args.http_latency, args.http_latency / 4),
+        notion=Latency(args.notion_latency, args.notion_latency / 4),
+    )
+    config.llm_capacity = args.llm_capacity
+    install_fakes(config)
+
+    import main as functions
+    from bulk import run_bulk_import
+    from metrics import metrics
+    from scheduler import Priority, scheduled_as
+
+    def bulk_job(job: int) -> None:
+        with scheduled_as(Priority.BACKGROUND, f"bulk-{job}"):
+            run_bulk_import([f"https://bulk.example.com/{job}/{i}" for i in range(args.bulk_urls)])
+
+    bulk_threads = [threading.Thread(target=bulk_job, args=(job,)) for job in range(args.bulk_jobs)]
+    for thread in bulk_threads:
+        thread.start()
+    # Let the bulk imports fill the queues before the first interactive request
+    time.sleep(args.llm_latency * 2)
+
+    app = Flask(__name__)
+    latencies = []
+    errors = 0
+    for i in range(args.interactive):
+        headers = {"X-Notionify-User": f"user-{i % args.interactive_users}"}
+        with app.test_request_context(
+            "/", query_string={"url": f"https://one-click.example.com/{i}"}, headers=headers
+        ) as context:
+            started_at = time.perf_counter()
+            response = functions.create_notion_page(context.request)
+            latencies.append(time.perf_counter() - started_at)
+            errors += response.status_code >= 400
+    bulk_busy = sum(thread.is_alive() for thread in bulk_threads)
+
+    started_at = time.perf_counter()
+    for thread in bulk_threads:
+        thread.join()
+    bulk_tail_secs = time.perf_counter() - started_at
+
+    queue_waits = {
+        histogram["stage"]: round(histogram["sum"] / histogram["count"] * 1000, 1)
+        for histogram in metrics.snapshot()["histograms"]
+        if histogram["stage"].startswith("queue_") and histogram["count"]
+    }
+    result = {
+        "scheduler": not args.no_scheduler,
+        "bulk_jobs": args.bulk_jobs,
+        "bulk_jobs_running_throughout": bulk_busy,
+        "interactive_requests": len(latencies),
+        "interactive_errors": errors,
+        "interactive_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "interactive_p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "bulk_tail_secs": round(bulk_tail_secs, 1),
+        "mean_queue_wait_ms": queue_waits,
+    }
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(
+            f"scheduler={result['scheduler']} bulk_jobs={args.bulk_jobs} "
+            f"(still running at the end: {bulk_busy}) interactive n={len(latencies)} err={errors} "
+            f"p50={result['interactive_p50_ms']:.1f}ms p95={result['interactive_p95_ms']:.1f}ms "
+            f"bulk_tail={result['bulk_tail_secs']:.1f}s"
+        )
+        for stage, wait_ms in sorted(queue_waits.items()):
+            print(f"  {stage:<28} mean wait {wait_ms:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Cold-start benchmark: import time of main.py and first-request latency, each in a fresh interpreter.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+FUNCTIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "functions")
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+HEAVY_MODULES = [
+    "langchain",
+    "langchain_core",
+    "langchain_community",
+    "langchain_openai",
+    "openai",
+    "bs4",
+    "youtube_transcript_api",
+    "apify_client",
+    "tiktoken",
+    "grpc",
+    "google.cloud.firestore",
+]
+
+# Job settings per configuration; "default" leaves them unset, as deployed
+CONFIGS = {
+    "default": {},
+    "local": {"JOB_DISPATCHER": "local", "JOB_STORE_BACKEND": "memory"},
+}
+
+# Runs in the child interpreter, which prints a single JSON line with its timings
+CHILD_SCRIPT = """
+import sys
+import json
+import time
+
+started_at = time.perf_counter()
+if {eager}:
+    import pipeline
+import main
+import_secs = time.perf_counter() - started_at
+loaded = [name for name in {heavy_modules} if name in sys.modules]
+
+from flask import Flask
+from fakes import FakeConfig, install_notion_fake
+
+store = install_notion_fake(FakeConfig())
+store.add_page("websites", "https://bench.example.com/existing", "Existing page")
+app = Flask(__name__)
+
+def request_secs(url):
+    with app.test_request_context("/", query_string={{"url": url}}) as context:
+        started_at = time.perf_counter()
+        main.get_notion_page(context.request)
+        return time.perf_counter() - started_at
+
+first_request_secs = request_secs("https://bench.example.com/existing")
+second_request_secs = request_secs("https://bench.example.com/existing")
+
+started_at = time.perf_counter()
+import pipeline
+pipeline_import_secs = time.perf_counter() - started_at
+
+print(json.dumps({{
+    "import_secs": import_secs,
+    "first_request_secs": first_request_secs,
+    "second_request_secs": second_request_secs,
+    "pipeline_import_secs": pipeline_import_secs,
+    "heavy_modules_loaded": loaded,
+}}))
+"""
+
+
+def run_child(eager: bool, config: str) -> dict:
+    env = {
+        **{name: value for name, value in os.environ.items() if not name.startswith("JOB_")},
+        **CONFIGS[config],
+        "PYTHONPATH": os.pathsep.join([FUNCTIONS_DIR, BENCHMARKS_DIR]),
+        "NOTION_WEBSITES_DATABASE_ID": "websites",
+        "NOTION_VIDEOS_DATABASE_ID": "videos",
+    }
+    for name in ["NOTION_TOKEN", "OPENAI_API_KEY", "APIFY_API_TOKEN", "CHROME_EXTENSION_ID", "METRICS_TOKEN"]:
+        env.setdefault(name, "benchmark")
+
+    script = CHILD_SCRIPT.format(eager=eager, heavy_modules=HEAVY_MODULES)
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=FUNCTIONS_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--eager",
+        action="store_true",
+        help="Import the full pipeline before main.py, as every endpoint did before lazy imports",
+    )
+    parser.add_argument(
+        "--configs",
+        default=",".join(CONFIGS),
+        help="Job configurations to measure: default (task queue and Firestore job store) and local",
+    )
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    for config in args.configs.split(","):
+        runs = [run_child(args.eager, config) for _ in range(args.runs)]
+        result = {
+            name: round(statistics.median(run[name] for run in runs) * 1000, 1)
+            for name in ["import_secs", "first_request_secs", "second_request_secs", "pipeline_import_secs"]
+        }
+        result["heavy_modules_loaded"] = runs[-1]["heavy_modules_loaded"]
+
+        if args.json:
+            print(json.dumps({"config": config, "runs": args.runs, "eager": args.eager, **result}))
+        else:
+            print(
+                f"config={config} runs={args.runs} eager={args.eager} import={result['import_secs']:.1f}ms "
+                f"first_get={result['first_request_secs']:.1f}ms "
+                f"second_get={result['second_request_secs']:.1f}ms "
+                f"deferred_pipeline_import={result['pipeline_import_secs']:.1f}ms"
+            )
+            print(f"  heavy modules loaded by main.py: {', '.join(result['heavy_modules_loaded']) or 'none'}")
+
+if __name__ == "__main__":
+    main()
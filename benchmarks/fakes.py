@@ -0,0 +1,544 @@
+import json
+import asyncio
+import random
+import time
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Iterator
+
+import httpx
+import requests
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.messages.ai import UsageMetadata
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from notion_client import APIErrorCode, APIResponseError
+
+WORDS = (
+    "growth revenue startup market customer product launch metric funding team "
+    "insight data trend report strategy users retention churn pricing model"
+).split()
+
+
+class Latency:
+    def __init__(self, mean_secs: float = 0.0, jitter_secs: float = 0.0, failure_rate: float = 0.0):
+        self.mean_secs = mean_secs
+        self.jitter_secs = jitter_secs
+        self.failure_rate = failure_rate
+
+    def sample(self) -> float:
+        return max(0.0, random.uniform(self.mean_secs - self.jitter_secs, self.mean_secs + self.jitter_secs))
+
+    def wait(self) -> None:
+        time.sleep(self.sample())
+
+    def fails(self) -> bool:
+        return random.random() < self.failure_rate
+
+
+class FakeConfig:
+    def __init__(
+        self,
+        content_words: int = 2000,
+        report_lines: int = 40,
+        apify: Latency | None = None,
+        llm: Latency | None = None,
+        llm_secs_per_1k_output_chars: float = 0.0,
+        notion: Latency | None = None,
+        http: Latency | None = None,
+        youtube: Latency | None = None,
+        http_fast_path: bool = True,
+    ):
+        self.content_words = content_words
+        self.report_lines = report_lines
+        self.apify = apify or Latency()
+        self.llm = llm or Latency()
+        self.llm_secs_per_1k_output_chars = llm_secs_per_1k_output_chars
+        self.notion = notion or Latency()
+        self.http = http or Latency()
+        self.youtube = youtube or Latency()
+        # When False, the page looks like a JavaScript shell and the Apify crawler is used
+        self.http_fast_path = http_fast_path
+        # Models that always time out, to exercise model fallbacks
+        self.failing_models = set()
+        # Concurrent completions the fake OpenAI serves before callers queue, like a rate limit
+        self.llm_capacity = None
+        # Pages are stable per URL until their version is bumped, and are served with an ETag
+        self.page_versions = {}
+
+
+def fake_text(words: int, rng: random.Random | None = None) -> str:
+    rng = rng or random
+    lines = []
+    for start in range(0, words, 60):
+        line = " ".join(rng.choice(WORDS) for _ in range(min(60, words - start)))
+        lines.append(f"{line} 42% of [source](https://example.com/{start}).")
+    return "\n\n".join(lines)
+
+
+def fake_report(lines: int) -> dict:
+    content = ["## Overview"]
+    for i in range(lines):
+        if i % 10 == 9:
+            content.append(f"## Section {i // 10}")
+        content.append(f"- **Point {i}** with *emphasis* and a [link](https://example.com/{i}) {fake_text(20)}")
+    return {"title": "Benchmark report", "content": "\n".join(content)}
+
+
+def now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# Apify
+
+
+# Caption segments shared by the Apify actor and the transcript API: 12 words every 6 seconds
+def fake_segments(words: int) -> list:
+    text = fake_text(words).split()
+    return [
+        {"text": " ".join(text[i : i + 12]), "start": i / 2.0, "duration": 6.0}
+        for i in range(0, len(text), 12)
+    ]
+
+
+def fake_srt(words: int) -> str:
+    def timestamp(secs: float) -> str:
+        return f"{int(secs // 3600):02d}:{int(secs % 3600 // 60):02d}:{int(secs % 60):02d},{int(secs % 1 * 1000):03d}"
+
+    return "\n\n".join(
+        f"{i + 1}\n{timestamp(entry['start'])} --> {timestamp(entry['start'] + entry['duration'])}\n{entry['text']}"
+        for i, entry in enumerate(fake_segments(words))
+    )
+
+
+class FakeRunClient:
+    def __init__(self, apify: "FakeApifyClient", run_id: str):
+        self.apify = apify
+        self.run_id = run_id
+
+    async def wait_for_finish(self, wait_secs: int | None = None) -> dict:
+        run = self.apify.runs[self.run_id]
+        remaining = run["finishes_at"] - time.monotonic()
+        if run["status"] == "RUNNING" and remaining > 0:
+            await asyncio.sleep(min(remaining, wait_secs or remaining))
+        if run["status"] == "RUNNING" and time.monotonic() >= run["finishes_at"]:
+            run["status"] = "FAILED" if run["fails"] else "SUCCEEDED"
+        return dict(run)
+
+    async def abort(self, gracefully: bool | None = None) -> dict:
+        self.apify.aborted += 1
+        self.apify.runs[self.run_id]["status"] = "ABORTED"
+        return dict(self.apify.runs[self.run_id])
+
+
+class FakeActorClient:
+    def __init__(self, apify: "FakeApifyClient", actor_id: str):
+        self.apify = apify
+        self.actor_id = actor_id
+
+    async def start(self, run_input: Any = None, **kwargs) -> dict:
+        config = self.apify.config
+        run_id = uuid.uuid4().hex
+        if self.actor_id == "streamers/youtube-scraper":
+            item = {
+                "subtitles": [
+                    {"language": language, "type": kind, "srt": fake_srt(config.content_words)}
+                    for language, kind in [("de", "user_generated"), ("en", "auto_generated")]
+                ],
+                "thumbnailUrl": "https://img.youtube.com/vi/fake/maxresdefault.jpg",
+            }
+        else:
+            item = {"markdown": fake_text(config.content_words), "text": ""}
+        self.apify.runs[run_id] = {
+            "id": run_id,
+            "status": "RUNNING",
+            "defaultDatasetId": run_id,
+            "finishes_at": time.monotonic() + config.apify.sample(),
+            "fails": config.apify.fails(),
+        }
+        self.apify.datasets[run_id] = [item]
+        return dict(self.apify.runs[run_id])
+
+
+class FakeDatasetClient:
+    def __init__(self, items: list):
+        self.items = items
+
+    async def iterate_items(self, limit: int | None = None, **kwargs) -> AsyncIterator[dict]:
+        for item in self.items[:limit]:
+            yield item
+
+
+class FakeApifyClient:
+    def __init__(self, config: FakeConfig):
+        self.config = config
+        self.runs = {}
+        self.datasets = {}
+        self.aborted = 0
+
+    def actor(self, actor_id: str) -> FakeActorClient:
+        return FakeActorClient(self, actor_id)
+
+    def run(self, run_id: str) -> FakeRunClient:
+        return FakeRunClient(self, run_id)
+
+    def dataset(self, dataset_id: str) -> FakeDatasetClient:
+        return FakeDatasetClient(self.datasets[dataset_id])
+
+
+def fake_apify_client_async(config: FakeConfig):
+    client = FakeApifyClient(config)
+
+    def FakeApifyClientAsync(*args, **kwargs) -> FakeApifyClient:
+        return client
+
+    return FakeApifyClientAsync
+
+
+# OpenAI
+
+
+def fake_chat_openai(config: FakeConfig):
+    slots = threading.Semaphore(config.llm_capacity) if config.llm_capacity else None
+
+    class FakeChatOpenAI(BaseChatModel):
+        model: str = "fake"
+        temperature: float = 0
+        timeout: float | None = None
+        max_retries: int = 0
+
+        @property
+        def _llm_type(self) -> str:
+            return "fake-chat-openai"
+
+        def __respond(self, messages: list[BaseMessage]) -> str:
+            if slots:
+                with slots:
+                    config.llm.wait()
+            else:
+                config.llm.wait()
+            if config.llm.fails() or self.model in config.failing_models:
+                raise TimeoutError("Fake OpenAI timeout")
+            prompt = messages[-1].content
+            if prompt.rstrip().endswith("# Notes"):
+                # Notes are about a tenth of the chunk they summarize
+                return fake_text(max(20, len(prompt) // 70))
+            return json.dumps(fake_report(config.report_lines))
+
+        def __cached_tokens(self, messages: list[BaseMessage]) -> int:
+            # Like OpenAI: prompts of 1024+ tokens reuse the static prefix in 128-token steps
+            prompt = messages[-1].content
+            if len(prompt) // 4 < 1024:
+                return 0
+            prefix_tokens = prompt.find("# User Guidance") // 4
+            return max(0, prefix_tokens // 128 * 128)
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            text = self.__respond(messages)
+            time.sleep(len(text) / 1000 * config.llm_secs_per_1k_output_chars)
+            return ChatResult(
+                generations=[ChatGeneration(message=AIMessage(content=text))],
+                llm_output={
+                    "token_usage": {
+                        "prompt_tokens": sum(len(m.content) for m in messages) // 4,
+                        "prompt_tokens_details": {"cached_tokens": self.__cached_tokens(messages)},
+                        "completion_tokens": len(text) // 4,
+                        "total_tokens": (sum(len(m.content) for m in messages) + len(text)) // 4,
+                    },
+                    "model_name": self.model,
+                },
+            )
+
+        def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+            text = self.__respond(messages)
+            for start in range(0, len(text), 20):
+                time.sleep(20 / 1000 * config.llm_secs_per_1k_output_chars)
+                yield ChatGenerationChunk(message=AIMessageChunk(content=text[start : start + 20]))
+            if kwargs.get("stream_options", {}).get("include_usage"):
+                # Like OpenAI: usage comes in a last chunk without content
+                prompt_tokens = sum(len(m.content) for m in messages) // 4
+                usage = UsageMetadata(
+                    input_tokens=prompt_tokens,
+                    output_tokens=len(text) // 4,
+                    total_tokens=prompt_tokens + len(text) // 4,
+                )
+                yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+    return FakeChatOpenAI
+
+
+# Notion
+
+
+def rate_limited_error() -> APIResponseError:
+    response = httpx.Response(
+        429,
+        headers={"retry-after": "0.1"},
+        text='{"code": "rate_limited", "message": "Rate limited"}',
+        request=httpx.Request("POST", "https://api.notion.com/v1"),
+    )
+    return APIResponseError(response, "Rate limited", APIErrorCode.RateLimited)
+
+
+class FakeNotionStore:
+    def __init__(self, config: FakeConfig):
+        self.config = config
+        self.pages = {}
+        self.blocks = {}
+        self.lock = threading.Lock()
+
+    def call(self) -> None:
+        self.config.notion.wait()
+        if self.config.notion.fails():
+            raise rate_limited_error()
+
+    def add_page(self, database_id: str, url: str, title: str) -> dict:
+        page_id = uuid.uuid4().hex
+        page = {
+            "id": page_id,
+            "url": f"https://www.notion.so/{page_id}",
+            "parent": {"database_id": database_id},
+            "created_time": now(),
+            "last_edited_time": now(),
+            "archived": False,
+            "properties": {
+                "Name": {"title": [{"text": {"content": title}}]},
+                "URL": {"url": url},
+            },
+        }
+        with self.lock:
+            self.pages[page_id] = page
+            self.blocks[page_id] = []
+        return page
+
+
+class FakePages:
+    def __init__(self, store: FakeNotionStore):
+        self.store = store
+
+    def create(self, parent: dict, properties: dict, children: list | None = None, **kwargs) -> dict:
+        self.store.call()
+        if children and len(children) > 100:
+            raise ValueError("body.children.length should be ≤ 100")
+        page = self.store.add_page(
+            parent["database_id"],
+            properties["URL"]["url"],
+            properties["Name"]["title"][0]["text"]["content"],
+        )
+        page["properties"].update({k: v for k, v in properties.items() if k not in page["properties"]})
+        page.update({k: v for k, v in kwargs.items() if k in ("icon", "cover")})
+        self.store.blocks[page["id"]] += children or []
+        return dict(page)
+
+    def retrieve(self, page_id: str) -> dict:
+        self.store.call()
+        return dict(self.store.pages[page_id])
+
+    def update(self, page_id: str, **kwargs) -> dict:
+        self.store.call()
+        page = self.store.pages[page_id]
+        page["properties"].update(kwargs.get("properties", {}))
+        page.update({k: v for k, v in kwargs.items() if k in ("icon", "cover")})
+        page["last_edited_time"] = now()
+        return dict(page)
+
+
+class FakeBlockChildren:
+    def __init__(self, store: FakeNotionStore):
+        self.store = store
+
+    def append(self, block_id: str, children: list, **kwargs) -> dict:
+        self.store.call()
+        if len(children) > 100:
+            raise ValueError("body.children.length should be ≤ 100")
+        self.store.blocks[block_id] += children
+        return {"results": children}
+
+    def list(self, block_id: str, start_cursor: str | None = None, **kwargs) -> dict:
+        self.store.call()
+        start = int(start_cursor or 0)
+        # Deleted blocks keep their slot so the ids of the others stay valid
+        blocks = [
+            {"id": f"{block_id}-{i}", **block}
+            for i, block in enumerate(self.store.blocks.get(block_id, []))
+            if block is not None
+        ]
+        results = blocks[start : start + 100]
+        has_more = start + 100 < len(blocks)
+        return {"results": results, "has_more": has_more, "next_cursor": str(start + 100) if has_more else None}
+
+
+class FakeBlocks:
+    def __init__(self, store: FakeNotionStore):
+        self.store = store
+        self.children = FakeBlockChildren(store)
+
+    def delete(self, block_id: str) -> dict:
+        self.store.call()
+        page_id, index = block_id.rsplit("-", 1)
+        self.store.blocks[page_id][int(index)] = None
+        return {"id": block_id, "archived": True}
+
+
+class FakeDatabases:
+    def __init__(self, store: FakeNotionStore):
+        self.store = store
+
+    def query(self, database_id: str, filter: dict | None = None, start_cursor: str | None = None, page_size: int = 100, **kwargs) -> dict:
+        self.store.call()
+        with self.store.lock:
+            pages = [
+                p
+                for p in self.store.pages.values()
+                if p["parent"]["database_id"] == database_id and not p["archived"]
+            ]
+        if filter and "property" in filter:
+            pages = [p for p in pages if p["properties"]["URL"]["url"] == filter["url"]["equals"]]
+        elif filter and "timestamp" in filter:
+            since = filter["last_edited_time"]["on_or_after"]
+            pages = [p for p in pages if p["last_edited_time"] >= since]
+        descending = any(sort.get("direction") == "descending" for sort in kwargs.get("sorts", []))
+        pages.sort(key=lambda p: p["last_edited_time"], reverse=descending)
+
+        start = int(start_cursor or 0)
+        has_more = start + page_size < len(pages)
+        return {
+            "results": [dict(p) for p in pages[start : start + page_size]],
+            "has_more": has_more,
+            "next_cursor": str(start + page_size) if has_more else None,
+        }
+
+
+def fake_notion_client(store: FakeNotionStore):
+    class FakeClient:
+        def __init__(self, *args, **kwargs):
+            self.pages = FakePages(store)
+            self.blocks = FakeBlocks(store)
+            self.databases = FakeDatabases(store)
+
+    return FakeClient
+
+
+# YouTube transcripts
+
+
+def fake_youtube_transcript_api(config: FakeConfig):
+    class FakeTranscript:
+        def __init__(self, language_code: str, is_generated: bool):
+            self.language_code = language_code
+            self.is_generated = is_generated
+
+        def fetch(self) -> list:
+            config.youtube.wait()
+            if config.youtube.fails():
+                raise RuntimeError("Fake transcript failure")
+            return fake_segments(config.content_words)
+
+    class FakeTranscriptList:
+        tracks = [FakeTranscript("de", False), FakeTranscript("en", True), FakeTranscript("it", True)]
+
+        def __iter__(self):
+            return iter(self.tracks)
+
+    class FakeYouTubeTranscriptApi:
+        @staticmethod
+        def list_transcripts(video_id: str) -> FakeTranscriptList:
+            return FakeTranscriptList()
+
+    return FakeYouTubeTranscriptApi
+
+
+# Plain HTTP (page fetches, favicons and thumbnails)
+
+
+class FakeResponse:
+    def __init__(self, text: str = "", status_code: int = 200, headers: dict | None = None):
+        self.text = text
+        self.content = text.encode()
+        self.status_code = status_code
+        self.headers = requests.structures.CaseInsensitiveDict(headers or {"Content-Type": "text/html"})
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error")
+
+    @property
+    def encoding(self) -> str:
+        return "utf-8"
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start : start + chunk_size]
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "FakeResponse":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def fake_requests(config: FakeConfig):
+    class FakeRequests:
+        exceptions = requests.exceptions
+
+        @staticmethod
+        def get(url: str, **kwargs) -> FakeResponse:
+            config.http.wait()
+            if config.http.fails():
+                raise requests.exceptions.ConnectionError("Fake connection error")
+            if not config.http_fast_path:
+                return FakeResponse('<html><body><div id="root"></div><noscript>Please enable JavaScript</noscript></body></html>')
+            version = config.page_versions.get(url, 0)
+            etag = f'"{version}"'
+            if kwargs.get("headers", {}).get("If-None-Match") == etag:
+                return FakeResponse(status_code=304, headers={"ETag": etag})
+            rng = random.Random(f"{url}#{version}")
+            paragraphs = "".join(f"<p>{p}</p>" for p in fake_text(config.content_words, rng).split("\n\n"))
+            return FakeResponse(
+                f'<html><head><link rel="icon" href="/favicon.png"></head>'
+                f"<body><nav>Menu</nav><article>{paragraphs}</article><footer>Footer</footer></body></html>",
+                headers={"Content-Type": "text/html", "ETag": etag},
+            )
+
+        @staticmethod
+        def head(url: str, **kwargs) -> FakeResponse:
+            config.http.wait()
+            return FakeResponse(status_code=200)
+
+    return FakeRequests
+
+
+def install_notion_fake(config: FakeConfig) -> FakeNotionStore:
+    import notion_client
+    import clients
+
+    store = FakeNotionStore(config)
+    # Clients are imported lazily and shared, so patch the SDK and drop any cached instance
+    notion_client.Client = fake_notion_client(store)
+    clients.get_notion_client.cache_clear()
+    return store
+
+
+def install_fakes(config: FakeConfig) -> FakeNotionStore:
+    import apify_client
+    import langchain_openai
+    import clients
+    import utils
+    import http_scraper
+    import metadata
+
+    store = install_notion_fake(config)
+    apify_client.ApifyClientAsync = fake_apify_client_async(config)
+    langchain_openai.ChatOpenAI = fake_chat_openai(config)
+    clients.get_apify_client_async.cache_clear()
+    clients.get_chat_model.cache_clear()
+    for get_chain in (utils.get_report_chain, utils.get_report_stream_chain, utils.get_notes_chain):
+        get_chain.cache_clear()
+    utils.YouTubeTranscriptApi = fake_youtube_transcript_api(config)
+    metadata.requests = fake_requests(config)
+    http_scraper.requests = fake_requests(config)
+    return store
@@ -0,0 +1,94 @@
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Coroutine
+
+from apify_shared.consts import ActorJobStatus
+
+from clients import get_apify_client_async
+from resilience import create_provider
+from scrape_orchestrator import ScrapeCancelled
+from logger import setup_logger
+
+logger = setup_logger()
+
+
+def is_transient_apify_error(error: Exception) -> bool:
+    # Failed or timed out runs count against the circuit, cancelled runs do not
+    return isinstance(error, (RuntimeError, TimeoutError, ConnectionError))
+
+
+# Strategies are already hedged by the orchestrator, so a failed run is not retried
+apify_provider = create_provider(
+    "apify", timeout_secs=30, max_attempts=1, is_transient=is_transient_apify_error
+)
+
+
+class ApifyRunner:
+    # Extra time past the actor's own timeout before the run is aborted from here
+    timeout_grace_secs = 30
+
+    def __init__(self, poll_interval_secs: float = 5):
+        self.poll_interval_secs = poll_interval_secs
+        self.loop = None
+        self.lock = threading.Lock()
+
+    def __get_loop(self) -> asyncio.AbstractEventLoop:
+        # A single event loop supervises every run in the process, started on first use
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self.loop.run_forever, name="apify-runner", daemon=True
+                ).start()
+            return self.loop
+
+    async def __wait_for_run(
+        self, run_client, run: dict, cancel_event: threading.Event, deadline: float
+    ) -> dict:
+        while not ActorJobStatus(run["status"]).is_terminal:
+            remaining = deadline - time.monotonic()
+            if cancel_event.is_set() or remaining <= 0:
+                logger.info(f"Aborting Apify run {run['id']}")
+                await run_client.abort()
+                if cancel_event.is_set():
+                    raise ScrapeCancelled(f"Apify run {run['id']} was aborted")
+                raise TimeoutError(f"Apify run {run['id']} timed out")
+            wait_secs = max(1, int(min(self.poll_interval_secs, remaining)))
+            run = await run_client.wait_for_finish(wait_secs=wait_secs) or run
+        return run
+
+    async def run(
+        self,
+        actor_id: str,
+        run_input: dict,
+        timeout_secs: int,
+        memory_mbytes: int,
+        cancel_event: threading.Event,
+    ) -> tuple[dict, dict]:
+        # Must run on the runner's loop, which owns the client's connection pool
+        client = get_apify_client_async(apify_provider.timeout_secs)
+        run = await client.actor(actor_id).start(
+            run_input=run_input, timeout_secs=timeout_secs, memory_mbytes=memory_mbytes
+        )
+        deadline = time.monotonic() + timeout_secs + self.timeout_grace_secs
+        run = await self.__wait_for_run(client.run(run["id"]), run, cancel_event, deadline)
+
+        if run["status"] != ActorJobStatus.SUCCEEDED:
+            raise RuntimeError(f"Apify run {run['id']} finished with status {run['status']}")
+
+        # Only the first item is used, so stop reading the dataset after it
+        async for item in client.dataset(run["defaultDatasetId"]).iterate_items(limit=1):
+            return run, item
+        raise ValueError(f"Apify run {run['id']} returned no items")
+
+    def submit(self, coroutine: Coroutine) -> Future:
+        # Returns at once: callers wait on the future, so no thread is held while a run is supervised
+        return asyncio.run_coroutine_threadsafe(coroutine, self.__get_loop())
+
+
+apify_runner = ApifyRunner(
+    poll_interval_secs=float(os.environ.get("APIFY_POLL_INTERVAL_SECS", "5")),
+)
@@ -0,0 +1,222 @@
+import os
+import re
+import sys
+import json
+import argparse
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable
+
+from dotenv import load_dotenv
+
+from pipeline import add_late_metadata, generate_report, page_fingerprint, scrape
+from metadata import metadata_enricher
+from urls import is_youtube_url, normalize_url
+from utils import NotionInterface
+from scheduler import Priority, current_request, scheduled_as
+from metrics import metrics
+from logger import setup_logger
+
+load_dotenv()
+
+logger = setup_logger()
+
+HREF_RE = re.compile(r"""href=["'](https?://[^"']+)["']""", re.IGNORECASE)
+
+
+class BulkStatus:
+    CREATED = "created"
+    SKIPPED = "skipped"
+    FAILED = "failed"
+
+
+def read_urls(text: str) -> list[str]:
+    # Browser bookmark exports are HTML, reading lists are one URL per line
+    if "<a " in text.lower():
+        return HREF_RE.findall(text)
+    return [
+        line.strip()
+        for line in text.splitlines()
+        if line.strip() and not line.lstrip().startswith("#")
+    ]
+
+
+class BulkProgress:
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.records = {}
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path) as file:
+                for line in file:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.records[record["url"]] = record
+            logger.info(f"Loaded {len(self.records)} records from {path}")
+
+    def is_done(self, url: str) -> bool:
+        record = self.records.get(url)
+        return record is not None and record["status"] != BulkStatus.FAILED
+
+    def add(self, record: dict) -> None:
+        with self.lock:
+            self.records[record["url"]] = record
+            if self.path:
+                with open(self.path, "a") as file:
+                    file.write(json.dumps(record) + "\n")
+
+
+class BulkImporter:
+    def __init__(
+        self,
+        scrape_concurrency: int = 4,
+        llm_concurrency: int = 2,
+        notion_concurrency: int = 1,
+        progress: BulkProgress | None = None,
+        on_progress: Callable[[dict], None] | None = None,
+    ):
+        # Each stage is bounded separately, so URLs overlap across stages and the
+        # slowest provider sets the pace instead of the sum of all of them
+        self.scrape_slots = threading.Semaphore(scrape_concurrency)
+        self.llm_slots = threading.Semaphore(llm_concurrency)
+        self.notion_slots = threading.Semaphore(notion_concurrency)
+        self.max_workers = scrape_concurrency + llm_concurrency + notion_concurrency
+        self.progress = progress or BulkProgress()
+        self.on_progress = on_progress
+        self.lock = threading.Lock()
+
+    def __process(self, url: str, guidance: str, force: bool) -> dict:
+        notion = NotionInterface(is_youtube=is_youtube_url(url))
+        if not force and (existing := notion.get_database_entry(url)):
+            logger.info(f"Skipping {url}, page already exists: {existing['page_url']}")
+            return {"url": url, "status": BulkStatus.SKIPPED, "result": existing}
+
+        metadata = metadata_enricher.submit(url)
+        with self.scrape_slots:
+            result = scrape(url, use_cache=not force)
+        with self.llm_slots:
+            report = generate_report(notion, result["content"], guidance)
+        result = metadata_enricher.resolve(result, metadata)
+        with self.notion_slots, metrics.span("create_page", url):
+            page = notion.create_page(
+                url, report, result["icon"], result["cover"], page_fingerprint(notion, result, guidance)
+            )
+        add_late_metadata(notion, page, result, metadata)
+        return {"url": url, "status": BulkStatus.CREATED, "result": page}
+
+    def __run_one(self, url: str, guidance: str, force: bool, summary: dict) -> None:
+        try:
+            record = self.__process(url, guidance, force)
+        except Exception as e:
+            logger.error(f"Bulk import of {url} failed. Reason: {e}")
+            record = {"url": url, "status": BulkStatus.FAILED, "error": str(e)}
+        self.__finish(record, summary)
+
+    def __finish(self, record: dict, summary: dict) -> None:
+        self.progress.add(record)
+        metrics.increment("bulk_import_urls", status=record["status"])
+
+        with self.lock:
+            summary[record["status"]] += 1
+            summary["done"] += 1
+            logger.info(
+                f"Bulk import progress: {summary['done']}/{summary['total']} "
+                f"(created {summary['created']}, skipped {summary['skipped']}, failed {summary['failed']})"
+            )
+            if self.on_progress:
+                self.on_progress(dict(summary))
+
+    def run(self, urls: Iterable[str], guidance: str = "", force: bool = False) -> dict:
+        # Normalize and drop duplicates, then resume past URLs finished in an earlier run.
+        # URLs that cannot be normalized, such as playlist links, fail on their own.
+        normalized, invalid = [], {}
+        for url in urls:
+            try:
+                normalized.append(normalize_url(url))
+            except ValueError as e:
+                invalid[url] = str(e)
+        urls = list(dict.fromkeys(normalized))
+        pending = [url for url in urls if not self.progress.is_done(url)]
+        summary = {
+            "total": len(urls) + len(invalid),
+            "done": len(urls) - len(pending),
+            BulkStatus.CREATED: 0,
+            BulkStatus.SKIPPED: 0,
+            BulkStatus.FAILED: 0,
+            "resumed": len(urls) - len(pending),
+        }
+        logger.info(f"Bulk importing {len(pending)} URLs ({summary['resumed']} already done)")
+        for url, error in invalid.items():
+            logger.warning(f"Skipping invalid URL {url}: {error}")
+            self.__finish({"url": url, "status": BulkStatus.FAILED, "error": error}, summary)
+
+        # Bulk imports queue behind interactive requests, and workers inherit the requesting user
+        _, user = current_request.get()
+        with metrics.span("bulk_import", urls=len(pending)) as span, scheduled_as(
+            Priority.BACKGROUND, user
+        ):
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for url in pending:
+                    executor.submit(
+                        contextvars.copy_context().run, self.__run_one, url, guidance, force, summary
+                    )
+            span.update(
+                created=summary[BulkStatus.CREATED],
+                skipped=summary[BulkStatus.SKIPPED],
+                failed=summary[BulkStatus.FAILED],
+            )
+
+        return {
+            **summary,
+            "results": {url: self.progress.records.get(url) for url in [*urls, *invalid]},
+        }
+
+
+def run_bulk_import(
+    urls: list[str],
+    guidance: str = "",
+    force: bool = False,
+    on_progress: Callable[[dict], None] | None = None,
+) -> dict:
+    importer = BulkImporter(
+        scrape_concurrency=int(os.environ.get("BULK_SCRAPE_CONCURRENCY", "4")),
+        llm_concurrency=int(os.environ.get("BULK_LLM_CONCURRENCY", "2")),
+        notion_concurrency=int(os.environ.get("BULK_NOTION_CONCURRENCY", "1")),
+        on_progress=on_progress,
+    )
+    return importer.run(urls, guidance, force)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Summarize a list of URLs into Notion pages")
+    parser.add_argument("input", help="File with one URL per line or a bookmarks HTML export, '-' for stdin")
+    parser.add_argument("--guidance", default="")
+    parser.add_argument("--force", action="store_true", help="Create pages even if the URL already has one")
+    parser.add_argument("--progress-file", default="bulk_progress.jsonl", help="Resume file, appended as URLs finish")
+    parser.add_argument("--scrape-concurrency", type=int, default=int(os.environ.get("BULK_SCRAPE_CONCURRENCY", "4")))
+    parser.add_argument("--llm-concurrency", type=int, default=int(os.environ.get("BULK_LLM_CONCURRENCY", "2")))
+    parser.add_argument("--notion-concurrency", type=int, default=int(os.environ.get("BULK_NOTION_CONCURRENCY", "1")))
+    args = parser.parse_args()
+
+    if args.input == "-":
+        text = sys.stdin.read()
+    else:
+        with open(args.input) as file:
+            text = file.read()
+
+    importer = BulkImporter(
+        scrape_concurrency=args.scrape_concurrency,
+        llm_concurrency=args.llm_concurrency,
+        notion_concurrency=args.notion_concurrency,
+        progress=BulkProgress(args.progress_file),
+    )
+    summary = importer.run(read_urls(text), args.guidance, args.force)
+    print(
+        f"Done: {summary['created']} created, {summary['skipped']} skipped, "
+        f"{summary['failed']} failed, {summary['resumed']} resumed from {args.progress_file}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse, urlunparse
+
+from storage import Storage, get_storage
+from metrics import metrics
+from logger import preview, setup_logger
+
+logger = setup_logger()
+
+
+class Cache:
+    def __init__(self, name: str, max_entries: int, ttl_secs: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_secs = ttl_secs
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: str):
+        # Backends lock themselves, so a slow shared backend does not serialize every lookup
+        value = self._get(key, time.time())
+        with self.lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        result = "hit" if value is not None else "miss"
+        metrics.increment("cache_lookups", cache=self.name, result=result)
+        logger.info(f"Cache {result} [{self.name}]: {preview(key)}")
+        return value
+
+    def set(self, key: str, value, ttl_secs: float | None = None) -> None:
+        expires_at = time.time() + (ttl_secs if ttl_secs is not None else self.ttl_secs)
+        self._set(key, value, expires_at)
+
+    def stats(self) -> dict:
+        return {"name": self.name, "hits": self.hits, "misses": self.misses, "size": len(self)}
+
+    def _get(self, key: str, now: float):
+        raise NotImplementedError
+
+    def _set(self, key: str, value, expires_at: float) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class LRUCache(Cache):
+    def __init__(self, name: str, max_entries: int = 256, ttl_secs: float = 86400):
+        super().__init__(name, max_entries, ttl_secs)
+        self.entries = OrderedDict()
+        self.entries_lock = threading.Lock()
+
+    def _get(self, key: str, now: float):
+        with self.entries_lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def _set(self, key: str, value, expires_at: float) -> None:
+        with self.entries_lock:
+            self.entries[key] = (value, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class SQLiteCache(Cache):
+    def __init__(
+        self, name: str, path: str, max_entries: int = 4096, ttl_secs: float = 86400
+    ):
+        super().__init__(name, max_entries, ttl_secs)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection_lock = threading.Lock()
+        self.table = f"cache_{name}"
+        with self.connection:
+            self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+
+    def _get(self, key: str, now: float):
+        with self.connection_lock:
+            row = self.connection.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            with self.connection:
+                if row[1] <= now:
+                    self.connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    return None
+                self.connection.execute(
+                    f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+        return json.loads(row[0])
+
+    def _set(self, key: str, value, expires_at: float) -> None:
+        now = time.time()
+        with self.connection_lock, self.connection:
+            self.connection.execute(
+                f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, now),
+            )
+            self.connection.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,))
+            self.connection.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self) -> int:
+        with self.connection_lock:
+            return self.connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+class SharedCache(Cache):
+    def __init__(self, name: str, storage: Storage, max_entries: int = 256, ttl_secs: float = 86400):
+        super().__init__(name, max_entries, ttl_secs)
+        self.storage = storage
+        # Hot keys are answered locally; copies are kept briefly since other instances write too
+        self.local = LRUCache(name, max_entries=max_entries, ttl_secs=ttl_secs)
+        self.local_ttl_secs = float(os.environ.get("SHARED_CACHE_LOCAL_TTL_SECS", "300"))
+
+    def _get(self, key: str, now: float):
+        value = self.local._get(key, now)
+        if value is None:
+            value = self.storage.get(f"cache_{self.name}", key)
+            if value is not None:
+                self.local._set(key, value, now + self.local_ttl_secs)
+        return value
+
+    def _set(self, key: str, value, expires_at: float) -> None:
+        now = time.time()
+        self.local._set(key, value, min(expires_at, now + self.local_ttl_secs))
+        self.storage.set(f"cache_{self.name}", key, value, expires_at - now)
+
+    def __len__(self) -> int:
+        return len(self.local)
+
+
+def create_cache(name: str, ttl_secs: float) -> Cache:
+    backend = os.environ.get("CACHE_BACKEND", "memory")
+    max_entries = int(os.environ.get("CACHE_MAX_ENTRIES", "256"))
+    ttl_secs = float(os.environ.get(f"CACHE_{name.upper()}_TTL_SECS", ttl_secs))
+    if backend == "memory":
+        return LRUCache(name, max_entries=max_entries, ttl_secs=ttl_secs)
+    if backend == "sqlite":
+        path = os.environ.get("CACHE_PATH", "/tmp/notionify_cache.db")
+        return SQLiteCache(name, path, max_entries=max_entries, ttl_secs=ttl_secs)
+    if backend == "shared":
+        return SharedCache(name, get_storage(), max_entries=max_entries, ttl_secs=ttl_secs)
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+def scrape_cache_key(url: str) -> str:
+    parsed = urlparse(url)
+    normalized = urlunparse(
+        parsed._replace(
+            scheme=parsed.scheme.lower(),
+            netloc=parsed.netloc.lower(),
+            path=parsed.path.rstrip("/") or "/",
+            fragment="",
+        )
+    )
+    return f"scrape:{normalized}"
+
+
+def content_digest(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def report_cache_key(content: str, guidance: str, prompt_template: str, model: str) -> str:
+    return f"report:{content_digest(content, guidance, prompt_template, model)}"
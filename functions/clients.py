@@ -0,0 +1,30 @@
+import os
+from functools import lru_cache
+
+# Provider SDKs are imported on first use so endpoints that never call them start faster.
+# Each client is created once per process and reused, keeping its HTTP connections alive.
+
+
+@lru_cache(maxsize=None)
+def get_notion_client(timeout_secs: float = 60):
+    from notion_client import Client
+
+    return Client(auth=os.environ["NOTION_TOKEN"], timeout_ms=int(timeout_secs * 1000))
+
+
+@lru_cache(maxsize=None)
+def get_apify_client_async(timeout_secs: float = 360):
+    # Only used from the ApifyRunner event loop, which owns its connection pool
+    from apify_client import ApifyClientAsync
+
+    return ApifyClientAsync(
+        token=os.environ["APIFY_API_TOKEN"], max_retries=2, timeout_secs=int(timeout_secs)
+    )
+
+
+@lru_cache(maxsize=None)
+def get_chat_model(model: str, temperature: float = 0, timeout_secs: float | None = None):
+    from langchain_openai import ChatOpenAI
+
+    # Retries are handled by the resilience layer, which keeps them within a budget
+    return ChatOpenAI(model=model, temperature=temperature, timeout=timeout_secs, max_retries=0)
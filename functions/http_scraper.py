@@ -0,0 +1,233 @@
+import os
+import re
+import requests
+from bs4 import BeautifulSoup, NavigableString, Tag
+from urllib.parse import urljoin
+from langchain.schema import Document
+
+from resilience import create_provider
+from metrics import metrics
+from logger import setup_logger
+
+logger = setup_logger()
+
+
+def is_transient_http_error(error: Exception) -> bool:
+    return isinstance(
+        error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+    )
+
+
+# Arbitrary websites, so no circuit breaker: one failing site says nothing about the others
+http_provider = create_provider(
+    "http", timeout_secs=10, max_attempts=2, is_transient=is_transient_http_error, circuit_breaker=False
+)
+
+
+class NotModified(Exception):
+    pass
+
+
+def conditional_headers(validators: dict | None) -> dict:
+    headers = {}
+    if validators and validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators and validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def find_favicon(soup: BeautifulSoup, url: str) -> str | None:
+    icon_link = None
+    for rel in ["icon", "shortcut icon"]:
+        icon_link = soup.find("link", rel=rel)
+        if icon_link:
+            break
+
+    if icon_link and "href" in icon_link.attrs:
+        favicon_url = urljoin(url, icon_link["href"])
+        logger.info(f"Found favicon: {favicon_url}")
+        return favicon_url
+
+    logger.warning("No favicon found")
+    return None
+
+
+class HttpScraper:
+    headers = {
+        "User-Agent": (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+            "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+        ),
+        "Accept": "text/html,application/xhtml+xml",
+        "Accept-Language": "en-US,en;q=0.9",
+    }
+
+    min_words = int(os.environ.get("HTTP_SCRAPER_MIN_WORDS", "200"))
+    # Larger pages are cut off while downloading; parsing costs several times the page size
+    max_bytes = int(os.environ.get("HTTP_SCRAPER_MAX_BYTES", str(5 * 2**20)))
+
+    # Elements that never hold the main content
+    boilerplate_tags = [
+        "script", "style", "noscript", "template", "svg", "iframe",
+        "nav", "header", "footer", "aside", "form", "button",
+    ]
+    block_tags = {
+        "h1": "# ", "h2": "## ", "h3": "### ", "h4": "### ", "h5": "### ", "h6": "### ",
+        "p": "", "blockquote": "> ", "pre": "",
+    }
+    # Matched on the raw bytes, before the page is decoded
+    blocked_re = re.compile(
+        rb"captcha|cf-challenge|access denied|are you a robot|unusual traffic",
+        re.IGNORECASE,
+    )
+    js_shell_re = re.compile(
+        rb"enable javascript|requires javascript|javascript is (disabled|required)",
+        re.IGNORECASE,
+    )
+
+    def __inline_markdown(self, element: Tag, url: str) -> str:
+        parts = []
+        for child in element.children:
+            if isinstance(child, NavigableString):
+                parts.append(str(child))
+            elif child.name == "a" and child.get("href"):
+                text = child.get_text(" ", strip=True)
+                href = urljoin(url, child["href"])
+                parts.append(f"[{text}]({href})" if text else "")
+            elif child.name in ("strong", "b"):
+                text = child.get_text(" ", strip=True)
+                parts.append(f"**{text}**" if text else "")
+            elif child.name in ("em", "i"):
+                text = child.get_text(" ", strip=True)
+                parts.append(f"*{text}*" if text else "")
+            elif child.name == "br":
+                parts.append(" ")
+            elif isinstance(child, Tag):
+                parts.append(self.__inline_markdown(child, url))
+        return re.sub(r"\s+", " ", "".join(parts)).strip()
+
+    def __to_markdown(self, root: Tag, url: str) -> str:
+        lines = []
+        for element in root.find_all([*self.block_tags, "li"]):
+            # Nested blocks are rendered by their outermost block element
+            if element.find_parent([*self.block_tags, "li"]):
+                continue
+
+            if element.name == "pre":
+                # Code keeps its line breaks and indentation
+                code = element.get_text().strip("\n")
+                if code.strip():
+                    lines.append(f"```\n{code}\n```")
+                continue
+
+            text = self.__inline_markdown(element, url)
+            if not text:
+                continue
+
+            if element.name == "li":
+                if element.parent and element.parent.name == "ol":
+                    lines.append(f"{len(element.find_previous_siblings('li')) + 1}. {text}")
+                else:
+                    lines.append(f"- {text}")
+            else:
+                lines.append(f"{self.block_tags[element.name]}{text}")
+        return "\n\n".join(lines)
+
+    def __failed_quality_check(self, html: bytes, soup: BeautifulSoup, markdown: str) -> str | None:
+        words = len(markdown.split())
+        if self.blocked_re.search(html) and words < self.min_words * 2:
+            return "blocked"
+        if self.js_shell_re.search(html) or soup.select_one("#root:empty, #__next:empty, #app:empty"):
+            if words < self.min_words * 2:
+                return "JavaScript shell"
+        if words < self.min_words:
+            return f"too short ({words} words)"
+        return None
+
+    def __init__(self):
+        # ETag / Last-Modified of the last fetch, kept even if the extraction is rejected
+        self.validators = {}
+        self.not_modified = False
+
+    def scrape(self, url: str, validators: dict | None = None) -> Document | None:
+        with metrics.span("http_scrape", url) as span:
+            document = self.__scrape(url, validators)
+            span["accepted"] = document is not None
+            span["not_modified"] = self.not_modified
+        if self.not_modified:
+            raise NotModified(f"{url} has not changed since the last fetch")
+        return document
+
+    def __scrape(self, url: str, validators: dict | None) -> Document | None:
+        try:
+            response = http_provider.call(
+                requests.get,
+                url,
+                headers={**self.headers, **conditional_headers(validators)},
+                timeout=http_provider.timeout_secs,
+                stream=True,
+            )
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.info(f"Plain HTTP fetch failed for {url}. Reason: {e}")
+            return None
+
+        with response:
+            return self.__extract(url, response)
+
+    def __read(self, url: str, response: requests.Response) -> bytes | None:
+        body = bytearray()
+        try:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                body += chunk
+                if self.max_bytes and len(body) >= self.max_bytes:
+                    logger.warning(f"{url} is larger than {self.max_bytes} bytes, truncating it")
+                    metrics.increment("http_scrape_truncated")
+                    del body[self.max_bytes :]
+                    break
+        except requests.exceptions.RequestException as e:
+            logger.info(f"Plain HTTP download failed for {url}. Reason: {e}")
+            return None
+        return bytes(body)
+
+    def __extract(self, url: str, response: requests.Response) -> Document | None:
+        if response.status_code == 304:
+            logger.info(f"{url} not modified, skipping extraction")
+            self.not_modified = True
+            return None
+
+        self.validators = {
+            key: value
+            for key, value in (
+                ("etag", response.headers.get("ETag")),
+                ("last_modified", response.headers.get("Last-Modified")),
+            )
+            if value
+        }
+
+        if "html" not in response.headers.get("Content-Type", ""):
+            logger.info(f"Skipping plain HTTP extraction for non-HTML page: {url}")
+            return None
+
+        # The body is only downloaded once the headers show an HTML page
+        if (html := self.__read(url, response)) is None:
+            return None
+        # Without a charset in Content-Type requests assumes ISO-8859-1 for HTML, so the encoding
+        # is then left to BeautifulSoup, which finds it in the BOM or the meta tag or guesses it
+        content_type = response.headers.get("Content-Type", "").lower()
+        declared_encoding = response.encoding if "charset=" in content_type else None
+        soup = BeautifulSoup(html, "html.parser", from_encoding=declared_encoding)
+        icon = find_favicon(soup, url)
+
+        for tag in soup(self.boilerplate_tags):
+            tag.decompose()
+        root = soup.find("article") or soup.find("main") or soup.find(attrs={"role": "main"})
+        markdown = self.__to_markdown(root or soup.body or soup, url)
+
+        if reason := self.__failed_quality_check(html, soup, markdown):
+            logger.info(f"Plain HTTP extraction rejected for {url}: {reason}")
+            return None
+
+        logger.info(f"Scraped {url} over plain HTTP ({len(markdown)} characters)")
+        return Document(page_content=markdown, metadata={"icon": icon})
@@ -0,0 +1,186 @@
+import os
+import json
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable
+
+from storage import Storage, get_storage
+from scheduler import Priority, scheduled_as
+from logger import setup_logger
+
+logger = setup_logger()
+
+
+class JobStatus:
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobStore:
+    # Whether a job created on one instance can be read by a worker on another
+    shared_across_instances = False
+
+    def create(
+        self, payload: dict, user: str | None = None, priority: str = Priority.INTERACTIVE
+    ) -> dict:
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": JobStatus.PENDING,
+            "payload": payload,
+            "user": user,
+            "priority": priority,
+            "result": None,
+            "error": None,
+            "created_time": _now(),
+            "updated_time": _now(),
+        }
+        self.save(job)
+        return job
+
+    def update(self, job_id: str, **fields) -> dict:
+        job = self.get(job_id)
+        if job is None:
+            raise KeyError(f"Unknown job: {job_id}")
+        job.update(fields, updated_time=_now())
+        self.save(job)
+        return job
+
+    def get(self, job_id: str) -> dict | None:
+        raise NotImplementedError
+
+    def save(self, job: dict) -> None:
+        raise NotImplementedError
+
+
+class InMemoryJobStore(JobStore):
+    def __init__(self):
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def get(self, job_id: str) -> dict | None:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def save(self, job: dict) -> None:
+        with self.lock:
+            self.jobs[job["id"]] = dict(job)
+
+
+class SQLiteJobStore(JobStore):
+    def __init__(self, path: str):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, data TEXT NOT NULL)"
+            )
+
+    def get(self, job_id: str) -> dict | None:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT data FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, job: dict) -> None:
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO jobs (id, data) VALUES (?, ?)",
+                (job["id"], json.dumps(job)),
+            )
+
+
+class SharedJobStore(JobStore):
+    # Jobs are visible to every instance, so a task can run on another instance than its request
+    collection = "jobs"
+
+    def __init__(self, storage: Storage, ttl_secs: float):
+        self.storage = storage
+        self.ttl_secs = ttl_secs
+        self.shared_across_instances = storage.shared_across_instances
+
+    def get(self, job_id: str) -> dict | None:
+        return self.storage.get(self.collection, job_id)
+
+    def save(self, job: dict) -> None:
+        self.storage.set(self.collection, job["id"], job, self.ttl_secs)
+
+
+def create_job_store(dispatcher: str = "local") -> JobStore:
+    # Task queue workers are other function instances with their own /tmp, so they need Firestore
+    backend = os.environ.get("JOB_STORE_BACKEND") or ("firestore" if dispatcher == "tasks" else "sqlite")
+    ttl_secs = float(os.environ.get("JOB_TTL_SECS", str(7 * 24 * 3600)))
+    if backend == "memory":
+        store = InMemoryJobStore()
+    elif backend == "sqlite":
+        store = SQLiteJobStore(os.environ.get("JOB_STORE_PATH", "/tmp/notionify_jobs.db"))
+    elif backend == "firestore":
+        store = SharedJobStore(get_storage("firestore"), ttl_secs)
+    elif backend == "shared":
+        store = SharedJobStore(get_storage(), ttl_secs)
+    else:
+        raise ValueError(f"Unknown job store backend: {backend}")
+
+    if dispatcher == "tasks" and not store.shared_across_instances:
+        raise ValueError(
+            f"JOB_DISPATCHER=tasks runs jobs on other instances, which cannot read the {backend} "
+            f"job store. Set JOB_STORE_BACKEND=firestore, or shared with STORAGE_BACKEND=firestore."
+        )
+    return store
+
+
+def run_job(
+    store: JobStore, job_id: str, handler: Callable[..., dict], report_progress: bool = False
+) -> dict:
+    job = store.update(job_id, status=JobStatus.RUNNING)
+    logger.info(f"Running job {job_id}")
+    kwargs = dict(job["payload"])
+    if report_progress:
+        # Long-running handlers publish partial progress on the job while it runs
+        kwargs["on_progress"] = lambda progress: store.update(job_id, progress=progress)
+    try:
+        # Jobs keep the priority and user of the request that submitted them
+        with scheduled_as(job.get("priority", Priority.INTERACTIVE), job.get("user")):
+            result = handler(**kwargs)
+    except Exception as e:
+        logger.error(f"Job {job_id} failed. Reason: {e}")
+        return store.update(job_id, status=JobStatus.FAILED, error=str(e))
+    logger.info(f"Job {job_id} succeeded")
+    return store.update(job_id, status=JobStatus.SUCCEEDED, result=result)
+
+
+class LocalJobDispatcher:
+    def __init__(
+        self,
+        store: JobStore,
+        handler: Callable[..., dict],
+        max_workers: int = 2,
+        report_progress: bool = False,
+    ):
+        self.store = store
+        self.handler = handler
+        self.report_progress = report_progress
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def dispatch(self, job_id: str) -> None:
+        self.executor.submit(run_job, self.store, job_id, self.handler, self.report_progress)
+
+
+class TaskQueueJobDispatcher:
+    def __init__(self, function_name: str):
+        self.function_name = function_name
+
+    def dispatch(self, job_id: str) -> None:
+        from firebase_admin import functions
+
+        functions.task_queue(self.function_name).enqueue({"job_id": job_id})
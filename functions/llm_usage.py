@@ -0,0 +1,66 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+from langchain_community.callbacks import get_openai_callback
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from metrics import metrics
+from logger import setup_logger
+
+logger = setup_logger()
+
+# USD per 1M tokens: input, cached input, output
+MODEL_PRICES = {
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+}
+
+
+def usage_cost(model: str, usage: dict) -> float:
+    input_price, cached_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0, 0.0))
+    cached = usage.get("cached_prompt_tokens", 0)
+    return (
+        (usage.get("prompt_tokens", 0) - cached) * input_price
+        + cached * cached_price
+        + usage.get("completion_tokens", 0) * output_price
+    ) / 1_000_000
+
+
+class CachedTokensCallback(BaseCallbackHandler):
+    def __init__(self):
+        self.cached_prompt_tokens = 0
+        self.lock = threading.Lock()
+
+    def on_llm_end(self, response: LLMResult, **kwargs) -> None:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        details = usage.get("prompt_tokens_details") or {}
+        with self.lock:
+            self.cached_prompt_tokens += details.get("cached_tokens") or 0
+
+
+@contextmanager
+def track_llm_usage(span: dict, model: str) -> Iterator[list[BaseCallbackHandler]]:
+    # Yields the callbacks to pass to the chain; totals are added to the span on exit.
+    # The cost comes from MODEL_PRICES: LangChain's price table has no gpt-4.1 models.
+    cached = CachedTokensCallback()
+    with get_openai_callback() as usage:
+        yield [cached]
+
+    span.update(
+        prompt_tokens=usage.prompt_tokens,
+        cached_prompt_tokens=cached.cached_prompt_tokens,
+        completion_tokens=usage.completion_tokens,
+    )
+    span["cost_usd"] = round(usage_cost(model, span), 6)
+    metrics.increment("llm_prompt_tokens", cached.cached_prompt_tokens, cache="hit")
+    metrics.increment(
+        "llm_prompt_tokens", usage.prompt_tokens - cached.cached_prompt_tokens, cache="miss"
+    )
+    cached_share = cached.cached_prompt_tokens / usage.prompt_tokens if usage.prompt_tokens else 0.0
+    logger.info(
+        f"LLM usage: {usage.prompt_tokens} prompt tokens ({cached.cached_prompt_tokens} cached, "
+        f"{cached_share:.0%}), {usage.completion_tokens} completion tokens, ${span['cost_usd']:.4f}"
+    )
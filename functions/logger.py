@@ -4,3 +4,10 @@ def setup_logger() -> logging.Logger:
     logger = logging.getLogger(__name__)
     logger.setLevel(logging.INFO)
     return logger
+
+
+def preview(text: str, limit: int = 200) -> str:
+    # Large values are logged as a prefix and their size, never in full
+    if len(text) <= limit:
+        return repr(text)
+    return f"{text[:limit]!r}... ({len(text)} chars)"
@@ -1,16 +1,19 @@
 import os
+import hmac
 import json
-from firebase_functions import https_fn, options
+from firebase_functions import https_fn, options, tasks_fn
 from firebase_admin import initialize_app
 from dotenv import load_dotenv
 
-from utils import (
-    NotionInterface,
-    is_youtube_url,
-    scrape_website_with_apify,
-    scrape_youtube_with_apify,
-    scrape_youtube_with_transcript,
-    YoutubeInterface,
+from urls import is_youtube_url, normalize_url
+from url_index import get_url_index
+from metrics import metrics
+from scheduler import PRIORITIES, Priority, scheduled_as
+from jobs import (
+    LocalJobDispatcher,
+    TaskQueueJobDispatcher,
+    create_job_store,
+    run_job,
 )
 from logger import setup_logger
 
@@ -20,6 +23,52 @@ initialize_app()
 
 logger = setup_logger()
 
+JOB_WORKER_REGION = "europe-west1"
+JOB_WORKER_MAX_CONCURRENCY = int(os.environ.get("JOB_WORKER_MAX_CONCURRENCY", "2"))
+BULK_MAX_URLS = int(os.environ.get("BULK_MAX_URLS", "500"))
+# Index misses query Notion one by one, so batches stay small enough to answer within the timeout
+LOOKUP_MAX_URLS = int(os.environ.get("LOOKUP_MAX_URLS", "50"))
+
+
+def run_pipeline(*args, **kwargs) -> dict:
+    # Imported on first use so lookup-only instances do not load LangChain and the scrapers
+    from pipeline import run_pipeline
+
+    return run_pipeline(*args, **kwargs)
+
+
+def run_bulk_import(*args, **kwargs) -> dict:
+    from bulk import run_bulk_import
+
+    return run_bulk_import(*args, **kwargs)
+
+
+def request_user(req: https_fn.Request) -> str:
+    # Fair queuing key: the extension's user ID if it sends one, else the client address
+    user = req.headers.get("X-Notionify-User")
+    if not user:
+        forwarded_for = req.headers.get("X-Forwarded-For", "")
+        user = forwarded_for.split(",")[0].strip() or req.remote_addr
+    return user or "anonymous"
+
+
+JOB_DISPATCHER = os.environ.get("JOB_DISPATCHER", "tasks")
+job_store = create_job_store(JOB_DISPATCHER)
+if JOB_DISPATCHER == "local":
+    job_dispatcher = LocalJobDispatcher(
+        job_store, run_pipeline, max_workers=JOB_WORKER_MAX_CONCURRENCY
+    )
+    bulk_job_dispatcher = LocalJobDispatcher(
+        job_store, run_bulk_import, max_workers=1, report_progress=True
+    )
+else:
+    job_dispatcher = TaskQueueJobDispatcher(
+        f"locations/{JOB_WORKER_REGION}/functions/run_notion_page_job"
+    )
+    bulk_job_dispatcher = TaskQueueJobDispatcher(
+        f"locations/{JOB_WORKER_REGION}/functions/run_notion_pages_job"
+    )
+
 @https_fn.on_request(
     region="europe-west1",
     min_instances=1,
@@ -38,10 +87,10 @@ def get_notion_page(req: https_fn.Request) -> https_fn.Response:
         logger.info(f"Retrieving Notion page for URL: {url}")
 
         # Check both databases for the URL
-        is_youtube = is_youtube_url(url)
-        if is_youtube:
-            url = YoutubeInterface().standardize_url(url)
-        if res := NotionInterface(is_youtube=is_youtube).get_database_entry(url):
+        url = normalize_url(url)
+        with metrics.span("get_notion_page", url):
+            res = get_url_index(is_youtube_url(url)).lookup(url)
+        if res:
             return https_fn.Response(status=200, response=json.dumps(res))
         else:
             return https_fn.Response(status=404, response="URL not found in Notion")
@@ -49,6 +98,45 @@ def get_notion_page(req: https_fn.Request) -> https_fn.Response:
         logger.error(e)
         return https_fn.Response(status=500, response=str(e))
 
+@https_fn.on_request(
+    region="europe-west1",
+    min_instances=1,
+    timeout_sec=30,
+    cors=options.CorsOptions(
+        cors_origins=[f"chrome-extension://{os.environ['CHROME_EXTENSION_ID']}"],
+        cors_methods=["get", "post"],
+    ),
+)
+def get_notion_pages(req: https_fn.Request) -> https_fn.Response:
+    body = req.get_json(silent=True) or {}
+    urls = body.get("urls") or req.args.getlist("url")
+    if not urls:
+        return https_fn.Response(status=400, response="Missing 'urls' parameter")
+    if not isinstance(urls, list) or not all(isinstance(url, str) for url in urls):
+        return https_fn.Response(status=400, response="'urls' must be a list of strings")
+    if len(urls) > LOOKUP_MAX_URLS:
+        return https_fn.Response(
+            status=400, response=f"Too many URLs, at most {LOOKUP_MAX_URLS} per request"
+        )
+
+    try:
+        logger.info(f"Retrieving Notion pages for {len(urls)} URLs")
+
+        res = {}
+        for url in urls:
+            # An invalid URL has no page; it does not fail the rest of the batch
+            try:
+                normalized_url = normalize_url(url)
+            except ValueError as e:
+                logger.warning(f"Skipping invalid URL {url}: {e}")
+                res[url] = None
+                continue
+            res[url] = get_url_index(is_youtube_url(normalized_url)).lookup(normalized_url)
+        return https_fn.Response(status=200, response=json.dumps(res))
+    except Exception as e:
+        logger.error(e)
+        return https_fn.Response(status=500, response=str(e))
+
 @https_fn.on_request(
     region="europe-west1",
     max_instances=2,
@@ -64,24 +152,163 @@ def create_notion_page(req: https_fn.Request) -> https_fn.Response:
     if not url:
         return https_fn.Response(status=400, response="Missing 'url' parameter")
     guidance = req.args.get("guidance", "")
+    stream = req.args.get("stream", "false").lower() == "true"
+    force = req.args.get("force", "false").lower() == "true"
+    priority = req.args.get("priority", Priority.INTERACTIVE)
+    if priority not in PRIORITIES:
+        return https_fn.Response(status=400, response=f"Invalid 'priority' parameter: {priority}")
 
     try:
         logger.info(f"Creating new page for {url}...")
+        with metrics.span("create_notion_page", url), scheduled_as(priority, request_user(req)):
+            res = run_pipeline(url, guidance, stream=stream, force=force)
+        return https_fn.Response(status=200, response=json.dumps(res))
+    except Exception as e:
+        logger.error(e)
+        return https_fn.Response(status=500, response=str(e))
 
-        is_youtube = is_youtube_url(url)
-        if is_youtube:
-            url = YoutubeInterface().standardize_url(url)
-            try:
-                result = scrape_youtube_with_apify(url)
-            except Exception as e:
-                result = scrape_youtube_with_transcript(url)
+@https_fn.on_request(
+    region="europe-west1",
+    timeout_sec=30,
+    cors=options.CorsOptions(
+        cors_origins=[f"chrome-extension://{os.environ['CHROME_EXTENSION_ID']}"],
+        cors_methods=["get", "post"],
+    ),
+)
+def submit_notion_page(req: https_fn.Request) -> https_fn.Response:
+    url = req.args.get("url")
+    if not url:
+        return https_fn.Response(status=400, response="Missing 'url' parameter")
+    guidance = req.args.get("guidance", "")
+    stream = req.args.get("stream", "false").lower() == "true"
+    force = req.args.get("force", "false").lower() == "true"
+    priority = req.args.get("priority", Priority.INTERACTIVE)
+    if priority not in PRIORITIES:
+        return https_fn.Response(status=400, response=f"Invalid 'priority' parameter: {priority}")
+
+    try:
+        job = job_store.create(
+            {"url": normalize_url(url), "guidance": guidance, "stream": stream, "force": force},
+            user=request_user(req),
+            priority=priority,
+        )
+        job_dispatcher.dispatch(job["id"])
+        logger.info(f"Submitted job {job['id']} for {url}")
+        return https_fn.Response(
+            status=202,
+            response=json.dumps({"id": job["id"], "status": job["status"]}),
+        )
+    except Exception as e:
+        logger.error(e)
+        return https_fn.Response(status=500, response=str(e))
+
+@https_fn.on_request(
+    region="europe-west1",
+    timeout_sec=30,
+    cors=options.CorsOptions(
+        cors_origins=[f"chrome-extension://{os.environ['CHROME_EXTENSION_ID']}"],
+        cors_methods=["get"],
+    ),
+)
+def get_notion_page_job(req: https_fn.Request) -> https_fn.Response:
+    job_id = req.args.get("id")
+    if not job_id:
+        return https_fn.Response(status=400, response="Missing 'id' parameter")
+
+    try:
+        if job := job_store.get(job_id):
+            return https_fn.Response(status=200, response=json.dumps(job))
         else:
-            result = scrape_website_with_apify(url)
+            return https_fn.Response(status=404, response="Job not found")
+    except Exception as e:
+        logger.error(e)
+        return https_fn.Response(status=500, response=str(e))
 
-        notion = NotionInterface(is_youtube=is_youtube)
-        report = notion.generate_report(result["content"], guidance)
-        res = notion.create_page(url, report, result["icon"], result["cover"])
-        return https_fn.Response(status=200, response=json.dumps(res))
+@https_fn.on_request(
+    region="europe-west1",
+    timeout_sec=30,
+    cors=options.CorsOptions(
+        cors_origins=[f"chrome-extension://{os.environ['CHROME_EXTENSION_ID']}"],
+        cors_methods=["post"],
+    ),
+)
+def submit_notion_pages(req: https_fn.Request) -> https_fn.Response:
+    body = req.get_json(silent=True) or {}
+    urls = body.get("urls")
+    if not urls:
+        return https_fn.Response(status=400, response="Missing 'urls' parameter")
+    if not isinstance(urls, list) or not all(isinstance(url, str) for url in urls):
+        return https_fn.Response(status=400, response="'urls' must be a list of strings")
+    if len(urls) > BULK_MAX_URLS:
+        return https_fn.Response(
+            status=400, response=f"Too many URLs, at most {BULK_MAX_URLS} per request"
+        )
+
+    try:
+        job = job_store.create(
+            {
+                # Normalized by the importer, which records invalid URLs as failed
+                "urls": urls,
+                "guidance": body.get("guidance", ""),
+                "force": bool(body.get("force", False)),
+            },
+            user=request_user(req),
+            priority=Priority.BACKGROUND,
+        )
+        bulk_job_dispatcher.dispatch(job["id"])
+        logger.info(f"Submitted bulk job {job['id']} for {len(urls)} URLs")
+        return https_fn.Response(
+            status=202,
+            response=json.dumps({"id": job["id"], "status": job["status"]}),
+        )
     except Exception as e:
         logger.error(e)
         return https_fn.Response(status=500, response=str(e))
+
+@tasks_fn.on_task_dispatched(
+    region=JOB_WORKER_REGION,
+    timeout_sec=540,
+    memory=options.MemoryOption.GB_2,
+    retry_config=options.RetryConfig(max_attempts=1),
+    rate_limits=options.RateLimits(max_concurrent_dispatches=JOB_WORKER_MAX_CONCURRENCY),
+)
+def run_notion_page_job(req: tasks_fn.CallableRequest) -> None:
+    with metrics.span("run_notion_page_job"):
+        run_job(job_store, req.data["job_id"], run_pipeline)
+
+@tasks_fn.on_task_dispatched(
+    region=JOB_WORKER_REGION,
+    timeout_sec=1800,
+    memory=options.MemoryOption.GB_2,
+    retry_config=options.RetryConfig(max_attempts=1),
+    rate_limits=options.RateLimits(max_concurrent_dispatches=1),
+)
+def run_notion_pages_job(req: tasks_fn.CallableRequest) -> None:
+    with metrics.span("run_notion_pages_job"):
+        run_job(job_store, req.data["job_id"], run_bulk_import, report_progress=True)
+
+@https_fn.on_request(
+    region="europe-west1",
+    timeout_sec=30,
+)
+def get_metrics(req: https_fn.Request) -> https_fn.Response:
+    # Without a token the endpoint stays closed, rather than accepting an empty bearer token
+    token = os.environ.get("METRICS_TOKEN", "")
+    if not token:
+        logger.warning("Refusing metrics request: METRICS_TOKEN is not set")
+        return https_fn.Response(status=401, response="Unauthorized")
+    authorization = req.headers.get("Authorization", "")
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {token}".encode()):
+        return https_fn.Response(status=401, response="Unauthorized")
+
+    if req.args.get("format") == "json":
+        return https_fn.Response(
+            status=200,
+            response=json.dumps(metrics.snapshot()),
+            content_type="application/json",
+        )
+    return https_fn.Response(
+        status=200,
+        response=metrics.to_openmetrics(),
+        content_type="application/openmetrics-text; version=1.0.0; charset=utf-8",
+    )
@@ -0,0 +1,198 @@
+import re
+from typing import Iterable, Iterator
+
+# Notion API limits
+MAX_RICH_TEXT_LENGTH = 2000
+MAX_NESTING_DEPTH = 2  # Levels of children Notion accepts in a single request
+
+TAB_WIDTH = 4
+
+BLOCK_RE = re.compile(
+    r"(?P<indent>[ \t]*)(?:"
+    r"(?P<fence>```|~~~)\s*(?P<language>[\w+#-]*)\s*$"
+    r"|(?P<divider>-{3,}|\*{3,}|_{3,})\s*$"
+    r"|(?P<heading>#{1,6})\s+(?P<heading_text>.*)"
+    r"|[-*+]\s+(?P<bullet_text>.*)"
+    r"|\d+[.)]\s+(?P<number_text>.*)"
+    r"|>\s?(?P<quote_text>.*)"
+    r"|"
+    r")"
+)
+
+INLINE_RE = re.compile(
+    r"`(?P<code>[^`]+)`"
+    # Link URLs may contain one level of balanced parentheses
+    r"|\[(?P<link_text>(?:[^\[\]]|\[[^\[\]]*\])+)\]\((?P<link_url>(?:[^()\s]|\([^()\s]*\))+)\)"
+    r"|\*\*\*(?P<bold_italic>.+?)\*\*\*"
+    r"|\*\*(?P<bold>.+?)\*\*"
+    r"|__(?P<bold_underscore>.+?)__"
+    r"|\*(?P<italic>[^*\s](?:[^*]*[^*\s])?)\*"
+    r"|(?<!\w)_(?P<italic_underscore>[^_\s](?:[^_]*[^_\s])?)_(?!\w)"
+    r"|~~(?P<strikethrough>.+?)~~"
+)
+
+# Languages accepted by Notion code blocks, keyed by common markdown aliases
+CODE_LANGUAGES = {
+    "": "plain text", "text": "plain text", "txt": "plain text", "bash": "bash",
+    "sh": "shell", "shell": "shell", "c": "c", "cpp": "c++", "c++": "c++", "c#": "c#",
+    "csharp": "c#", "css": "css", "go": "go", "html": "html", "java": "java",
+    "js": "javascript", "javascript": "javascript", "json": "json", "kotlin": "kotlin",
+    "markdown": "markdown", "md": "markdown", "php": "php", "py": "python",
+    "python": "python", "r": "r", "ruby": "ruby", "rust": "rust", "sql": "sql",
+    "swift": "swift", "ts": "typescript", "typescript": "typescript", "yaml": "yaml",
+    "yml": "yaml",
+}
+
+
+def text_item(content: str, annotations: dict, link: str | None = None) -> Iterator[dict]:
+    for start in range(0, len(content), MAX_RICH_TEXT_LENGTH):
+        item = {"type": "text", "text": {"content": content[start : start + MAX_RICH_TEXT_LENGTH]}}
+        if link:
+            item["text"]["link"] = {"url": link}
+        if annotations:
+            item["annotations"] = dict(annotations)
+        yield item
+
+
+def rich_text(text: str, annotations: dict | None = None, link: str | None = None) -> list:
+    annotations = annotations or {}
+    items = []
+    position = 0
+    for match in INLINE_RE.finditer(text):
+        if match.start() > position:
+            items += text_item(text[position : match.start()], annotations, link)
+        position = match.end()
+
+        # lastgroup of a link is link_url, so links are told apart by their text group
+        kind = "link_text" if match.group("link_text") is not None else match.lastgroup
+        value = match.group(kind)
+        if kind == "code":
+            items += text_item(value, {**annotations, "code": True}, link)
+        elif kind == "link_text":
+            items += rich_text(value, annotations, match.group("link_url"))
+        elif kind == "bold_italic":
+            items += rich_text(value, {**annotations, "bold": True, "italic": True}, link)
+        elif kind in ("bold", "bold_underscore"):
+            items += rich_text(value, {**annotations, "bold": True}, link)
+        elif kind in ("italic", "italic_underscore"):
+            items += rich_text(value, {**annotations, "italic": True}, link)
+        elif kind == "strikethrough":
+            items += rich_text(value, {**annotations, "strikethrough": True}, link)
+
+    if position < len(text):
+        items += text_item(text[position:], annotations, link)
+    return items
+
+
+def text_block(block_type: str, text: str) -> dict:
+    return {
+        "object": "block",
+        "type": block_type,
+        block_type: {"rich_text": rich_text(text.strip())},
+    }
+
+
+class MarkdownConverter:
+    def __init__(self):
+        # Open list items as (indent, block), outermost first
+        self.list_stack = []
+        self.fence = None
+        self.code_language = ""
+        self.code_lines = []
+
+    def __close_lists(self) -> Iterator[dict]:
+        if self.list_stack:
+            yield self.list_stack[0][1]
+            self.list_stack = []
+
+    def __add_list_item(self, indent: int, block: dict) -> None:
+        while self.list_stack and self.list_stack[-1][0] >= indent:
+            self.list_stack.pop()
+
+        if not self.list_stack:
+            self.list_stack.append((indent, block))
+            return
+
+        if len(self.list_stack) > MAX_NESTING_DEPTH:
+            # Too deep for a single request, keep it as a sibling of the deepest item
+            self.list_stack.pop()
+        parent = self.list_stack[-1][1]
+        parent[parent["type"]].setdefault("children", []).append(block)
+        self.list_stack.append((indent, block))
+
+    def __code_block(self) -> dict:
+        language = CODE_LANGUAGES.get(self.code_language.lower(), "plain text")
+        return {
+            "object": "block",
+            "type": "code",
+            "code": {
+                "rich_text": list(text_item("\n".join(self.code_lines), {})),
+                "language": language,
+            },
+        }
+
+    def feed(self, line: str) -> Iterator[dict]:
+        match = BLOCK_RE.match(line)
+
+        if self.fence:
+            if match.group("fence") == self.fence:
+                yield self.__code_block()
+                self.fence = None
+            else:
+                self.code_lines.append(line)
+            return
+
+        if not line.strip():
+            return
+
+        indent = len(match.group("indent").expandtabs(TAB_WIDTH))
+
+        if match.group("fence"):
+            yield from self.__close_lists()
+            self.fence = match.group("fence")
+            self.code_language = match.group("language")
+            self.code_lines = []
+        elif match.group("divider"):
+            yield from self.__close_lists()
+            yield {"object": "block", "type": "divider", "divider": {}}
+        elif match.group("heading"):
+            yield from self.__close_lists()
+            level = min(len(match.group("heading")), 3)
+            yield text_block(f"heading_{level}", match.group("heading_text"))
+        elif match.group("bullet_text") is not None:
+            block = text_block("bulleted_list_item", match.group("bullet_text"))
+            if not self.list_stack or indent <= self.list_stack[0][0]:
+                yield from self.__close_lists()
+            self.__add_list_item(indent, block)
+        elif match.group("number_text") is not None:
+            block = text_block("numbered_list_item", match.group("number_text"))
+            if not self.list_stack or indent <= self.list_stack[0][0]:
+                yield from self.__close_lists()
+            self.__add_list_item(indent, block)
+        elif match.group("quote_text") is not None:
+            yield from self.__close_lists()
+            yield text_block("quote", match.group("quote_text"))
+        elif self.list_stack and indent > self.list_stack[-1][0]:
+            # Indented text continues the list item above as a child paragraph
+            parent = self.list_stack[-1][1]
+            parent[parent["type"]].setdefault("children", []).append(text_block("paragraph", line))
+        else:
+            yield from self.__close_lists()
+            yield text_block("paragraph", line)
+
+    def close(self) -> Iterator[dict]:
+        if self.fence:
+            yield self.__code_block()
+            self.fence = None
+        yield from self.__close_lists()
+
+
+def iter_blocks(lines: Iterable[str]) -> Iterator[dict]:
+    converter = MarkdownConverter()
+    for line in lines:
+        yield from converter.feed(line)
+    yield from converter.close()
+
+
+def markdown_to_blocks(markdown: str) -> list:
+    return list(iter_blocks(markdown.split("\n")))
@@ -0,0 +1,99 @@
+import os
+import requests
+import contextvars
+from bs4 import BeautifulSoup
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from urllib.parse import urljoin, urlparse
+
+from urls import extract_video_id, is_youtube_url
+from http_scraper import find_favicon, http_provider
+from cache import create_cache
+from metrics import metrics
+from logger import setup_logger
+
+logger = setup_logger()
+
+YOUTUBE_ICON = "https://img.icons8.com/?size=100&id=19318&format=png&color=000000"
+
+
+class MetadataEnricher:
+    def __init__(self, max_workers: int = 4, wait_secs: float = 1.0):
+        # Lookups run next to scraping and report generation instead of inside them
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="metadata")
+        self.wait_secs = wait_secs
+        # Favicons belong to the site, so they are cached per domain
+        self.favicon_cache = create_cache("favicon", ttl_secs=7 * 24 * 3600)
+
+    def __fetch_favicon(self, root_url: str) -> str | None:
+        try:
+            response = http_provider.call(requests.get, root_url, timeout=http_provider.timeout_secs)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.info(f"Failed to fetch {root_url} for its favicon. Reason: {e}")
+            return None
+        return find_favicon(BeautifulSoup(response.text, "html.parser"), root_url)
+
+    def favicon(self, url: str) -> str:
+        if is_youtube_url(url):
+            return YOUTUBE_ICON
+
+        parsed = urlparse(url)
+        key = f"favicon:{parsed.netloc.lower()}"
+        with metrics.span("favicon", url) as span:
+            span["cache_hit"] = (icon := self.favicon_cache.get(key)) is not None
+            if icon is None:
+                root_url = f"{parsed.scheme}://{parsed.netloc}/"
+                icon = self.__fetch_favicon(root_url) or urljoin(root_url, "/favicon.ico")
+                self.favicon_cache.set(key, icon)
+        return icon
+
+    def thumbnail(self, url: str) -> str | None:
+        video_id = extract_video_id(url) if is_youtube_url(url) else None
+        if not video_id:
+            return None
+
+        thumbnail_url = f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg"
+        with metrics.span("thumbnail", url):
+            try:
+                response = http_provider.call(
+                    requests.head, thumbnail_url, timeout=http_provider.timeout_secs
+                )
+                found = response.status_code == 200
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Failed to check thumbnail. Reason: {e}")
+                found = False
+        if not found:
+            thumbnail_url = f"https://img.youtube.com/vi/{video_id}/hqdefault.jpg"
+
+        logger.info(f"Using thumbnail: {thumbnail_url}")
+        return thumbnail_url
+
+    def __enrich(self, url: str) -> dict:
+        return {"icon": self.favicon(url), "cover": self.thumbnail(url)}
+
+    def submit(self, url: str) -> Future:
+        # The lookup is queued with the priority and user of the request it runs for
+        return self.executor.submit(contextvars.copy_context().run, self.__enrich, url)
+
+    def resolve(self, result: dict, metadata: Future) -> dict:
+        # Values found while scraping win; enrichment fills the gaps if it is ready in time
+        try:
+            enriched = metadata.result(timeout=self.wait_secs)
+        except FutureTimeoutError:
+            logger.info("Metadata not ready, creating the page without it")
+            enriched = {}
+        except Exception as e:
+            logger.error(f"Metadata enrichment failed. Reason: {e}")
+            enriched = {}
+        return {
+            **result,
+            "icon": result.get("icon") or enriched.get("icon"),
+            "cover": result.get("cover") or enriched.get("cover"),
+        }
+
+
+metadata_enricher = MetadataEnricher(
+    max_workers=int(os.environ.get("METADATA_WORKERS", "4")),
+    wait_secs=float(os.environ.get("METADATA_WAIT_SECS", "1")),
+)
@@ -0,0 +1,157 @@
+import json
+import time
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from logger import setup_logger
+
+logger = setup_logger()
+
+# Latency buckets in seconds, from sub-second lookups to full actor runs
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+# Keep the per-domain label set bounded
+MAX_DOMAINS = 200
+OTHER_DOMAIN = "other"
+
+
+def url_domain(url: str | None) -> str:
+    return urlparse(url).netloc if url else ""
+
+
+class Histogram:
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(zip(map(str, self.buckets), self.counts)),
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.domains = set()
+        self.lock = threading.Lock()
+
+    def __domain_label(self, domain: str) -> str:
+        if domain in self.domains or not domain:
+            return domain
+        if len(self.domains) >= MAX_DOMAINS:
+            return OTHER_DOMAIN
+        self.domains.add(domain)
+        return domain
+
+    def observe(self, stage: str, seconds: float, domain: str = "") -> None:
+        with self.lock:
+            key = (stage, self.__domain_label(domain))
+            self.histograms.setdefault(key, Histogram()).observe(seconds)
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        with self.lock:
+            key = (name, tuple(sorted(labels.items())))
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        with self.lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    @contextmanager
+    def span(self, stage: str, url: str | None = None, **attributes):
+        # Callers can add attributes (sizes, token counts, cache hits) to the yielded dict
+        domain = url_domain(url)
+        started_at = time.perf_counter()
+        status = "ok"
+        try:
+            yield attributes
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            duration = time.perf_counter() - started_at
+            self.observe(stage, duration, domain)
+            self.increment("stage_calls", stage=stage, status=status)
+            logger.info(
+                json.dumps(
+                    {
+                        "span": stage,
+                        "domain": domain,
+                        "status": status,
+                        "duration_ms": round(duration * 1000, 1),
+                        **attributes,
+                    },
+                    default=str,
+                )
+            )
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "histograms": [
+                    {"stage": stage, "domain": domain, **histogram.to_dict()}
+                    for (stage, domain), histogram in self.histograms.items()
+                ],
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in self.counters.items()
+                ],
+                "gauges": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in self.gauges.items()
+                ],
+            }
+
+    def to_openmetrics(self) -> str:
+        def format_labels(labels: dict) -> str:
+            escaped = {
+                key: str(value).replace("\\", "\\\\").replace('"', '\\"')
+                for key, value in labels.items()
+            }
+            return ",".join(f'{key}="{value}"' for key, value in escaped.items())
+
+        lines = []
+        with self.lock:
+            lines.append("# TYPE notionify_stage_duration_seconds histogram")
+            lines.append("# UNIT notionify_stage_duration_seconds seconds")
+            for (stage, domain), histogram in sorted(self.histograms.items()):
+                labels = {"stage": stage, "domain": domain}
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    bucket_labels = format_labels({**labels, "le": bound})
+                    lines.append(f"notionify_stage_duration_seconds_bucket{{{bucket_labels}}} {count}")
+                inf_labels = format_labels({**labels, "le": "+Inf"})
+                lines.append(f"notionify_stage_duration_seconds_bucket{{{inf_labels}}} {histogram.count}")
+                lines.append(f"notionify_stage_duration_seconds_count{{{format_labels(labels)}}} {histogram.count}")
+                lines.append(f"notionify_stage_duration_seconds_sum{{{format_labels(labels)}}} {histogram.sum}")
+
+            for name in sorted({name for name, _ in self.counters}):
+                lines.append(f"# TYPE notionify_{name} counter")
+                for (counter_name, labels), value in sorted(self.counters.items()):
+                    if counter_name == name:
+                        lines.append(f"notionify_{name}_total{{{format_labels(dict(labels))}}} {value}")
+
+            for name in sorted({name for name, _ in self.gauges}):
+                lines.append(f"# TYPE notionify_{name} gauge")
+                for (gauge_name, labels), value in sorted(self.gauges.items()):
+                    if gauge_name == name:
+                        lines.append(f"notionify_{name}{{{format_labels(dict(labels))}}} {value}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
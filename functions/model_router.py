@@ -0,0 +1,141 @@
+import os
+import json
+from typing import Callable, Iterator
+
+from langchain_core.exceptions import OutputParserException
+from langchain_core.runnables import Runnable
+
+from resilience import Provider
+from llm_usage import track_llm_usage
+from scheduler import scheduler
+from metrics import metrics
+from logger import preview, setup_logger
+
+logger = setup_logger()
+
+# Builds the chain for a model and request timeout
+ChainFactory = Callable[[str, float], Runnable]
+
+# Content above this many tokens is condensed in chunks before the report call, so no call
+# routed here is larger, and route limits are derived from it
+MAP_REDUCE_THRESHOLD_TOKENS = int(os.environ.get("MAP_REDUCE_THRESHOLD_TOKENS", "60000"))
+
+# Routes are matched on the prompt's content tokens, smallest first; the first model of a
+# route is preferred and the others are fallbacks. By default every route prefers gpt-4.1-mini
+# and escalates to gpt-4.1 when it times out or returns a report that does not parse; the
+# routes only differ in timeout, so a stuck call on a small input fails over sooner. Compare
+# other models with benchmarks/bench_report_quality.py before routing reports to them.
+DEFAULT_ROUTES = [
+    {"name": "small", "max_tokens": 4000, "models": ["gpt-4.1-mini", "gpt-4.1"], "timeout_secs": 30},
+    {
+        "name": "medium",
+        "max_tokens": MAP_REDUCE_THRESHOLD_TOKENS // 2,
+        "models": ["gpt-4.1-mini", "gpt-4.1"],
+        "timeout_secs": 90,
+    },
+    {"name": "large", "max_tokens": None, "models": ["gpt-4.1-mini", "gpt-4.1"], "timeout_secs": 180},
+]
+
+
+class Route:
+    def __init__(self, name: str, max_tokens: int | None, models: list[str], timeout_secs: float):
+        self.name = name
+        self.max_tokens = max_tokens
+        self.models = models
+        self.timeout_secs = timeout_secs
+
+
+class ModelRouter:
+    def __init__(self, routes: list[Route], provider: Provider):
+        # Routes without a limit catch everything larger than the others
+        self.routes = sorted(
+            routes, key=lambda route: (route.max_tokens is None, route.max_tokens or 0)
+        )
+        self.provider = provider
+        # Part of the report cache key, so a new policy does not serve reports from the old one
+        self.key = json.dumps([route.__dict__ for route in self.routes], sort_keys=True)
+
+    def unreachable_routes(self, max_input_tokens: int) -> list[Route]:
+        # A route is never selected when the routes before it already cover every input size
+        unreachable = []
+        covered = 0
+        for route in self.routes:
+            if covered is None or covered >= max_input_tokens:
+                unreachable.append(route)
+            covered = route.max_tokens if covered is not None else None
+        return unreachable
+
+    def route(self, tokens: int) -> Route:
+        for route in self.routes:
+            if route.max_tokens is None or tokens <= route.max_tokens:
+                return route
+        return self.routes[-1]
+
+    def __should_fall_back(self, error: Exception) -> bool:
+        return self.provider.is_transient(error) or isinstance(error, OutputParserException)
+
+    def __timeout_secs(self, route: Route) -> float:
+        # OPENAI_TIMEOUT_SECS caps the timeout of every route
+        return min(route.timeout_secs, self.provider.timeout_secs)
+
+    def __record(self, route: Route, model: str, span: dict) -> None:
+        metrics.increment("llm_route_cost_usd", span["cost_usd"], route=route.name, model=model)
+
+    def invoke(self, get_chain: ChainFactory, inputs: dict, tokens: int):
+        route = self.route(tokens)
+        for i, model in enumerate(route.models):
+            chain = get_chain(model, self.__timeout_secs(route))
+            last = i == len(route.models) - 1
+            try:
+                with scheduler.slot("llm"), metrics.span(
+                    f"llm_{route.name}", model=model, tokens=tokens
+                ) as span, track_llm_usage(span, model) as callbacks:
+                    config = {"callbacks": callbacks}
+                    if last:
+                        # Only the last model is retried, the others fail over right away
+                        result = self.provider.call(chain.invoke, inputs, config)
+                    else:
+                        with self.provider.track():
+                            result = chain.invoke(inputs, config)
+                self.__record(route, model, span)
+                return result
+            except Exception as e:
+                if last or not self.__should_fall_back(e):
+                    raise
+                self.__fall_back(route, model, e)
+
+    def stream(self, get_chain: ChainFactory, inputs: dict, tokens: int) -> Iterator:
+        route = self.route(tokens)
+        for i, model in enumerate(route.models):
+            chain = get_chain(model, self.__timeout_secs(route))
+            started = False
+            try:
+                with scheduler.slot("llm"), metrics.span(
+                    f"llm_{route.name}", model=model, tokens=tokens, stream=True
+                ) as span, track_llm_usage(span, model) as callbacks, self.provider.track():
+                    # Streamed usage has no cached-token split, so the whole prompt is priced as uncached
+                    for chunk in chain.stream(inputs, {"callbacks": callbacks}):
+                        started = True
+                        yield chunk
+                self.__record(route, model, span)
+                return
+            except Exception as e:
+                # Once output has been yielded the stream cannot switch models
+                if started or i == len(route.models) - 1 or not self.__should_fall_back(e):
+                    raise
+                self.__fall_back(route, model, e)
+
+    def __fall_back(self, route: Route, model: str, error: Exception) -> None:
+        metrics.increment("llm_fallbacks", route=route.name, model=model)
+        logger.warning(f"Model {model} failed on route {route.name}, falling back. Reason: {preview(str(error))}")
+
+
+def create_router(provider: Provider) -> ModelRouter:
+    routes = json.loads(os.environ["MODEL_ROUTES"]) if os.environ.get("MODEL_ROUTES") else DEFAULT_ROUTES
+    router = ModelRouter([Route(**route) for route in routes], provider)
+    for route in router.unreachable_routes(MAP_REDUCE_THRESHOLD_TOKENS):
+        logger.warning(
+            f"Route {route.name} is never selected: content above {MAP_REDUCE_THRESHOLD_TOKENS} "
+            "tokens is summarized in chunks first"
+        )
+    return router
@@ -0,0 +1,155 @@
+import os
+import json
+from typing import Iterator
+
+import httpx
+from notion_client import APIErrorCode, APIResponseError
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
+
+from clients import get_notion_client
+from rate_limit import TokenBucket
+from resilience import create_provider
+from scheduler import scheduler
+from metrics import metrics
+from logger import setup_logger
+
+logger = setup_logger()
+
+# Shared across all Notion clients in the process (Notion allows ~3 requests/s on average)
+notion_rate_limiter = TokenBucket(
+    rate=float(os.environ.get("NOTION_REQUESTS_PER_SEC", "3")), capacity=3
+)
+
+
+def is_transient_notion_error(error: Exception) -> bool:
+    # Rate limits are retried separately, honoring Notion's retry-after header
+    if isinstance(error, APIResponseError) and error.code == APIErrorCode.RateLimited:
+        return False
+    if isinstance(error, HTTPResponseError):
+        return error.status >= 500
+    return isinstance(error, (RequestTimeoutError, httpx.TransportError))
+
+
+def is_archived(page: dict) -> bool:
+    return bool(page.get("archived") or page.get("in_trash"))
+
+
+notion_provider = create_provider(
+    "notion", timeout_secs=30, is_transient=is_transient_notion_error
+)
+
+
+class NotionDatabase:
+    max_rate_limit_retries = 5
+    # Text property holding the source fingerprint used for change detection
+    fingerprint_property = os.environ.get("NOTION_FINGERPRINT_PROPERTY", "Fingerprint")
+
+    def __init__(self, is_youtube: bool):
+        self.client = get_notion_client(notion_provider.timeout_secs)
+        self.database_id = (
+            os.environ["NOTION_VIDEOS_DATABASE_ID"]
+            if is_youtube
+            else os.environ["NOTION_WEBSITES_DATABASE_ID"]
+        )
+
+    def request(self, method, idempotent: bool = True, **kwargs) -> dict:
+        # Writes are not retried after a timeout or server error, they may have been applied
+        if not idempotent:
+            with notion_provider.track():
+                return self.__request(method, **kwargs)
+        return notion_provider.call(self.__request, method, **kwargs)
+
+    def __request(self, method, **kwargs) -> dict:
+        for attempt in range(self.max_rate_limit_retries + 1):
+            try:
+                # Queued by priority and user first, so background writes do not take every token
+                with scheduler.slot("notion"):
+                    notion_rate_limiter.acquire()
+                    return method(**kwargs)
+            except APIResponseError as e:
+                if e.code != APIErrorCode.RateLimited or attempt == self.max_rate_limit_retries:
+                    raise
+                retry_after = float(e.headers.get("retry-after", 2**attempt))
+                metrics.increment("notion_retries")
+                logger.warning(f"Rate limited by Notion, retrying in {retry_after}s")
+                notion_rate_limiter.pause(retry_after)
+
+    def get_database_entry(self, url: str) -> dict | None:
+        # Create filter for the URL property
+        filter_params = {
+            "filter": {
+                "property": "URL",
+                "url": {
+                    "equals": url
+                }
+            },
+            "sorts": [
+                {
+                    "timestamp": "last_edited_time",
+                    "direction": "descending"
+                }
+            ]
+        }
+
+        response = self.request(
+            self.client.databases.query,
+            database_id=self.database_id,
+            **filter_params
+        )
+
+        # Only process the first (most recent) result if any exist
+        if response["results"]:
+            return self.database_entry(response["results"][0], url)
+
+    def get_page(self, page_id: str) -> dict | None:
+        # Archived and trashed pages are returned with a flag set; deleted ones are not found
+        try:
+            return self.request(self.client.pages.retrieve, page_id=page_id)
+        except APIResponseError as e:
+            if e.code == APIErrorCode.ObjectNotFound:
+                return None
+            raise
+
+    def page_fingerprint(self, page: dict) -> dict | None:
+        rich_text = page["properties"].get(self.fingerprint_property, {}).get("rich_text")
+        if not rich_text:
+            return None
+        try:
+            return json.loads("".join(item["text"]["content"] for item in rich_text))
+        except (KeyError, ValueError):
+            logger.warning(f"Ignoring invalid fingerprint on page {page['id']}")
+            return None
+
+    def database_entry(self, page: dict, url: str | None = None) -> dict:
+        title = page["properties"]["Name"]["title"][0]["text"]["content"] if page["properties"]["Name"]["title"] else "Untitled"
+        page_url = page["url"]
+
+        return {
+            "id": page["id"],
+            "title": title,
+            "url": url or page["properties"]["URL"]["url"],
+            "page_url": page_url,
+            "created_time": page["created_time"],
+            "last_edited_time": page["last_edited_time"],
+            "fingerprint": self.page_fingerprint(page),
+        }
+
+    def iter_database_pages(self, edited_since: str | None = None) -> Iterator[dict]:
+        query = {
+            "sorts": [{"timestamp": "last_edited_time", "direction": "ascending"}],
+            "page_size": 100,
+        }
+        if edited_since:
+            query["filter"] = {
+                "timestamp": "last_edited_time",
+                "last_edited_time": {"on_or_after": edited_since},
+            }
+
+        while True:
+            response = self.request(
+                self.client.databases.query, database_id=self.database_id, **query
+            )
+            yield from response["results"]
+            if not response.get("has_more"):
+                return
+            query["start_cursor"] = response["next_cursor"]
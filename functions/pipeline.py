@@ -0,0 +1,236 @@
+import os
+import contextvars
+from concurrent.futures import Future
+
+from utils import (
+    NotionInterface,
+    Report,
+    scrape_website,
+    scrape_youtube,
+)
+from urls import is_youtube_url, normalize_url
+from http_scraper import NotModified
+from single_flight import SingleFlight
+from metrics import metrics
+from cache import content_digest, create_cache, report_cache_key, scrape_cache_key
+from preprocessing import create_pipeline
+from metadata import metadata_enricher
+from prompt_templates import report_prompt_template
+from tokens import truncate_to_tokens
+from scheduler import scheduler
+from logger import setup_logger
+
+logger = setup_logger()
+
+REUSE_EXISTING_PAGES = os.environ.get("REUSE_EXISTING_PAGES", "false").lower() == "true"
+# Requires a text property named NOTION_FINGERPRINT_PROPERTY in both databases
+CHANGE_DETECTION = os.environ.get("CHANGE_DETECTION", "false").lower() == "true"
+
+# Scraped content beyond this many tokens is dropped before it is cached or summarized (0 disables)
+MAX_CONTENT_TOKENS = int(os.environ.get("MAX_CONTENT_TOKENS", "200000"))
+
+pipeline_flight = SingleFlight()
+
+scrape_cache = create_cache("scrape", ttl_secs=24 * 3600)
+report_cache = create_cache("report", ttl_secs=7 * 24 * 3600)
+
+website_preprocessing = create_pipeline("website")
+youtube_preprocessing = create_pipeline("youtube")
+
+
+def scrape(url: str, validators: dict | None = None, use_cache: bool = True) -> dict | None:
+    # Returns None if the validators of an earlier fetch show the page has not changed.
+    # Without use_cache the page is fetched again, and the fresh copy replaces the cached one.
+    with metrics.span("scrape", url) as span:
+        key = scrape_cache_key(url)
+        span["cache_hit"] = (result := scrape_cache.get(key) if use_cache else None) is not None
+        if result is None:
+            with scheduler.slot("scrape"):
+                if is_youtube_url(url):
+                    result = scrape_youtube(url)
+                else:
+                    try:
+                        result = scrape_website(url, validators)
+                    except NotModified:
+                        span["not_modified"] = True
+                        return None
+            content, truncated = truncate_to_tokens(result["content"], MAX_CONTENT_TOKENS)
+            if truncated:
+                logger.warning(
+                    f"Content of {url} exceeds {MAX_CONTENT_TOKENS} tokens, truncated from "
+                    f"{len(result['content'])} to {len(content)} chars"
+                )
+                metrics.increment("content_truncated")
+                result = {**result, "content": content}
+            span["truncated"] = truncated
+            scrape_cache.set(key, result)
+
+        span["content_chars"] = len(result["content"])
+
+    # Raw content is cached, so changes to the preprocessing steps apply to cached pages too
+    preprocessing = youtube_preprocessing if is_youtube_url(url) else website_preprocessing
+    return {**result, "content": preprocessing.run(result["content"], url)}
+
+
+def generate_report(notion: NotionInterface, content: str, guidance: str) -> Report:
+    with metrics.span("generate_report", content_chars=len(content)) as span:
+        key = report_cache_key(content, guidance, report_prompt_template, notion.router.key)
+        span["cache_hit"] = (cached := report_cache.get(key)) is not None
+        if cached is not None:
+            return Report(**cached)
+
+        report = notion.generate_report(content, guidance)
+        report_cache.set(key, report.dict())
+        span["report_chars"] = len(report.content)
+        return report
+
+
+def page_fingerprint(notion: NotionInterface, result: dict, guidance: str) -> dict | None:
+    if not CHANGE_DETECTION:
+        return None
+    return {
+        "content": content_digest(result["content"]),
+        "inputs": content_digest(guidance, report_prompt_template, notion.router.key),
+        **(result.get("validators") or {}),
+    }
+
+
+def add_late_metadata(
+    notion: NotionInterface, page: dict, result: dict, metadata: Future
+) -> None:
+    # Metadata that was not ready when the page was created is set once it arrives
+    def update(future: Future) -> None:
+        if future.exception():
+            return
+        late = {key: value for key, value in future.result().items() if value and not result.get(key)}
+        if not late:
+            return
+        try:
+            notion.set_page_metadata(page["id"], **late)
+        except Exception as e:
+            logger.error(f"Failed to set late metadata on page {page['id']}. Reason: {e}")
+
+    # The callback runs on the enrichment thread, so it is given the request's context to be
+    # queued with its priority and user
+    context = contextvars.copy_context()
+    metadata.add_done_callback(lambda future: context.run(update, future))
+
+
+def cache_stats() -> list[dict]:
+    return [scrape_cache.stats(), report_cache.stats()]
+
+
+def create_page_streaming(
+    notion: NotionInterface, url: str, result: dict, guidance: str, fingerprint: dict | None = None
+) -> dict:
+    key = report_cache_key(result["content"], guidance, report_prompt_template, notion.router.key)
+    if (cached := report_cache.get(key)) is not None:
+        with metrics.span("create_page", url, cache_hit=True):
+            return notion.create_page(
+                url, Report(**cached), result["icon"], result["cover"], fingerprint
+            )
+
+    # Generation and page writes overlap, so they are measured as one stage
+    with metrics.span(
+        "generate_and_create_page", url, content_chars=len(result["content"])
+    ) as span:
+        res, report = notion.create_page_streaming(
+            url,
+            notion.stream_report(result["content"], guidance),
+            result["icon"],
+            result["cover"],
+            fingerprint,
+        )
+        span["report_chars"] = len(report.content)
+    report_cache.set(key, report.dict())
+    return res
+
+
+def run_pipeline(
+    url: str, guidance: str = "", stream: bool = False, force: bool = False
+) -> dict:
+    url = normalize_url(url)
+    notion = NotionInterface(is_youtube=is_youtube_url(url))
+
+    existing = None
+    if CHANGE_DETECTION or (REUSE_EXISTING_PAGES and not force):
+        existing = notion.get_database_entry(url)
+    if REUSE_EXISTING_PAGES and not force and existing:
+        logger.info(f"Reusing existing page for {url}: {existing['page_url']}")
+        return existing
+
+    # Concurrent requests for the same URL and guidance share a single run
+    return pipeline_flight.do(
+        f"{url}\n{guidance}",
+        lambda: create_page(notion, url, guidance, stream, existing, force),
+    )
+
+
+def create_page(
+    notion: NotionInterface,
+    url: str,
+    guidance: str,
+    stream: bool,
+    existing: dict | None = None,
+    force: bool = False,
+) -> dict:
+    if existing:
+        return refresh_page(notion, existing, guidance, force)
+
+    # Favicon and thumbnail lookups run alongside scraping and report generation
+    metadata = metadata_enricher.submit(url)
+    result = scrape(url, use_cache=not force)
+    fingerprint = page_fingerprint(notion, result, guidance)
+
+    if stream:
+        result = metadata_enricher.resolve(result, metadata)
+        res = create_page_streaming(notion, url, result, guidance, fingerprint)
+    else:
+        report = generate_report(notion, result["content"], guidance)
+        result = metadata_enricher.resolve(result, metadata)
+        with metrics.span("create_page", url):
+            res = notion.create_page(url, report, result["icon"], result["cover"], fingerprint)
+    add_late_metadata(notion, res, result, metadata)
+    logger.info(f"Cache stats: {cache_stats()}")
+    return res
+
+
+def refresh_page(notion: NotionInterface, existing: dict, guidance: str, force: bool) -> dict:
+    url = existing["url"]
+    stored = existing.get("fingerprint") or {}
+    inputs = content_digest(guidance, report_prompt_template, notion.router.key)
+
+    # A 304 only says the source is unchanged, so it is asked for only if the report inputs match.
+    # The scrape cache is skipped: a cached copy cannot tell whether the page changed since.
+    result = scrape(
+        url, stored if not force and stored.get("inputs") == inputs else None, use_cache=False
+    )
+    if result is None:
+        logger.info(f"{url} not modified, keeping page {existing['page_url']}")
+        metrics.increment("change_detection", result="not_modified")
+        return existing
+
+    fingerprint = page_fingerprint(notion, result, guidance)
+    if not force and (stored.get("content"), stored.get("inputs")) == (
+        fingerprint["content"],
+        fingerprint["inputs"],
+    ):
+        logger.info(f"{url} unchanged, keeping page {existing['page_url']}")
+        metrics.increment("change_detection", result="unchanged")
+        if stored != fingerprint:
+            # Store fresh validators so the next check can be answered with a 304
+            notion.set_fingerprint(existing["id"], fingerprint)
+        return existing
+
+    # Changed or forced: regenerate the report into the existing page
+    metadata = metadata_enricher.submit(url)
+    report = generate_report(notion, result["content"], guidance)
+    result = metadata_enricher.resolve(result, metadata)
+    with metrics.span("update_page", url):
+        res = notion.update_page(
+            existing["id"], url, report, result["icon"], result["cover"], fingerprint
+        )
+    add_late_metadata(notion, res, result, metadata)
+    metrics.increment("change_detection", result="changed")
+    logger.info(f"Cache stats: {cache_stats()}")
+    return res
@@ -0,0 +1,214 @@
+import os
+import re
+from typing import Callable, Iterator
+from urllib.parse import urlparse
+
+from tokens import count_tokens
+from transcripts import TIMESTAMP_LINK_RE
+from metrics import metrics
+from logger import setup_logger
+
+logger = setup_logger()
+
+# A step receives the content's lines and the source URL and yields the cleaned lines.
+# Steps are chained lazily, so the content is only joined back into a string once.
+PreprocessingStep = Callable[[Iterator[str], str], Iterator[str]]
+
+LINK_RE = re.compile(r"!?\[([^\]]*)\]\(([^)\s]*)[^)]*\)")
+IMAGE_RE = re.compile(r"\[!\[[^\]]*\]\([^)]*\)\]\([^)]*\)|!\[[^\]]*\]\([^)]*\)")
+LINK_SEPARATORS_RE = re.compile(r"^[\s\-*+•·|/>]*$")
+CODE_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+# Matched against whole lines, so sentences that merely mention these phrases are kept
+BOILERPLATE_RE = re.compile(
+    r"^\W*(?:"
+    r"we use cookies\b.*|"
+    r"(?:accept|reject) (?:all )?cookies|cookie (?:policy|settings|preferences)|"
+    r"manage (?:your )?(?:cookie )?preferences|"
+    r"(?:(?:©|\(c\)|copyright\b).*?)?all rights reserved|"
+    r"(?:subscribe to|sign up for) (?:our|the) newsletter|"
+    r"share (?:this(?: \w+)?|on \w+)|follow us(?: on \w+)?|"
+    r"skip to (?:main )?content|back to top|log ?in|sign ?in|sign ?up|menu|search"
+    r")\W*$",
+    re.IGNORECASE,
+)
+ZERO_WIDTH_RE = re.compile("[\u200b\u200c\u200d\u2060\ufeff]")
+INNER_SPACES_RE = re.compile(r"(?<=\S)[ \t]{2,}")
+
+CAPTION_ANNOTATION_RE = re.compile(r"\[(music|applause|laughter|inaudible|silence|noise)\]", re.IGNORECASE)
+FILLER_RE = re.compile(r"\b(um+|uh+|erm+|hmm+|ah+)\b[,.]?\s*", re.IGNORECASE)
+# Auto-generated captions repeat overlapping fragments: "so what we did so what we did"
+# Each word has a single way to match, so long transcripts cannot backtrack exponentially.
+# Numbers are never part of a phrase: "1999 1999" may be two values, not a stutter.
+REPEATED_PHRASE_RE = re.compile(
+    r"\b((?:(?!\d+\b)\w+(?:'\w+)?\s+){0,7}(?!\d+\b)\w+(?:'\w+)?)(?:\s+\1\b)+", re.IGNORECASE
+)
+
+# Boilerplate lines are short; longer lines are content even if they mention cookies
+MAX_BOILERPLATE_WORDS = 25
+MIN_NAVIGATION_LINKS = 3
+
+
+def is_link_only(line: str) -> bool:
+    return bool(LINK_RE.search(line)) and bool(LINK_SEPARATORS_RE.match(LINK_RE.sub("", line)))
+
+
+def is_internal_link(href: str, domain: str) -> bool:
+    netloc = urlparse(href).netloc
+    return not netloc or netloc == domain
+
+
+def iter_lines(text: str) -> Iterator[str]:
+    # Like text.split("\n"), without building the list of every line up front
+    start = 0
+    while (end := text.find("\n", start)) != -1:
+        yield text[start:end]
+        start = end + 1
+    yield text[start:]
+
+
+def mark_code(lines: Iterator[str]) -> Iterator[tuple[str, bool]]:
+    # Pairs each line with whether it belongs to a fenced code block, fences included
+    in_code = False
+    for line in lines:
+        if CODE_FENCE_RE.match(line):
+            in_code = not in_code
+            yield line, True
+        else:
+            yield line, in_code
+
+
+def remove_boilerplate(lines: Iterator[str], url: str) -> Iterator[str]:
+    domain = urlparse(url).netloc
+    navigation = []
+
+    for line, in_code in mark_code(lines):
+        if not in_code:
+            line = IMAGE_RE.sub("", line)
+        stripped = line.strip()
+        if (
+            not in_code
+            and stripped
+            and len(stripped.split()) <= MAX_BOILERPLATE_WORDS
+            and BOILERPLATE_RE.search(LINK_RE.sub(r"\1", stripped))
+        ):
+            continue
+
+        if not in_code and is_link_only(stripped):
+            links = LINK_RE.findall(stripped)
+            if all(is_internal_link(href, domain) for _, href in links):
+                if len(links) < MIN_NAVIGATION_LINKS:
+                    navigation.append(line)
+                continue
+        # Runs of internal link-only lines are menus; short runs and external links are kept
+        if len(navigation) < MIN_NAVIGATION_LINKS:
+            yield from navigation
+        navigation.clear()
+        yield line
+    if len(navigation) < MIN_NAVIGATION_LINKS:
+        yield from navigation
+
+
+def deduplicate(lines: Iterator[str], url: str) -> Iterator[str]:
+    seen = set()
+    for line, in_code in mark_code(lines):
+        key = " ".join(line.split()).lower()
+        # Short lines such as separators or single words repeat legitimately, and so does code
+        if not in_code and len(key) > 20:
+            if key in seen:
+                continue
+            seen.add(key)
+        yield line
+
+
+def normalize_whitespace(lines: Iterator[str], url: str) -> Iterator[str]:
+    # Keeps at most one blank line in a row and none at the start or the end
+    started = False
+    blank = False
+    for line, in_code in mark_code(lines):
+        line = ZERO_WIDTH_RE.sub("", line).replace("\u00a0", " ")
+        # Code keeps its alignment and blank lines
+        if in_code:
+            if blank:
+                yield ""
+            yield line.rstrip()
+            started, blank = True, False
+            continue
+        line = INNER_SPACES_RE.sub(" ", line.rstrip())
+        if not line.strip():
+            blank = started
+            continue
+        if blank:
+            yield ""
+        yield line if started else line.lstrip()
+        started, blank = True, False
+
+
+def clean_caption(text: str) -> str:
+    text = CAPTION_ANNOTATION_RE.sub("", text)
+    text = FILLER_RE.sub("", text)
+    return REPEATED_PHRASE_RE.sub(r"\1", text)
+
+
+def clean_transcript(lines: Iterator[str], url: str) -> Iterator[str]:
+    # Timestamp links are kept as is: video IDs can contain words such as "um" or "ah"
+    for line in lines:
+        match = TIMESTAMP_LINK_RE.match(line)
+        prefix = match.group(0) if match else ""
+        yield prefix + clean_caption(line[len(prefix) :])
+
+
+STEPS: dict[str, PreprocessingStep] = {
+    "boilerplate": remove_boilerplate,
+    "dedupe": deduplicate,
+    "whitespace": normalize_whitespace,
+    "transcript": clean_transcript,
+}
+
+DEFAULT_STEPS = {
+    "website": "boilerplate,dedupe,whitespace",
+    "youtube": "transcript,whitespace",
+}
+
+
+class ContentPipeline:
+    def __init__(self, kind: str, steps: list[str]):
+        self.kind = kind
+        self.steps = [(name, STEPS[name]) for name in steps]
+
+    def __counted(self, lines: Iterator[str], chars: dict, key: str) -> Iterator[str]:
+        for line in lines:
+            chars[key] += len(line) + 1
+            yield line
+
+    def run(self, content: str, url: str) -> str:
+        with metrics.span("preprocess", url, kind=self.kind) as span:
+            tokens_before = count_tokens(content)
+            chars = {"": 0, **{name: 0 for name, _ in self.steps}}
+            lines = self.__counted(iter_lines(content), chars, "")
+            for name, step in self.steps:
+                lines = self.__counted(step(lines, url), chars, name)
+            content = "\n".join(lines)
+            tokens_after = count_tokens(content)
+
+            previous = ""
+            for name, _ in self.steps:
+                logger.info(f"Preprocessing step {name} removed {chars[previous] - chars[name]} chars")
+                previous = name
+
+            reduction = 1 - tokens_after / tokens_before if tokens_before else 0.0
+            span.update(
+                tokens_before=tokens_before,
+                tokens_after=tokens_after,
+                reduction=round(reduction, 3),
+            )
+        metrics.increment("preprocess_tokens_removed", tokens_before - tokens_after, kind=self.kind)
+        logger.info(
+            f"Preprocessed {self.kind} content for {url}: {tokens_before} -> {tokens_after} tokens "
+            f"({reduction:.0%} smaller)"
+        )
+        return content
+
+
+def create_pipeline(kind: str) -> ContentPipeline:
+    steps = os.environ.get(f"PREPROCESS_{kind.upper()}_STEPS", DEFAULT_STEPS[kind])
+    return ContentPipeline(kind, [name.strip() for name in steps.split(",") if name.strip()])
@@ -1,3 +1,5 @@
+# Static instructions come first and per-request values ({guidance}, {content}) last,
+# so the provider can reuse its cached prompt prefix across reports.
 report_prompt_template = """
 # Goal
 As an expert researcher, your task is to make a report of key insights extracted from the provided content. Follow these steps:
@@ -9,13 +11,9 @@ As an expert researcher, your task is to make a report of key insights extracted
 3. Proofread the draft for omitted details, including news headlines and insights. Iterate until all key points are captured. Include as much detail as possible for a thorough analysis.
 4. Incorporate all external links naturally within the text (in markdown format: [link text](link URL)) without creating a separate list.  
     Example: [YC cohorts grew](https://techcrunch.com/2022/08/02/y-combinator-narrows-current-cohort-size-by-40-citing-downturn-and-funding-environment/) before shrinking in recent years.
+    Video transcripts open each paragraph with a timestamp link (e.g. [12:34](https://youtu.be/VIDEO_ID?t=754s)). Link key points to the moment they are made using these links.
 5. Add an introduction and conclusion with appropriate headings.
 
-# User Guidance
-The user has provided the following guidance for this report. Please focus your report accordingly:
-
-{guidance}
-
 # Format instructions
 
 ## Allowed markdown elements
@@ -96,6 +94,11 @@ Here's an example of the formatting your report should follow:
 YC's advice emphasizes the importance of customer feedback, focused growth, and founder well-being. By launching early, iterating based on customer input, and staying true to their vision, startups can find success. Remember that the road to success is often bumpy, and broken processes or founder disagreements are normal and can be overcome with dedication and open communication.
 
 
+# User Guidance
+The user has provided the following guidance for this report. Please focus your report accordingly:
+
+{guidance}
+
 # Content
 Here's the content you need to generate the report:
 {content}
@@ -103,3 +106,27 @@ Here's the content you need to generate the report:
 # Output
 Output your generated report here, without any additional content like "Here's the report". Don't add a main title:
 """
+
+notes_prompt_template = """
+# Goal
+As an expert researcher, you are reading one part of a longer piece of content. Extract everything from this part that a report on the full content would need:
+- Claims, facts, observations and specific, actionable insights.
+- Quantitative data of any kind: statistics, reports, trends, etc.
+- All external links, in markdown format: [link text](link URL).
+- For video transcripts, the timestamp link of the paragraph each point comes from.
+
+Write the notes as a concise bulleted list, keeping every number and link exactly as in the content. Do not add an introduction or a conclusion.
+
+# Part
+This is part {part} of {parts}.
+
+# User Guidance
+The user has provided the following guidance for the final report. Prioritize information relevant to it:
+
+{guidance}
+
+# Content
+{content}
+
+# Notes
+"""
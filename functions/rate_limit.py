@@ -0,0 +1,38 @@
+import time
+import threading
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(
+                        self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                    )
+                    self.updated_at = now
+
+                    if self.tokens >= tokens:
+                        self.tokens -= tokens
+                        return
+                    wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        # Hold off every caller, e.g. after the provider answered with Retry-After.
+        # The bucket stays empty during the pause and only refills from its end.
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+            self.updated_at = self.paused_until
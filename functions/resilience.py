@@ -0,0 +1,204 @@
+import os
+import time
+import random
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from metrics import metrics
+from logger import setup_logger
+
+logger = setup_logger()
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitState:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout_secs: float = 30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_secs = reset_timeout_secs
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == CircuitState.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout_secs:
+                    return False
+                self.state = CircuitState.HALF_OPEN
+                self.probing = False
+            if self.state == CircuitState.HALF_OPEN:
+                # A single probe call decides whether the provider has recovered
+                if self.probing:
+                    return False
+                self.probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self.lock:
+            if self.state != CircuitState.CLOSED:
+                logger.info(f"Circuit {self.name} closed")
+            self.state = CircuitState.CLOSED
+            self.failures = 0
+            self.probing = False
+
+    def release(self) -> None:
+        # The probe ended without telling whether the provider is healthy
+        with self.lock:
+            self.probing = False
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.state == CircuitState.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != CircuitState.OPEN:
+                    logger.warning(f"Circuit {self.name} opened after {self.failures} failures")
+                    metrics.increment("circuit_opened", provider=self.name)
+                self.state = CircuitState.OPEN
+                self.opened_at = time.monotonic()
+                self.probing = False
+
+
+class RetryBudget:
+    def __init__(self, ratio: float = 0.2, capacity: float = 10):
+        # Every call earns `ratio` retries, so retries stay a bounded share of the traffic
+        self.ratio = ratio
+        self.capacity = capacity
+        self.tokens = capacity
+        self.lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self.lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+def is_transient_error(error: Exception) -> bool:
+    return isinstance(error, (TimeoutError, ConnectionError))
+
+
+class Provider:
+    def __init__(
+        self,
+        name: str,
+        timeout_secs: float,
+        max_attempts: int = 3,
+        base_delay_secs: float = 0.5,
+        max_delay_secs: float = 8,
+        is_transient: Callable[[Exception], bool] = is_transient_error,
+        breaker: CircuitBreaker | None = None,
+        budget: RetryBudget | None = None,
+    ):
+        self.name = name
+        self.timeout_secs = timeout_secs
+        self.max_attempts = max_attempts
+        self.base_delay_secs = base_delay_secs
+        self.max_delay_secs = max_delay_secs
+        self.is_transient = is_transient
+        self.breaker = breaker
+        self.budget = budget or RetryBudget()
+
+    def __check_circuit(self) -> None:
+        if self.breaker and not self.breaker.allow():
+            metrics.increment("provider_calls", provider=self.name, result="rejected")
+            raise CircuitOpenError(f"Circuit for {self.name} is open, failing fast")
+
+    def __record(self, error: BaseException | None) -> None:
+        if error is None:
+            metrics.increment("provider_calls", provider=self.name, result="success")
+            if self.breaker:
+                self.breaker.record_success()
+        elif self.is_transient(error):
+            metrics.increment("provider_calls", provider=self.name, result="failure")
+            if self.breaker:
+                self.breaker.record_failure()
+        elif self.breaker:
+            # Invalid requests and cancellations say nothing about the provider's health
+            self.breaker.release()
+
+    def backoff_secs(self, attempt: int) -> float:
+        # Full jitter spreads out retries from concurrent callers
+        return random.uniform(0, min(self.max_delay_secs, self.base_delay_secs * 2**attempt))
+
+    def call(self, fn: Callable, *args, **kwargs):
+        self.budget.deposit()
+        for attempt in range(self.max_attempts):
+            self.__check_circuit()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                self.__record(e)
+                if (
+                    not self.is_transient(e)
+                    or attempt == self.max_attempts - 1
+                    or not self.budget.withdraw()
+                ):
+                    raise
+                delay = self.backoff_secs(attempt)
+                metrics.increment("provider_retries", provider=self.name)
+                logger.warning(
+                    f"{self.name} call failed, retrying in {delay:.2f}s "
+                    f"(attempt {attempt + 1}/{self.max_attempts}). Reason: {e}"
+                )
+                time.sleep(delay)
+            else:
+                self.__record(None)
+                return result
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        # For calls that cannot be retried, such as streams: fail fast and record the outcome
+        self.__check_circuit()
+        try:
+            yield
+        except BaseException as e:
+            # Includes GeneratorExit when a consumer stops reading a stream early
+            self.__record(e)
+            raise
+        self.__record(None)
+
+
+def create_provider(
+    name: str,
+    timeout_secs: float,
+    max_attempts: int = 3,
+    is_transient: Callable[[Exception], bool] = is_transient_error,
+    circuit_breaker: bool = True,
+) -> Provider:
+    prefix = name.upper()
+    breaker = None
+    if circuit_breaker:
+        breaker = CircuitBreaker(
+            name,
+            failure_threshold=int(os.environ.get(f"{prefix}_BREAKER_THRESHOLD", "5")),
+            reset_timeout_secs=float(os.environ.get(f"{prefix}_BREAKER_RESET_SECS", "30")),
+        )
+    return Provider(
+        name,
+        timeout_secs=float(os.environ.get(f"{prefix}_TIMEOUT_SECS", timeout_secs)),
+        max_attempts=int(os.environ.get(f"{prefix}_MAX_ATTEMPTS", max_attempts)),
+        is_transient=is_transient,
+        breaker=breaker,
+        budget=RetryBudget(
+            ratio=float(os.environ.get("RETRY_BUDGET_RATIO", "0.2")),
+            capacity=float(os.environ.get("RETRY_BUDGET_CAPACITY", "10")),
+        ),
+    )
@@ -0,0 +1,148 @@
+import os
+import time
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from metrics import metrics
+from logger import setup_logger
+
+logger = setup_logger()
+
+
+class Priority:
+    INTERACTIVE = "interactive"
+    BACKGROUND = "background"
+
+
+# Highest first: a class only gets a slot when no higher class is waiting for one
+PRIORITIES = [Priority.INTERACTIVE, Priority.BACKGROUND]
+
+ANONYMOUS_USER = "anonymous"
+
+# Priority and user of the request the current thread is working for
+current_request: ContextVar[tuple[str, str]] = ContextVar(
+    "current_request", default=(Priority.INTERACTIVE, ANONYMOUS_USER)
+)
+
+
+class FairQueue:
+    def __init__(self, name: str, limit: int, interactive_reserve: int = 0):
+        self.name = name
+        self.limit = limit
+        # Slots background work can never take, so interactive requests do not wait behind it
+        self.background_limit = max(1, limit - interactive_reserve)
+        self.active = {priority: 0 for priority in PRIORITIES}
+        # Per priority, the waiters of each user; users are served round robin
+        self.waiting = {priority: OrderedDict() for priority in PRIORITIES}
+        self.lock = threading.Lock()
+
+    def __can_run(self, priority: str) -> bool:
+        if sum(self.active.values()) >= self.limit:
+            return False
+        return priority == Priority.INTERACTIVE or self.active[priority] < self.background_limit
+
+    def __dispatch(self) -> None:
+        for priority in PRIORITIES:
+            users = self.waiting[priority]
+            while users and self.__can_run(priority):
+                user, waiters = users.popitem(last=False)
+                waiters.popleft().set()
+                if waiters:
+                    users[user] = waiters
+                self.active[priority] += 1
+            if users:
+                break
+        self.__record()
+
+    def __record(self) -> None:
+        for priority in PRIORITIES:
+            depth = sum(len(waiters) for waiters in self.waiting[priority].values())
+            metrics.set_gauge("scheduler_queue_depth", depth, resource=self.name, priority=priority)
+            metrics.set_gauge(
+                "scheduler_active", self.active[priority], resource=self.name, priority=priority
+            )
+
+    def acquire(self, priority: str, user: str) -> float:
+        waiter = threading.Event()
+        started_at = time.perf_counter()
+        with self.lock:
+            self.waiting[priority].setdefault(user, deque()).append(waiter)
+            self.__dispatch()
+        waiter.wait()
+
+        wait_secs = time.perf_counter() - started_at
+        metrics.observe(f"queue_{self.name}_{priority}", wait_secs)
+        return wait_secs
+
+    def release(self, priority: str) -> None:
+        with self.lock:
+            self.active[priority] -= 1
+            self.__dispatch()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "name": self.name,
+                "limit": self.limit,
+                "active": dict(self.active),
+                "waiting": {
+                    priority: sum(len(waiters) for waiters in users.values())
+                    for priority, users in self.waiting.items()
+                },
+            }
+
+
+class Scheduler:
+    def __init__(self, limits: dict[str, int], interactive_reserve: int = 1):
+        # A limit of 0 leaves the resource unscheduled
+        self.queues = {
+            name: FairQueue(name, limit, min(interactive_reserve, limit - 1))
+            for name, limit in limits.items()
+            if limit > 0
+        }
+
+    @contextmanager
+    def slot(self, resource: str) -> Iterator[None]:
+        queue = self.queues.get(resource)
+        if queue is None:
+            yield
+            return
+
+        priority, user = current_request.get()
+        wait_secs = queue.acquire(priority, user)
+        if wait_secs >= 1:
+            logger.info(f"Waited {wait_secs:.1f}s for a {resource} slot ({priority}, {user})")
+        try:
+            yield
+        finally:
+            queue.release(priority)
+
+    def stats(self) -> list[dict]:
+        return [queue.stats() for queue in self.queues.values()]
+
+
+@contextmanager
+def scheduled_as(priority: str, user: str | None = None) -> Iterator[None]:
+    # Work started inside, including threads that copy the context, is queued as this request
+    token = current_request.set((priority, user or ANONYMOUS_USER))
+    try:
+        yield
+    finally:
+        current_request.reset(token)
+
+
+def create_scheduler() -> Scheduler:
+    return Scheduler(
+        {
+            "scrape": int(os.environ.get("SCHEDULER_SCRAPE_CONCURRENCY", "8")),
+            "llm": int(os.environ.get("SCHEDULER_LLM_CONCURRENCY", "8")),
+            "notion": int(os.environ.get("SCHEDULER_NOTION_CONCURRENCY", "3")),
+        },
+        interactive_reserve=int(os.environ.get("SCHEDULER_INTERACTIVE_RESERVE", "1")),
+    )
+
+
+scheduler = create_scheduler()
@@ -0,0 +1,125 @@
+import os
+import threading
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable
+from urllib.parse import urlparse
+
+from langchain.schema import Document
+
+from metrics import metrics
+from logger import setup_logger
+
+logger = setup_logger()
+
+
+class ScrapeCancelled(Exception):
+    pass
+
+
+class AsyncStrategy:
+    # A strategy whose work runs elsewhere, such as an Apify run on the runner's event loop.
+    # It is started on the caller's thread and returns a future, so it takes no worker thread
+    # while it waits and only blocking strategies count against SCRAPE_MAX_WORKERS.
+    def __init__(self, start: Callable[[threading.Event], Future]):
+        self.start = start
+
+
+# A strategy receives a cancel event and returns the scraped document
+ScrapeStrategy = tuple[str, Callable[[threading.Event], Document] | AsyncStrategy]
+
+
+class ScrapeOrchestrator:
+    def __init__(self, hedge_delay_secs: float, max_workers: int = 8):
+        self.hedge_delay_secs = hedge_delay_secs
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.preferred_strategies = {}
+        self.lock = threading.Lock()
+
+    def __order(self, domain: str, strategies: list[ScrapeStrategy]) -> list[ScrapeStrategy]:
+        with self.lock:
+            preferred = self.preferred_strategies.get(domain)
+        return sorted(strategies, key=lambda strategy: strategy[0] != preferred)
+
+    def __record_winner(self, domain: str, name: str) -> None:
+        with self.lock:
+            self.preferred_strategies[domain] = name
+
+    def __submit(
+        self,
+        context: contextvars.Context,
+        strategy: Callable | AsyncStrategy,
+        cancel_event: threading.Event,
+    ) -> Future:
+        # A context can only be entered by one thread at a time, so every strategy gets its own copy
+        if isinstance(strategy, AsyncStrategy):
+            return context.copy().run(strategy.start, cancel_event)
+        return self.executor.submit(context.copy().run, strategy, cancel_event)
+
+    def run(self, url: str, strategies: list[ScrapeStrategy]) -> Document:
+        if not strategies:
+            raise ValueError(f"No scrape strategies for {url}")
+
+        domain = urlparse(url).netloc
+        pending_strategies = self.__order(domain, strategies)
+        cancel_event = threading.Event()
+        # Strategies run with the priority and user of the request that started the scrape
+        context = contextvars.copy_context()
+        running = {}
+        error = None
+        # Strategies to launch without waiting for the hedge delay: the first one, then one per failure
+        launch_now = 1
+
+        try:
+            while pending_strategies or running:
+                # Launch the next strategy when one failed, nothing is running or hedging is off;
+                # otherwise it is hedged in once the delay expires
+                while pending_strategies and (launch_now or not running or self.hedge_delay_secs == 0):
+                    name, strategy = pending_strategies.pop(0)
+                    logger.info(f"Starting scrape strategy {name} for {url}")
+                    running[self.__submit(context, strategy, cancel_event)] = name
+                    launch_now = max(0, launch_now - 1)
+
+                done, _ = wait(
+                    running,
+                    timeout=self.hedge_delay_secs if pending_strategies else None,
+                    return_when=FIRST_COMPLETED,
+                )
+                if not done:
+                    name, strategy = pending_strategies.pop(0)
+                    logger.info(f"Hedging scrape of {url} with strategy {name}")
+                    running[self.__submit(context, strategy, cancel_event)] = name
+                    continue
+
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        document = future.result()
+                    except Exception as e:
+                        logger.error(f"Scrape strategy {name} failed. Reason: {e}")
+                        metrics.increment("scrape_strategy_failures", strategy=name)
+                        error = e
+                        launch_now += 1
+                        continue
+
+                    if not document or not document.page_content:
+                        logger.error(f"Scrape strategy {name} returned no content")
+                        error = ValueError(f"No content scraped with strategy {name}")
+                        launch_now += 1
+                        continue
+
+                    logger.info(f"Scrape strategy {name} won for {domain}")
+                    self.__record_winner(domain, name)
+                    metrics.increment("scrape_strategy_wins", strategy=name)
+                    return document
+        finally:
+            # Abort the strategies that lost the race
+            cancel_event.set()
+
+        raise error
+
+
+scrape_orchestrator = ScrapeOrchestrator(
+    hedge_delay_secs=float(os.environ.get("SCRAPE_HEDGE_DELAY_SECS", "20")),
+    max_workers=int(os.environ.get("SCRAPE_MAX_WORKERS", "8")),
+)
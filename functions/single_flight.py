@@ -0,0 +1,37 @@
+import threading
+from concurrent.futures import Future
+from typing import Callable
+
+from logger import preview, setup_logger
+
+logger = setup_logger()
+
+
+class SingleFlight:
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], dict]) -> dict:
+        with self.lock:
+            call = self.calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self.calls[key] = Future()
+
+        # Later callers wait for the running call and share its result
+        if not is_leader:
+            logger.info(f"Joining in-flight call for {preview(key)}")
+            return call.result()
+
+        try:
+            result = fn()
+        except Exception as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.calls[key]
@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Iterable, Iterator
+
+from metrics import metrics
+from logger import setup_logger
+
+logger = setup_logger()
+
+
+class Storage:
+    # Key-value collections shared by every instance, with per-entry expiry
+    shared_across_instances = False
+
+    def get_many(self, collection: str, keys: Iterable[str]) -> dict:
+        raise NotImplementedError
+
+    def set_many(self, collection: str, items: dict, ttl_secs: float | None = None) -> None:
+        raise NotImplementedError
+
+    def scan(self, collection: str) -> Iterator[tuple[str, object]]:
+        raise NotImplementedError
+
+    def get(self, collection: str, key: str):
+        return self.get_many(collection, [key]).get(key)
+
+    def set(self, collection: str, key: str, value, ttl_secs: float | None = None) -> None:
+        self.set_many(collection, {key: value}, ttl_secs)
+
+
+class SQLiteStorage(Storage):
+    # Stands in for Firestore in tests and single-instance deployments
+    max_batch_size = 500
+
+    def __init__(self, path: str):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS storage ("
+                "collection TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "expires_at REAL, PRIMARY KEY (collection, key))"
+            )
+
+    def get_many(self, collection: str, keys: Iterable[str]) -> dict:
+        keys = list(keys)
+        values = {}
+        for start in range(0, len(keys), self.max_batch_size):
+            batch = keys[start : start + self.max_batch_size]
+            with self.lock:
+                rows = self.connection.execute(
+                    f"SELECT key, value FROM storage WHERE collection = ? "
+                    f"AND key IN ({', '.join('?' * len(batch))}) "
+                    f"AND (expires_at IS NULL OR expires_at > ?)",
+                    (collection, *batch, time.time()),
+                ).fetchall()
+            values.update((key, json.loads(value)) for key, value in rows)
+        return values
+
+    def set_many(self, collection: str, items: dict, ttl_secs: float | None = None) -> None:
+        expires_at = time.time() + ttl_secs if ttl_secs is not None else None
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO storage VALUES (?, ?, ?, ?)",
+                [(collection, key, json.dumps(value), expires_at) for key, value in items.items()],
+            )
+            self.connection.execute(
+                "DELETE FROM storage WHERE collection = ? AND expires_at <= ?",
+                (collection, time.time()),
+            )
+
+    def scan(self, collection: str) -> Iterator[tuple[str, object]]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT key, value FROM storage WHERE collection = ? "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                (collection, time.time()),
+            ).fetchall()
+        for key, value in rows:
+            yield key, json.loads(value)
+
+
+class FirestoreStorage(Storage):
+    # Firestore limits batched writes to 500 operations and documents to 1 MiB
+    max_batch_size = 500
+    max_value_bytes = 900_000
+    shared_across_instances = True
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.__client = None
+        self.lock = threading.Lock()
+
+    @property
+    def client(self):
+        # Created on first use, so importing main.py needs neither credentials nor the gRPC stack
+        with self.lock:
+            if self.__client is None:
+                import firebase_admin
+                from firebase_admin import firestore
+
+                # Reuses the app initialized by main.py; FIRESTORE_EMULATOR_HOST selects the emulator
+                try:
+                    firebase_admin.get_app()
+                except ValueError:
+                    firebase_admin.initialize_app()
+                self.__client = firestore.client()
+            return self.__client
+
+    def __document(self, collection: str, key: str):
+        # Keys are URLs and hashes, which are not valid document IDs as is
+        document_id = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.client.collection(f"{self.prefix}{collection}").document(document_id)
+
+    def __value(self, data: dict, now: datetime):
+        # Firestore TTL policies delete expired documents lazily, so expiry is checked on read
+        if data.get("expires_at") is not None and data["expires_at"] <= now:
+            return None
+        return json.loads(data["value"])
+
+    def get_many(self, collection: str, keys: Iterable[str]) -> dict:
+        keys = list(keys)
+        now = datetime.now(timezone.utc)
+        values = {}
+        with metrics.span("storage_read", collection=collection, keys=len(keys)):
+            for start in range(0, len(keys), self.max_batch_size):
+                documents = [
+                    self.__document(collection, key)
+                    for key in keys[start : start + self.max_batch_size]
+                ]
+                for snapshot in self.client.get_all(documents):
+                    if snapshot.exists and (value := self.__value(snapshot.to_dict(), now)) is not None:
+                        values[snapshot.get("key")] = value
+        return values
+
+    def set_many(self, collection: str, items: dict, ttl_secs: float | None = None) -> None:
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=ttl_secs) if ttl_secs is not None else None
+        documents = []
+        for key, value in items.items():
+            serialized = json.dumps(value)
+            if len(serialized) > self.max_value_bytes:
+                logger.warning(f"Not storing {collection}/{key}: {len(serialized)} bytes is too large")
+                continue
+            documents.append(
+                (
+                    self.__document(collection, key),
+                    {"key": key, "value": serialized, "expires_at": expires_at, "updated_at": now},
+                )
+            )
+
+        with metrics.span("storage_write", collection=collection, keys=len(documents)):
+            for start in range(0, len(documents), self.max_batch_size):
+                batch = self.client.batch()
+                for document, data in documents[start : start + self.max_batch_size]:
+                    batch.set(document, data)
+                batch.commit()
+
+    def scan(self, collection: str) -> Iterator[tuple[str, object]]:
+        now = datetime.now(timezone.utc)
+        for snapshot in self.client.collection(f"{self.prefix}{collection}").stream():
+            data = snapshot.to_dict()
+            if (value := self.__value(data, now)) is not None:
+                yield data["key"], value
+
+
+@lru_cache(maxsize=None)
+def get_storage(backend: str | None = None) -> Storage:
+    backend = backend or os.environ.get("STORAGE_BACKEND", "sqlite")
+    if backend == "firestore":
+        return FirestoreStorage(os.environ.get("STORAGE_COLLECTION_PREFIX", "notionify_"))
+    if backend == "sqlite":
+        return SQLiteStorage(os.environ.get("STORAGE_PATH", "/tmp/notionify_storage.db"))
+    raise ValueError(f"Unknown storage backend: {backend}")
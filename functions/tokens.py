@@ -0,0 +1,60 @@
+from functools import lru_cache
+from typing import Iterator
+
+import tiktoken
+
+from logger import setup_logger
+
+logger = setup_logger()
+
+# Rough average for English text, used when the tokenizer files are unavailable.
+CHARS_PER_TOKEN = 4
+# Long texts are tokenized one window at a time, so the token list never covers the whole text
+WINDOW_CHARS = 64_000
+
+
+@lru_cache(maxsize=1)
+def get_encoding() -> tiktoken.Encoding | None:
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"Falling back to approximate token counts. Reason: {e}")
+        return None
+
+
+def iter_windows(text: str, window_chars: int = WINDOW_CHARS) -> Iterator[str]:
+    # Windows end after whitespace where possible, so words are not split between them
+    start = 0
+    while start < len(text):
+        end = min(start + window_chars, len(text))
+        if end < len(text):
+            end = max(text.rfind(" ", start, end), text.rfind("\n", start, end)) + 1 or end
+        yield text[start:end]
+        start = end
+
+
+def count_tokens(text: str) -> int:
+    encoding = get_encoding()
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN
+    return sum(len(encoding.encode(window, disallowed_special=())) for window in iter_windows(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> tuple[str, bool]:
+    # Stops reading at the budget, so oversized inputs are never tokenized in full
+    if max_tokens <= 0:
+        return text, False
+    encoding = get_encoding()
+    if encoding is None:
+        max_chars = max_tokens * CHARS_PER_TOKEN
+        return text[:max_chars], len(text) > max_chars
+
+    tokens = 0
+    consumed = 0
+    for window in iter_windows(text):
+        encoded = encoding.encode(window, disallowed_special=())
+        if tokens + len(encoded) > max_tokens:
+            return text[:consumed] + encoding.decode(encoded[: max_tokens - tokens]), True
+        tokens += len(encoded)
+        consumed += len(window)
+    return text, False
@@ -0,0 +1,93 @@
+import os
+import re
+from typing import Callable, Iterable, TypeVar
+
+Track = TypeVar("Track")
+
+# Segments keep only their start time: the next segment's start bounds each one
+Segment = tuple[float, str]
+
+TRANSCRIPT_LANGUAGES = [
+    language.strip()
+    for language in os.environ.get("TRANSCRIPT_LANGUAGES", "en,it,nl").split(",")
+    if language.strip()
+]
+TRANSCRIPT_CHUNK_SECS = float(os.environ.get("TRANSCRIPT_CHUNK_SECS", "60"))
+
+SRT_TIME_RE = re.compile(r"(\d+):(\d{2}):(\d{2})[,.](\d{3})\s*-->")
+SRT_TAG_RE = re.compile(r"<[^>]+>")
+# Chunks start with a link to their position in the video: "[12:34](https://youtu.be/ID?t=754) "
+TIMESTAMP_LINK_RE = re.compile(r"^\[\d+(?::\d{2})+\]\([^)\s]+\)\s*")
+
+
+def pick_track(
+    tracks: Iterable[Track],
+    language_of: Callable[[Track], str],
+    is_generated: Callable[[Track], bool],
+    languages: list[str] = TRANSCRIPT_LANGUAGES,
+) -> Track | None:
+    # Preferred languages first, manual captions before generated ones, then anything available
+    def rank(track: Track) -> tuple[int, bool]:
+        language = language_of(track).split("-")[0].lower()
+        position = languages.index(language) if language in languages else len(languages)
+        return position, is_generated(track)
+
+    return min(tracks, key=rank, default=None)
+
+
+def segments_from_entries(entries: Iterable[dict]) -> list[Segment]:
+    return [
+        (float(entry["start"]), text)
+        for entry in entries
+        if (text := " ".join(entry["text"].split()))
+    ]
+
+
+def segments_from_srt(srt: str) -> list[Segment]:
+    segments = []
+    for block in re.split(r"\n\s*\n", srt.replace("\r\n", "\n").strip()):
+        lines = block.split("\n")
+        for i, line in enumerate(lines):
+            if match := SRT_TIME_RE.match(line.strip()):
+                hours, minutes, seconds, millis = (int(group) for group in match.groups())
+                text = " ".join(SRT_TAG_RE.sub("", " ".join(lines[i + 1 :])).split())
+                if text:
+                    segments.append((hours * 3600 + minutes * 60 + seconds + millis / 1000, text))
+                break
+    return segments
+
+
+def format_timestamp(secs: float) -> str:
+    minutes, seconds = divmod(int(secs), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+def timestamp_url(video_id: str, secs: float) -> str:
+    return f"https://youtu.be/{video_id}?t={int(secs)}s"
+
+
+def time_chunks(segments: list[Segment], max_secs: float = TRANSCRIPT_CHUNK_SECS) -> list[tuple[float, str]]:
+    chunks = []
+    start, texts = None, []
+    for segment_start, text in segments:
+        if start is not None and segment_start - start >= max_secs:
+            chunks.append((start, " ".join(texts)))
+            start, texts = None, []
+        if start is None:
+            start = segment_start
+        texts.append(text)
+    if texts:
+        chunks.append((start, " ".join(texts)))
+    return chunks
+
+
+def render_transcript(
+    video_id: str, segments: list[Segment], max_secs: float = TRANSCRIPT_CHUNK_SECS
+) -> str:
+    # One paragraph per chunk, so the map step splits on chunk boundaries and the report
+    # can link each point back to the moment in the video
+    return "\n\n".join(
+        f"[{format_timestamp(start)}]({timestamp_url(video_id, start)}) {text}"
+        for start, text in time_chunks(segments, max_secs)
+    )
@@ -0,0 +1,180 @@
+import os
+import time
+import threading
+
+from notion_database import NotionDatabase, is_archived
+from storage import Storage, get_storage
+from logger import setup_logger
+
+logger = setup_logger()
+
+
+class NotionUrlIndex:
+    def __init__(
+        self,
+        notion: NotionDatabase,
+        refresh_interval_secs: float,
+        storage: Storage | None = None,
+        storage_ttl_secs: float = 30 * 24 * 3600,
+        entry_ttl_secs: float = 300,
+    ):
+        self.notion = notion
+        self.refresh_interval_secs = refresh_interval_secs
+        # Archived pages never show up in the database queries the index is built from, so
+        # entries older than this are checked against the page before they are served
+        self.entry_ttl_secs = entry_ttl_secs
+        # Entries are shared through storage, so a cold instance starts from what others indexed
+        self.storage = storage
+        self.storage_ttl_secs = storage_ttl_secs
+        self.collection = f"url_index_{notion.database_id}"
+        self.loaded = storage is None
+        self.entries = {}
+        self.urls_by_page = {}
+        self.misses = {}
+        self.watermark = None
+        self.refreshed_at = float("-inf")
+        self.refreshing = False
+        self.lock = threading.Lock()
+
+    def add(self, entry: dict) -> None:
+        with self.lock:
+            if self.watermark is None or self.watermark < entry["last_edited_time"]:
+                self.watermark = entry["last_edited_time"]
+            self.misses.pop(entry["url"], None)
+
+            # A page whose URL was edited is re-keyed; the latest edit decides which URL it has
+            previous_url = self.urls_by_page.get(entry["id"])
+            if previous_url is not None and previous_url != entry["url"]:
+                previous = self.entries.get(previous_url)
+                if previous is not None and previous["last_edited_time"] > entry["last_edited_time"]:
+                    return
+                self.entries.pop(previous_url, None)
+
+            current = self.entries.get(entry["url"])
+            if current is None or current["last_edited_time"] <= entry["last_edited_time"]:
+                if current is not None and current["id"] != entry["id"]:
+                    self.urls_by_page.pop(current["id"], None)
+                self.entries[entry["url"]] = entry
+                self.urls_by_page[entry["id"]] = entry["url"]
+
+    def remove(self, entry: dict) -> None:
+        with self.lock:
+            if self.entries.get(entry["url"], {}).get("id") == entry["id"]:
+                del self.entries[entry["url"]]
+            if self.urls_by_page.get(entry["id"]) == entry["url"]:
+                del self.urls_by_page[entry["id"]]
+        if self.storage:
+            # Expires at once, which deletes it for the other instances as well
+            self.storage.set_many(self.collection, {entry["url"]: entry}, ttl_secs=0)
+
+    def __indexed(self, page: dict, url: str | None = None) -> dict:
+        return {**self.notion.database_entry(page, url), "indexed_at": time.time()}
+
+    def __load(self) -> None:
+        count = 0
+        for _, entry in self.storage.scan(self.collection):
+            self.add(entry)
+            count += 1
+        self.loaded = True
+        logger.info(f"Loaded {count} URL index entries from storage, watermark {self.watermark}")
+
+    def __persist(self, entries: list[dict]) -> None:
+        if self.storage and entries:
+            self.storage.set_many(
+                self.collection, {entry["url"]: entry for entry in entries}, self.storage_ttl_secs
+            )
+
+    def refresh(self) -> None:
+        started_at = time.monotonic()
+        count = 0
+        try:
+            if not self.loaded:
+                self.__load()
+            # Incremental after the first full pass: only pages edited since the watermark
+            entries = []
+            for page in self.notion.iter_database_pages(edited_since=self.watermark):
+                if page["properties"]["URL"]["url"] and not is_archived(page):
+                    entries.append(self.__indexed(page))
+                    self.add(entries[-1])
+                    count += 1
+            self.__persist(entries)
+        except Exception as e:
+            logger.error(f"Failed to refresh URL index. Reason: {e}")
+        else:
+            logger.info(
+                f"Refreshed URL index with {count} pages in {time.monotonic() - started_at:.2f}s"
+            )
+        finally:
+            with self.lock:
+                self.refreshed_at = started_at
+                self.refreshing = False
+
+    def refresh_in_background(self) -> None:
+        with self.lock:
+            if self.refreshing or time.monotonic() - self.refreshed_at < self.refresh_interval_secs:
+                return
+            self.refreshing = True
+        threading.Thread(target=self.refresh, daemon=True).start()
+
+    def __verify(self, entry: dict) -> dict | None:
+        try:
+            page = self.notion.get_page(entry["id"])
+        except Exception as e:
+            logger.warning(f"Failed to check page {entry['id']}, serving the indexed entry. Reason: {e}")
+            return entry
+
+        if page is None or is_archived(page) or page["properties"]["URL"]["url"] != entry["url"]:
+            logger.info(f"Page {entry['id']} no longer belongs to {entry['url']}, removing it from the index")
+            self.remove(entry)
+            if page is not None and not is_archived(page) and page["properties"]["URL"]["url"]:
+                moved = self.__indexed(page)
+                self.add(moved)
+                self.__persist([moved])
+            return None
+
+        entry = self.__indexed(page, entry["url"])
+        self.add(entry)
+        self.__persist([entry])
+        return entry
+
+    def lookup(self, url: str) -> dict | None:
+        self.refresh_in_background()
+        with self.lock:
+            entry = self.entries.get(url)
+            # Misses are re-checked against Notion at most once per refresh interval
+            missed_at = self.misses.get(url)
+            if entry is None and missed_at is not None and time.monotonic() - missed_at < self.refresh_interval_secs:
+                return None
+
+        if entry is not None:
+            if time.time() - entry.get("indexed_at", 0) < self.entry_ttl_secs:
+                return entry
+            if (entry := self.__verify(entry)) is not None:
+                return entry
+
+        if page_entry := self.notion.get_database_entry(url):
+            entry = {**page_entry, "indexed_at": time.time()}
+            self.add(entry)
+            self.__persist([entry])
+            return entry
+        with self.lock:
+            self.misses[url] = time.monotonic()
+        return None
+
+
+url_indexes = {}
+url_indexes_lock = threading.Lock()
+
+
+def get_url_index(is_youtube: bool) -> NotionUrlIndex:
+    with url_indexes_lock:
+        if is_youtube not in url_indexes:
+            persist = os.environ.get("URL_INDEX_PERSIST", "false").lower() == "true"
+            url_indexes[is_youtube] = NotionUrlIndex(
+                NotionDatabase(is_youtube=is_youtube),
+                refresh_interval_secs=float(os.environ.get("URL_INDEX_REFRESH_SECS", "30")),
+                storage=get_storage() if persist else None,
+                storage_ttl_secs=float(os.environ.get("URL_INDEX_TTL_SECS", str(30 * 24 * 3600))),
+                entry_ttl_secs=float(os.environ.get("URL_INDEX_ENTRY_TTL_SECS", "300")),
+            )
+        return url_indexes[is_youtube]
@@ -0,0 +1,30 @@
+from urllib.parse import urlparse, parse_qs
+
+
+def is_youtube_url(url: str) -> bool:
+    return urlparse(url).netloc in ["www.youtube.com", "youtu.be"]
+
+
+def extract_video_id(url: str) -> str | None:
+    parsed_url = urlparse(url)
+    if parsed_url.hostname == "youtu.be":
+        return parsed_url.path[1:]
+    if parsed_url.hostname in ("www.youtube.com", "youtube.com"):
+        if parsed_url.path == "/watch":
+            return parse_qs(parsed_url.query).get("v", [None])[0]
+        if parsed_url.path.startswith(("/embed/", "/v/")):
+            return parsed_url.path.split("/")[2]
+    return None
+
+
+def standardize_youtube_url(url: str) -> str:
+    video_id = extract_video_id(url)
+    if not video_id:
+        raise ValueError("Invalid YouTube URL")
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+def normalize_url(url: str) -> str:
+    if is_youtube_url(url):
+        return standardize_youtube_url(url)
+    return url
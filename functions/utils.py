@@ -1,28 +1,67 @@
 import os
-import re
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-from langchain_community.utilities import ApifyWrapper
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import lru_cache
+from typing import Callable, Iterator
 from langchain.output_parsers import PydanticOutputParser
 from langchain_core.pydantic_v1 import BaseModel, Field
 from langchain.prompts import PromptTemplate
 from langchain.schema import Document
-from langchain_openai import ChatOpenAI
-from notion_client import Client
-from youtube_transcript_api import YouTubeTranscriptApi
-from urllib.parse import urlparse, parse_qs
-from logger import setup_logger
+from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.runnables import Runnable, RunnableLambda
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+from youtube_transcript_api import TooManyRequests, YouTubeRequestFailed, YouTubeTranscriptApi
+from logger import preview, setup_logger
 
 from dotenv import load_dotenv
 
-from prompt_templates import report_prompt_template
+from prompt_templates import notes_prompt_template, report_prompt_template
+from tokens import count_tokens
+from apify_runner import apify_provider, apify_runner
+from clients import get_chat_model
+from model_router import MAP_REDUCE_THRESHOLD_TOKENS, create_router
+from notion_database import NotionDatabase
+from urls import extract_video_id
+from transcripts import pick_track, render_transcript, segments_from_entries, segments_from_srt
+from metadata import YOUTUBE_ICON
+from http_scraper import HttpScraper
+from resilience import create_provider
+from markdown_converter import MarkdownConverter, markdown_to_blocks
+from metrics import metrics
+from scrape_orchestrator import AsyncStrategy, ScrapeStrategy, scrape_orchestrator
 
 load_dotenv()
 
 logger = setup_logger()
 
 
+def is_transient_openai_error(error: Exception) -> bool:
+    return isinstance(
+        error,
+        (APIConnectionError, APITimeoutError, InternalServerError, RateLimitError, TimeoutError),
+    )
+
+
+def is_transient_youtube_error(error: Exception) -> bool:
+    return isinstance(error, (TooManyRequests, YouTubeRequestFailed, ConnectionError, TimeoutError))
+
+
+openai_provider = create_provider(
+    "openai", timeout_secs=180, is_transient=is_transient_openai_error
+)
+youtube_provider = create_provider(
+    "youtube", timeout_secs=10, max_attempts=2, is_transient=is_transient_youtube_error
+)
+# The transcript API takes no timeout, so its calls run here and are waited on with one
+transcript_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("YOUTUBE_MAX_WORKERS", "8")), thread_name_prefix="transcripts"
+)
+
+
 class Report(BaseModel):
     title: str = Field(description="A clear and concise title of the report")
     content: str = Field(
@@ -30,6 +69,36 @@ class Report(BaseModel):
     )
 
 
+REPORT_PARSER = PydanticOutputParser(pydantic_object=Report)
+# The format instructions never change, so they are part of the cacheable prompt prefix
+REPORT_PROMPT = PromptTemplate.from_template(template=report_prompt_template).partial(
+    format_instructions=REPORT_PARSER.get_format_instructions()
+)
+NOTES_PROMPT = PromptTemplate.from_template(template=notes_prompt_template)
+
+
+@lru_cache(maxsize=None)
+def get_report_chain(model: str, timeout_secs: float) -> Runnable:
+    return REPORT_PROMPT | get_chat_model(model, timeout_secs=timeout_secs) | REPORT_PARSER
+
+
+@lru_cache(maxsize=None)
+def get_report_stream_chain(model: str, timeout_secs: float) -> Runnable:
+    # Asks OpenAI for a final usage chunk so streamed reports are costed too. OpenAI rejects
+    # stream_options on requests that are not streamed, so it is bound here only.
+    llm = get_chat_model(model, timeout_secs=timeout_secs).bind(stream_options={"include_usage": True})
+    return REPORT_PROMPT | llm | JsonOutputParser(pydantic_object=Report)
+
+
+@lru_cache(maxsize=None)
+def get_notes_chain(model: str, timeout_secs: float) -> Runnable:
+    return NOTES_PROMPT | get_chat_model(model, timeout_secs=timeout_secs) | StrOutputParser()
+
+
+# Picks the model for each call from the size of its content
+report_router = create_router(openai_provider)
+
+
 class ApifyInterface:
     website_run_input = {
         "crawlerType": "playwright:firefox",
@@ -50,341 +119,275 @@ class ApifyInterface:
         "hasSubtitles": True,
         "maxResults": 1,
         "preferAutoGeneratedSubtitles": False,
-        "subtitlesFormat": "plaintext",
+        # Every track comes back from a single run with its timings; the language is picked here
+        "subtitlesLanguage": "any",
+        "subtitlesFormat": "srt",
     }
 
-    def __init__(self):
-        self.client = ApifyWrapper()
+    website_trials = {
+        "html": {"saveHtmlAsFile": True, "saveMarkdown": False},
+        "markdown": {"saveHtmlAsFile": False, "saveMarkdown": True},
+    }
 
-    def scrape_website(self, url: str) -> Document:
-        def mapping_function(item: dict) -> Document:
-            return Document(
-                page_content=item.get("markdown", "") or item.get("text", ""),
-                metadata={"icon": self.__get_website_favicon(url)},
+    async def __run_actor(
+        self,
+        actor_id: str,
+        run_input: dict,
+        timeout_secs: int,
+        memory_mbytes: int,
+        mapping_function: Callable[[dict], Document],
+        cancel_event: threading.Event,
+    ) -> Document:
+        # Runs on the Apify runner's loop; runs are not retried, so the provider only tracks them
+        with metrics.span(
+            "apify_run", run_input["startUrls"][0]["url"], actor_id=actor_id
+        ) as span, apify_provider.track():
+            run, item = await apify_runner.run(
+                actor_id, run_input, timeout_secs, memory_mbytes, cancel_event
             )
+            span["run_status"] = run["status"]
+        return mapping_function(item)
 
-        logger.info(f"Scraping website: {url}")
-
-        trials = [
-            {"saveHtmlAsFile": True, "saveMarkdown": False},
-            {"saveHtmlAsFile": False, "saveMarkdown": True},
-        ]
+    async def __scrape_website(self, url: str, trial: dict, cancel_event: threading.Event) -> Document:
+        def mapping_function(item: dict) -> Document:
+            # The favicon is looked up by the metadata stage, next to the scrape
+            return Document(page_content=item.get("markdown", "") or item.get("text", ""))
+
+        return await self.__run_actor(
+            actor_id="apify/website-content-crawler",
+            run_input={
+                **self.website_run_input,
+                "startUrls": [{"url": url}],
+                **trial,
+            },
+            timeout_secs=180,
+            memory_mbytes=4096,
+            mapping_function=mapping_function,
+            cancel_event=cancel_event,
+        )
 
-        while trials:
-            try:
-                loader = self.client.call_actor(
-                    actor_id="apify/website-content-crawler",
-                    run_input={
-                        **self.website_run_input,
-                        "startUrls": [{"url": url}],
-                        **trials.pop(0),
-                    },
-                    timeout_secs=180,
-                    memory_mbytes=4096,
-                    dataset_mapping_function=mapping_function,
-                )
-                return loader.load()[0]
-            except Exception as e:
-                logger.error(f"Failed to scrape website. Reason: {e}")
-
-                if not trials:
-                    raise e
-
-    def scrape_youtube(self, url: str) -> Document:
+    async def __scrape_youtube(self, url: str, cancel_event: threading.Event) -> Document:
         def mapping_function(item: dict) -> Document:
-            if not item.get("subtitles"):
+            track = pick_track(
+                item.get("subtitles") or [],
+                language_of=lambda track: track.get("language") or "",
+                is_generated=lambda track: track.get("type") == "auto_generated",
+            )
+            segments = segments_from_srt(track.get("srt") or "") if track else []
+            if not segments:
                 raise ValueError("No subtitles found")
+            logger.info(f"Using {track.get('language')} subtitles with {len(segments)} segments")
             return Document(
-                page_content=str(item["subtitles"]),
-                metadata={
-                    "icon": self.__get_youtube_favicon(url),
-                    "cover": item.get("thumbnailUrl"),
-                },
+                page_content=render_transcript(extract_video_id(url), segments),
+                metadata={"icon": YOUTUBE_ICON, "cover": item.get("thumbnailUrl")},
             )
 
-        logger.info(f"Scraping YouTube video: {url}")
-
-        languages = ["en", "it", "nl"]
-
-        while languages:
-            try:
-                loader = self.client.call_actor(
-                    actor_id="streamers/youtube-scraper",
-                    run_input={
-                        **self.youtube_run_input,
-                        "startUrls": [{"url": url, "method": "GET"}],
-                        "subtitlesLanguage": languages.pop(0),
-                    },
-                    timeout_secs=60,
-                    memory_mbytes=1024,
-                    dataset_mapping_function=mapping_function,
-                )
-                content = loader.load()[0]
-                if content:
-                    return content
-            except Exception as e:
-                logger.error(f"Failed to scrape YouTube video with Apify. Reason: {e}")
-
-                if not languages:
-                    raise e
-
-    def __get_website_favicon(self, url: str) -> str:
-        response = requests.get(url)
-        try:
-            response.raise_for_status()
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to fetch favicon. Reason: {e}")
-            return None
-
-        soup = BeautifulSoup(response.text, "html.parser")
-        icon_link = None
-
-        for rel in ["icon", "shortcut icon"]:
-            icon_link = soup.find("link", rel=rel)
-            if icon_link:
-                break
+        return await self.__run_actor(
+            actor_id="streamers/youtube-scraper",
+            run_input={
+                **self.youtube_run_input,
+                "startUrls": [{"url": url, "method": "GET"}],
+            },
+            timeout_secs=60,
+            memory_mbytes=1024,
+            mapping_function=mapping_function,
+            cancel_event=cancel_event,
+        )
 
-        if icon_link and "href" in icon_link.attrs:
-            favicon_url = urljoin(url, icon_link["href"])
-            logger.info(f"Found favicon: {favicon_url}")
-            return favicon_url
+    def website_strategies(self, url: str) -> list[ScrapeStrategy]:
+        return [
+            (
+                f"apify-website-{name}",
+                AsyncStrategy(
+                    lambda cancel_event, trial=trial: apify_runner.submit(
+                        self.__scrape_website(url, trial, cancel_event)
+                    )
+                ),
+            )
+            for name, trial in self.website_trials.items()
+        ]
 
-        logger.warning("No favicon found")
-        return None
+    def youtube_strategies(self, url: str) -> list[ScrapeStrategy]:
+        return [
+            (
+                "apify-youtube",
+                AsyncStrategy(
+                    lambda cancel_event: apify_runner.submit(self.__scrape_youtube(url, cancel_event))
+                ),
+            )
+        ]
 
-    def __get_youtube_favicon(self, url: str) -> str:
-        logger.info(f"Using default favicon for YouTube URL: {url}")
-        return "https://img.icons8.com/?size=100&id=19318&format=png&color=000000"
+    def scrape_website(self, url: str) -> Document:
+        logger.info(f"Scraping website: {url}")
+        return scrape_orchestrator.run(url, self.website_strategies(url))
 
 
 class YoutubeInterface:
-    def __extract_video_id(self, url: str) -> str:
-        parsed_url = urlparse(url)
-        if parsed_url.hostname == "youtu.be":
-            return parsed_url.path[1:]
-        if parsed_url.hostname in ("www.youtube.com", "youtube.com"):
-            if parsed_url.path == "/watch":
-                return parse_qs(parsed_url.query)["v"][0]
-            if parsed_url.path.startswith(("/embed/", "/v/")):
-                return parsed_url.path.split("/")[2]
-        return None
-
-    def __format_transcript(self, transcript: list) -> str:
-        return " ".join([entry["text"] for entry in transcript])
+    def __fetch_segments(self, video_id: str) -> list:
+        # A single listing covers every track, so no language is requested twice
+        tracks = YouTubeTranscriptApi.list_transcripts(video_id)
+        track = pick_track(
+            tracks,
+            language_of=lambda track: track.language_code,
+            is_generated=lambda track: track.is_generated,
+        )
+        if track is None:
+            raise ValueError("No transcripts found")
+        logger.info(f"Using {track.language_code} transcript (generated: {track.is_generated})")
+        return segments_from_entries(track.fetch())
+
+    def __fetch_segments_within_timeout(self, video_id: str) -> list:
+        # A stalled fetch keeps its executor thread, but no longer holds the request
+        future = transcript_executor.submit(self.__fetch_segments, video_id)
+        try:
+            return future.result(timeout=youtube_provider.timeout_secs)
+        except FutureTimeoutError:
+            raise TimeoutError(
+                f"No transcript for {video_id} within {youtube_provider.timeout_secs}s"
+            ) from None
 
     def scrape_video(self, url: str) -> Document:
-        video_id = self.__extract_video_id(url)
+        video_id = extract_video_id(url)
         if not video_id:
             raise ValueError("Invalid YouTube URL")
 
-        transcript = (
-            YouTubeTranscriptApi.list_transcripts(video_id)
-            .find_transcript(["en", "it", "nl"])
-            .fetch()
-        )
+        segments = youtube_provider.call(self.__fetch_segments_within_timeout, video_id)
         return Document(
-            page_content=self.__format_transcript(transcript),
-            metadata={
-                "icon": self.__get_favicon(url),
-                "cover": self.__get_thumbnail(url),
-            },
+            page_content=render_transcript(video_id, segments),
+            # The thumbnail is looked up by the metadata stage, next to the scrape
+            metadata={"icon": YOUTUBE_ICON},
         )
 
-    def __get_favicon(self, url: str) -> str:
-        logger.info(f"Using default favicon for YouTube URL: {url}")
-        return "https://img.icons8.com/?size=100&id=19318&format=png&color=000000"
+    def strategies(self, url: str) -> list[ScrapeStrategy]:
+        return [("youtube-transcript", lambda cancel_event: self.scrape_video(url))]
 
-    def __get_thumbnail(self, url: str) -> str:
-        video_id = self.__extract_video_id(url)
-        if not video_id:
-            raise ValueError("Invalid YouTube URL")
 
-        thumbnail_url = f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg"
+class NotionInterface(NotionDatabase):
+    # Notion API limits
+    max_children_per_request = 100
+    stream_flush_interval_secs = float(os.environ.get("STREAM_FLUSH_INTERVAL_SECS", "1"))
 
-        response = requests.head(thumbnail_url)
-        if response.status_code != 200:
-            thumbnail_url = f"https://img.youtube.com/vi/{video_id}/hqdefault.jpg"
+    router = report_router
 
-        logger.info(f"Using thumbnail: {thumbnail_url}")
-        return thumbnail_url
+    # Map-reduce settings for content too long for a single report call
+    map_reduce_threshold_tokens = MAP_REDUCE_THRESHOLD_TOKENS
+    map_chunk_tokens = int(os.environ.get("MAP_CHUNK_TOKENS", "12000"))
+    map_chunk_overlap_tokens = int(os.environ.get("MAP_CHUNK_OVERLAP_TOKENS", "200"))
+    map_concurrency = int(os.environ.get("MAP_CONCURRENCY", "4"))
 
-    def standardize_url(self, url: str) -> str:
-        video_id = self.__extract_video_id(url)
-        if not video_id:
-            raise ValueError("Invalid YouTube URL")
-        return f"https://www.youtube.com/watch?v={video_id}"
-
-
-class NotionInterface:
-    # Regex patterns
-    h_re_pattern = r"^#+ "
-    numbered_list_re_pattern = r"^\d+\. "
-    bulleted_list_re_pattern = r"^[-*] "
-    bold_re_pattern = r"\*\*[^*]+\*\*"
-    italic_re_pattern = r"\*[^*]+\*"
-    link_re_pattern = r"\[.*?\)"
-
-    # Markdown patterns
-    h1_pattern = "# "
-    h2_pattern = "## "
-    h3_pattern = "###"  # NOTE: No trailing space to label h4, h5, and so on as h3.
-
-    REPORT_PROMPT = PromptTemplate.from_template(template=report_prompt_template)
-
-    def __init__(self, is_youtube: bool):
-        self.client = Client(auth=os.environ["NOTION_TOKEN"])
-        self.database_id = (
-            os.environ["NOTION_VIDEOS_DATABASE_ID"]
-            if is_youtube
-            else os.environ["NOTION_WEBSITES_DATABASE_ID"]
+    def __summarize_chunks(self, content: str, guidance: str) -> str:
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=self.map_chunk_tokens,
+            chunk_overlap=self.map_chunk_overlap_tokens,
+            length_function=count_tokens,
+        )
+        chunks = splitter.split_text(content)
+        logger.info(
+            f"Summarizing {len(chunks)} chunks with concurrency {self.map_concurrency}"
         )
 
-    def __identify_block_type(self, text: str) -> str:
-        if text.startswith(self.h3_pattern):
-            return "heading_3"
-        if text.startswith(self.h2_pattern):
-            return "heading_2"
-        if text.startswith(self.h1_pattern):
-            return "heading_1"
-        if re.match(self.numbered_list_re_pattern, text):
-            return "numbered_list_item"
-        if re.match(self.bulleted_list_re_pattern, text):
-            return "bulleted_list_item"
-        return "paragraph"
-
-    def __create_block(self, text: str, block_type: str) -> dict:
-        if block_type.startswith("heading"):
-            text = re.sub(self.h_re_pattern, "", text)
-        if block_type == "numbered_list_item":
-            text = re.sub(self.numbered_list_re_pattern, "", text)
-        if block_type == "bulleted_list_item":
-            text = re.sub(self.bulleted_list_re_pattern, "", text)
-
-        # Split text into bold, italic, and links
-        combined_pattern = (
-            f"({self.bold_re_pattern}|{self.italic_re_pattern}|{self.link_re_pattern})"
+        # Each chunk is routed, retried and failed over on its own instead of re-running the batch
+        summarize = RunnableLambda(
+            lambda inputs: self.router.invoke(get_notes_chain, inputs, count_tokens(inputs["content"]))
         )
-        split_text = [part for part in re.split(combined_pattern, text) if part]
+        with metrics.span("llm_map", chunks=len(chunks)):
+            notes = summarize.batch(
+                [
+                    {"content": chunk, "guidance": guidance, "part": i + 1, "parts": len(chunks)}
+                    for i, chunk in enumerate(chunks)
+                ],
+                config={"max_concurrency": self.map_concurrency},
+            )
+        return "\n\n".join(notes)
+
+    def __prepare_content(self, content: str, guidance: str) -> tuple[str, int]:
+        # Map: condense long content into notes until it fits a single report call
+        tokens = count_tokens(content)
+        while tokens > self.map_reduce_threshold_tokens:
+            logger.info(f"Content has {tokens} tokens, summarizing in chunks")
+            content = self.__summarize_chunks(content, guidance)
+            tokens, previous_tokens = count_tokens(content), tokens
+            if tokens >= previous_tokens:
+                break
+        return content, tokens
 
-        # Create rich text
-        rich_text = []
-        for part in split_text:
-            if not part:
-                continue
+    def generate_report(self, content: str, guidance: str = "") -> Report:
+        logger.info(f"Generating report with guidance: {preview(guidance)}")
 
-            logger.info(f"Assigning rich text to block: {block_type}")
-            if part.startswith("**"):
-                rich_text.append(
-                    {
-                        "type": "text",
-                        "text": {"content": part.replace("**", "")},
-                        "annotations": {"bold": True},
-                    }
-                )
-            elif part.startswith("*"):
-                rich_text.append(
-                    {
-                        "type": "text",
-                        "text": {"content": part.replace("*", "")},
-                        "annotations": {"italic": True},
-                    }
-                )
-            elif part.startswith("[") and part.endswith(")"):
-                print(part)
-                link_text, link_url = part[1:-1].split("](")
-                rich_text.append(
-                    {
-                        "type": "text",
-                        "text": {"content": link_text, "link": {"url": link_url}},
-                    }
-                )
-            else:
-                rich_text.append({"type": "text", "text": {"content": part}})
+        content, tokens = self.__prepare_content(content, guidance)
 
-        return {
-            "object": "block",
-            "type": block_type,
-            block_type: {"rich_text": rich_text},
-        }
+        # Reduce: the model is picked from the size of the content
+        prompt_context = {"content": content, "guidance": guidance}
+        result = self.router.invoke(get_report_chain, prompt_context, tokens)
+        logger.info(f"Generated report {result.title!r} ({len(result.content)} chars)")
+        return result
 
-    def get_database_entry(self, url: str) -> dict | None:        
-        # Create filter for the URL property
-        filter_params = {
-            "filter": {
-                "property": "URL",
-                "url": {
-                    "equals": url
-                }
-            },
-            "sorts": [
-                {
-                    "timestamp": "last_edited_time",
-                    "direction": "descending"
-                }
-            ]
+    def stream_report(self, content: str, guidance: str = "") -> Iterator[dict]:
+        logger.info(f"Streaming report with guidance: {preview(guidance)}")
+
+        content, tokens = self.__prepare_content(content, guidance)
+
+        # Same prompt and routing as generate_report, parsed into partial dicts as tokens arrive
+        prompt_context = {"content": content, "guidance": guidance}
+        yield from self.router.stream(get_report_stream_chain, prompt_context, tokens)
+
+    def __append_blocks(self, page_id: str, children_blocks: list) -> None:
+        for start in range(0, len(children_blocks), self.max_children_per_request):
+            self.request(
+                self.client.blocks.children.append,
+                idempotent=False,
+                block_id=page_id,
+                children=children_blocks[start : start + self.max_children_per_request],
+            )
+
+    def __clear_blocks(self, page_id: str) -> None:
+        block_ids = []
+        query = {"block_id": page_id, "page_size": 100}
+        while True:
+            response = self.request(self.client.blocks.children.list, **query)
+            block_ids += [block["id"] for block in response["results"]]
+            if not response.get("has_more"):
+                break
+            query["start_cursor"] = response["next_cursor"]
+
+        for block_id in block_ids:
+            self.request(self.client.blocks.delete, idempotent=False, block_id=block_id)
+
+    def __fingerprint_value(self, fingerprint: dict) -> dict:
+        # An empty fingerprint clears the property
+        return {"rich_text": [{"text": {"content": json.dumps(fingerprint)}}] if fingerprint else []}
+
+    def __properties(self, url: str, title: str, fingerprint: dict | None = None) -> dict:
+        properties = {
+            "Name": {"title": [{"text": {"content": title}}]},
+            "URL": {"url": url},
         }
-        
-        response = self.client.databases.query(
-            database_id=self.database_id,
-            **filter_params
+        if fingerprint is not None:
+            properties[self.fingerprint_property] = self.__fingerprint_value(fingerprint)
+        return properties
+
+    def set_fingerprint(self, page_id: str, fingerprint: dict) -> dict:
+        return self.request(
+            self.client.pages.update,
+            page_id=page_id,
+            properties={self.fingerprint_property: self.__fingerprint_value(fingerprint)},
         )
-        
-        # Only process the first (most recent) result if any exist
-        if response["results"]:
-            page = response["results"][0]
-            title = page["properties"]["Name"]["title"][0]["text"]["content"] if page["properties"]["Name"]["title"] else "Untitled"
-            page_url = page["url"]
-            
-            return {
-                "id": page["id"],
-                "title": title,
-                "url": url,
-                "page_url": page_url,
-                "created_time": page["created_time"],
-                "last_edited_time": page["last_edited_time"]
-            }
-        
-    def generate_report(self, content: str, guidance: str = "") -> Report:
-        logger.info(f"Generating report with guidance: {guidance}")
-
-        # Create report chain
-        llm = ChatOpenAI(model="gpt-4.1-mini", temperature=0)
-        parser = PydanticOutputParser(pydantic_object=Report)
-        chain = self.REPORT_PROMPT | llm | parser
-        prompt_context = {
-            "content": content,
-            "guidance": guidance,
-            "format_instructions": parser.get_format_instructions(),
-        }
-        result = chain.invoke(prompt_context)
-        logger.info(f"Generated report: {result}")
-        return result
 
-    def create_page(
+    def __create_page(
         self,
         url: str,
-        report: Report,
+        title: str,
+        children_blocks: list,
         icon: str | None = None,
         cover: str | None = None,
+        fingerprint: dict | None = None,
     ) -> dict:
-        # Split content by paragraphs and create blocks
-        children_blocks = []
-        for block in report.content.split("\n"):
-            block = block.strip()
-            if not block:
-                continue
-
-            block_type = self.__identify_block_type(block)
-            children_blocks.append(self.__create_block(block, block_type))
-
-        # Create new page
+        remaining_blocks = children_blocks[self.max_children_per_request :]
+        # The fingerprint marks the page as complete, so it is written after the last block
         kwargs = {
             "parent": {"database_id": self.database_id},
-            "properties": {
-                "Name": {"title": [{"text": {"content": report.title}}]},
-                "URL": {"url": url},
-            },
-            "children": children_blocks,
+            "properties": self.__properties(url, title, None if remaining_blocks else fingerprint),
+            "children": children_blocks[: self.max_children_per_request],
         }
 
         if icon:
@@ -393,44 +396,142 @@ class NotionInterface:
         if cover:
             kwargs["cover"] = {"type": "external", "external": {"url": cover}}
 
-        page = self.client.pages.create(**kwargs)
+        page = self.request(self.client.pages.create, idempotent=False, **kwargs)
+
+        # Append the remaining blocks in batches
+        self.__append_blocks(page["id"], remaining_blocks)
+        if fingerprint and remaining_blocks:
+            page = self.set_fingerprint(page["id"], fingerprint)
 
         logger.info(f"Created new page: {page['url']}")
+        return page
+
+    def __page_result(self, url: str, title: str, page: dict) -> dict:
         return {
-            "id": page["id"], 
-            "title": report.title,
+            "id": page["id"],
+            "title": title,
             "url": url,
             "page_url": page["url"],
             "created_time": page["created_time"],
             "last_edited_time": page["last_edited_time"]
         }
 
-def is_youtube_url(url: str) -> bool:
-    return urlparse(url).netloc in ["www.youtube.com", "youtu.be"]
+    def set_page_metadata(self, page_id: str, icon: str | None = None, cover: str | None = None) -> dict:
+        kwargs = {}
+        if icon:
+            kwargs["icon"] = {"type": "external", "external": {"url": icon}}
+        if cover:
+            kwargs["cover"] = {"type": "external", "external": {"url": cover}}
+        return self.request(self.client.pages.update, page_id=page_id, **kwargs)
 
-def scrape_website_with_apify(url: str) -> dict:
-    apify = ApifyInterface()
-    document = apify.scrape_website(url)
-    return {
-        "content": document.page_content,
-        "icon": document.metadata.get("icon"),
-        "cover": document.metadata.get("cover"),
-    }
+    def create_page(
+        self,
+        url: str,
+        report: Report,
+        icon: str | None = None,
+        cover: str | None = None,
+        fingerprint: dict | None = None,
+    ) -> dict:
+        children_blocks = markdown_to_blocks(report.content)
+        page = self.__create_page(url, report.title, children_blocks, icon, cover, fingerprint)
+        return self.__page_result(url, report.title, page)
+
+    def update_page(
+        self,
+        page_id: str,
+        url: str,
+        report: Report,
+        icon: str | None = None,
+        cover: str | None = None,
+        fingerprint: dict | None = None,
+    ) -> dict:
+        # Replace the content in place so the page keeps its URL, comments and backlinks.
+        # The old fingerprint is cleared first, so a failed update is not taken as current.
+        kwargs = {"properties": self.__properties(url, report.title, {} if fingerprint else None)}
+        if icon:
+            kwargs["icon"] = {"type": "external", "external": {"url": icon}}
+        if cover:
+            kwargs["cover"] = {"type": "external", "external": {"url": cover}}
+        page = self.request(self.client.pages.update, page_id=page_id, **kwargs)
+
+        self.__clear_blocks(page_id)
+        self.__append_blocks(page_id, markdown_to_blocks(report.content))
+        if fingerprint:
+            page = self.set_fingerprint(page_id, fingerprint)
 
+        logger.info(f"Updated page in place: {page['url']}")
+        return self.__page_result(url, report.title, page)
 
-def scrape_youtube_with_apify(url: str) -> dict:
-    apify = ApifyInterface()
-    document = apify.scrape_youtube(url)
+    def create_page_streaming(
+        self,
+        url: str,
+        partial_reports: Iterator[dict],
+        icon: str | None = None,
+        cover: str | None = None,
+        fingerprint: dict | None = None,
+    ) -> tuple[dict, Report]:
+        page = None
+        consumed = 0
+        converter = MarkdownConverter()
+        pending_blocks = []
+        last_flush = 0.0
+        partial = {}
+
+        for partial in partial_reports:
+            content = partial.get("content")
+            # The title is final once the model has moved on to the content
+            if content is None or "title" not in partial:
+                continue
+
+            if page is None:
+                page = self.__create_page(url, partial["title"], [], icon, cover)
+
+            # Only convert complete lines, the last one may still be streaming
+            line_end = content.rfind("\n")
+            if line_end >= consumed:
+                for line in content[consumed:line_end].split("\n"):
+                    pending_blocks += converter.feed(line)
+                consumed = line_end + 1
+
+            if pending_blocks and (
+                time.monotonic() - last_flush >= self.stream_flush_interval_secs
+                or len(pending_blocks) >= self.max_children_per_request
+            ):
+                self.__append_blocks(page["id"], pending_blocks)
+                pending_blocks = []
+                last_flush = time.monotonic()
+
+        report = Report(**partial)
+        logger.info(f"Generated report {report.title!r} ({len(report.content)} chars)")
+        if page is None:
+            return self.create_page(url, report, icon, cover, fingerprint), report
+
+        for line in report.content[consumed:].split("\n"):
+            pending_blocks += converter.feed(line)
+        pending_blocks += converter.close()
+        self.__append_blocks(page["id"], pending_blocks)
+        if fingerprint:
+            page = self.set_fingerprint(page["id"], fingerprint)
+        return self.__page_result(url, report.title, page), report
+
+
+def scrape_website(url: str, validators: dict | None = None) -> dict:
+    # Try a plain HTTP fetch first and only launch the Apify crawler if it falls short
+    http_scraper = HttpScraper()
+    document = http_scraper.scrape(url, validators) or ApifyInterface().scrape_website(url)
     return {
         "content": document.page_content,
         "icon": document.metadata.get("icon"),
         "cover": document.metadata.get("cover"),
+        "validators": http_scraper.validators,
     }
 
 
-def scrape_youtube_with_transcript(url: str) -> dict:
-    youtube = YoutubeInterface()
-    document = youtube.scrape_video(url)
+def scrape_youtube(url: str) -> dict:
+    # Race the Apify actor against the transcript API instead of falling back sequentially
+    document = scrape_orchestrator.run(
+        url, ApifyInterface().youtube_strategies(url) + YoutubeInterface().strategies(url)
+    )
     return {
         "content": document.page_content,
         "icon": document.metadata.get("icon"),
@@ -0,0 +1,40 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "functions"))
+
+for name in ["NOTION_TOKEN", "OPENAI_API_KEY", "APIFY_API_TOKEN"]:
+    os.environ.setdefault(name, "test")
+os.environ.setdefault("NOTION_WEBSITES_DATABASE_ID", "websites")
+os.environ.setdefault("NOTION_VIDEOS_DATABASE_ID", "videos")
+
+from bulk import BulkImporter, BulkStatus
+
+PLAYLIST_URL = "https://www.youtube.com/playlist?list=PL0123456789"
+VIDEO_URL = "https://youtu.be/dQw4w9WgXcQ"
+WEBSITE_URL = "https://example.com/article"
+
+
+def created(self, url: str, guidance: str, force: bool) -> dict:
+    return {"url": url, "status": BulkStatus.CREATED, "result": {"id": url}}
+
+
+class BulkImporterTest(unittest.TestCase):
+    def test_invalid_urls_fail_without_stopping_the_batch(self):
+        with mock.patch.object(BulkImporter, "_BulkImporter__process", created):
+            summary = BulkImporter().run([PLAYLIST_URL, WEBSITE_URL, VIDEO_URL])
+
+        self.assertEqual(summary["total"], 3)
+        self.assertEqual(summary["done"], 3)
+        self.assertEqual(summary[BulkStatus.CREATED], 2)
+        self.assertEqual(summary[BulkStatus.FAILED], 1)
+        self.assertEqual(summary["results"][PLAYLIST_URL]["status"], BulkStatus.FAILED)
+        self.assertEqual(
+            summary["results"]["https://www.youtube.com/watch?v=dQw4w9WgXcQ"]["status"], BulkStatus.CREATED
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "functions"))
+
+from http_scraper import HttpScraper
+from preprocessing import create_pipeline
+
+URL = "https://example.com/article"
+PARAGRAPH = "Le café de la gare sert des crêpes et des pâtisseries à toute heure de la journée. " * 30
+CODE = "def total(items):\n    result  = 0\n\n    for item in items:\n        result += item\n    return result"
+
+
+def html_response(body: str, content_type: str, encoding: str = "utf-8") -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["Content-Type"] = content_type
+    # As requests builds it: ISO-8859-1 for text/html without a charset
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response._content = body.encode(encoding)
+    response._content_consumed = True
+    return response
+
+
+def scrape(response: requests.Response) -> str:
+    with mock.patch("requests.get", return_value=response):
+        document = HttpScraper().scrape(URL)
+    return document.page_content
+
+
+class HttpScraperTest(unittest.TestCase):
+    def test_decodes_utf8_pages_without_a_charset_header(self):
+        body = f"<html><head><meta charset='utf-8'></head><body><p>{PARAGRAPH}</p></body></html>"
+        content = scrape(html_response(body, "text/html"))
+        self.assertIn("Le café de la gare sert des crêpes", content)
+        self.assertNotIn("Ã", content)
+
+    def test_uses_the_charset_header(self):
+        body = f"<html><body><p>{PARAGRAPH}</p></body></html>"
+        content = scrape(html_response(body, "text/html; charset=iso-8859-1", encoding="iso-8859-1"))
+        self.assertIn("Le café de la gare sert des crêpes", content)
+
+    def test_keeps_code_blocks_as_they_are(self):
+        body = f"<html><body><article><p>{PARAGRAPH}</p><pre><code>{CODE}</code></pre></article></body></html>"
+        content = scrape(html_response(body, "text/html; charset=utf-8"))
+        self.assertIn(f"```\n{CODE}\n```", content)
+        self.assertIn(f"```\n{CODE}\n```", create_pipeline("website").run(content, URL))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "functions"))
+
+from markdown_converter import MAX_NESTING_DEPTH, MAX_RICH_TEXT_LENGTH, MarkdownConverter, markdown_to_blocks
+
+REPORT = """# Summary
+
+Read the [Python article](https://en.wikipedia.org/wiki/Python_(programming_language)) for **background**.
+
+- First level
+    - Second level
+        - Third level
+            - Fourth level
+- Back to the first level
+
+```python
+# Not a heading
+- not a bullet
+print("done")
+```
+
+1. Step one
+2. Step two
+
+> A quote with `code`
+"""
+
+
+def children(block: dict) -> list:
+    return block[block["type"]].get("children", [])
+
+
+def depth(block: dict) -> int:
+    return max((depth(child) + 1 for child in children(block)), default=0)
+
+
+def text(block: dict) -> str:
+    return "".join(item["text"]["content"] for item in block[block["type"]]["rich_text"])
+
+
+def stream_blocks(markdown: str, chunk_size: int) -> list:
+    # Like NotionDatabase.create_page_streaming: only complete lines are fed while the content grows
+    converter = MarkdownConverter()
+    blocks = []
+    consumed = 0
+    for end in range(chunk_size, len(markdown) + chunk_size, chunk_size):
+        content = markdown[:end]
+        line_end = content.rfind("\n")
+        if line_end >= consumed:
+            for line in content[consumed:line_end].split("\n"):
+                blocks += converter.feed(line)
+            consumed = line_end + 1
+    for line in markdown[consumed:].split("\n"):
+        blocks += converter.feed(line)
+    return blocks + list(converter.close())
+
+
+class MarkdownConverterTest(unittest.TestCase):
+    def test_caps_list_nesting_depth(self):
+        blocks = markdown_to_blocks(REPORT)
+        lists = [block for block in blocks if block["type"] == "bulleted_list_item"]
+
+        self.assertEqual([text(block) for block in lists], ["First level", "Back to the first level"])
+        self.assertEqual(depth(lists[0]), MAX_NESTING_DEPTH)
+        # The item too deep for one request becomes a sibling of the deepest one
+        second = children(lists[0])[0]
+        self.assertEqual([text(block) for block in children(second)], ["Third level", "Fourth level"])
+
+    def test_keeps_fenced_code_as_it_is(self):
+        code = [block for block in markdown_to_blocks(REPORT) if block["type"] == "code"]
+
+        self.assertEqual(len(code), 1)
+        self.assertEqual(code[0]["code"]["language"], "python")
+        self.assertEqual(text(code[0]), '# Not a heading\n- not a bullet\nprint("done")')
+
+    def test_closes_an_unterminated_fence(self):
+        blocks = markdown_to_blocks("```\nunfinished")
+        self.assertEqual([block["type"] for block in blocks], ["code"])
+        self.assertEqual(text(blocks[0]), "unfinished")
+
+    def test_keeps_parentheses_in_link_urls(self):
+        paragraph = [block for block in markdown_to_blocks(REPORT) if block["type"] == "paragraph"][0]
+        links = [item for item in paragraph["paragraph"]["rich_text"] if item["text"].get("link")]
+
+        self.assertEqual(len(links), 1)
+        self.assertEqual(links[0]["text"]["content"], "Python article")
+        self.assertEqual(
+            links[0]["text"]["link"]["url"], "https://en.wikipedia.org/wiki/Python_(programming_language)"
+        )
+        self.assertEqual(text(paragraph), "Read the Python article for background.")
+
+    def test_splits_text_over_the_rich_text_limit(self):
+        long_text = "x" * (2 * MAX_RICH_TEXT_LENGTH + 500)
+        blocks = markdown_to_blocks(f"{long_text}\n\n```\n{long_text}\n```")
+
+        self.assertEqual([block["type"] for block in blocks], ["paragraph", "code"])
+        for block in blocks:
+            items = block[block["type"]]["rich_text"]
+            self.assertEqual([len(item["text"]["content"]) for item in items], [2000, 2000, 500])
+            self.assertEqual(text(block), long_text)
+
+    def test_streaming_matches_the_whole_document(self):
+        expected = markdown_to_blocks(REPORT)
+        for chunk_size in [1, 7, 64, len(REPORT)]:
+            self.assertEqual(stream_blocks(REPORT, chunk_size), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
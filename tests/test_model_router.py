@@ -0,0 +1,93 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "functions"))
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk
+from langchain_core.messages.ai import UsageMetadata
+from langchain_core.outputs import ChatGenerationChunk
+from langchain_core.runnables import RunnableLambda
+
+from metrics import metrics
+from model_router import DEFAULT_ROUTES, MAP_REDUCE_THRESHOLD_TOKENS, ModelRouter, Route
+from resilience import Provider
+
+
+class StreamingChatModel(BaseChatModel):
+    @property
+    def _llm_type(self) -> str:
+        return "streaming"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        for text in ["Hello", " world"]:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+        # Like OpenAI with stream_options={"include_usage": True}
+        usage = UsageMetadata(input_tokens=1000, output_tokens=100, total_tokens=1100)
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+
+def create_router(routes: list[dict]) -> ModelRouter:
+    # Routing only looks at the routes, the provider is used when calling a model
+    return ModelRouter([Route(**route) for route in routes], provider=None)
+
+
+class ModelRouterTest(unittest.TestCase):
+    def test_each_default_route_is_selected(self):
+        router = create_router(DEFAULT_ROUTES)
+        # Report calls are at most MAP_REDUCE_THRESHOLD_TOKENS, larger content is summarized first
+        selected = {router.route(tokens).name for tokens in range(1, MAP_REDUCE_THRESHOLD_TOKENS + 1, 100)}
+        selected.add(router.route(MAP_REDUCE_THRESHOLD_TOKENS).name)
+        self.assertEqual(selected, {route["name"] for route in DEFAULT_ROUTES})
+        self.assertEqual(router.unreachable_routes(MAP_REDUCE_THRESHOLD_TOKENS), [])
+
+    def test_routes_beyond_the_map_reduce_threshold_are_unreachable(self):
+        router = create_router(
+            [
+                {"name": "small", "max_tokens": 4000, "models": ["a"], "timeout_secs": 30},
+                {"name": "medium", "max_tokens": 60000, "models": ["b"], "timeout_secs": 90},
+                {"name": "large", "max_tokens": None, "models": ["c"], "timeout_secs": 180},
+            ]
+        )
+        self.assertEqual([route.name for route in router.unreachable_routes(60000)], ["large"])
+        self.assertEqual(router.unreachable_routes(60001), [])
+
+    def test_provider_timeout_caps_route_timeouts(self):
+        router = ModelRouter(
+            [
+                Route("small", max_tokens=4000, models=["a"], timeout_secs=30),
+                Route("large", max_tokens=None, models=["b"], timeout_secs=180),
+            ],
+            provider=Provider("openai", timeout_secs=60),
+        )
+        timeouts = []
+
+        def get_chain(model: str, timeout_secs: float):
+            timeouts.append(timeout_secs)
+            return RunnableLambda(lambda inputs: model)
+
+        self.assertEqual(router.invoke(get_chain, {}, tokens=100), "a")
+        self.assertEqual(list(router.stream(get_chain, {}, tokens=10000)), ["b"])
+        self.assertEqual(timeouts, [30, 60])
+
+    def test_streamed_calls_record_their_cost(self):
+        router = ModelRouter(
+            [Route("small", max_tokens=None, models=["gpt-4.1-mini"], timeout_secs=30)],
+            provider=Provider("openai", timeout_secs=60),
+        )
+        key = ("llm_route_cost_usd", (("model", "gpt-4.1-mini"), ("route", "small")))
+        before = metrics.counters.get(key, 0)
+
+        chunks = list(router.stream(lambda model, timeout_secs: StreamingChatModel(), "Summarize", tokens=1000))
+
+        self.assertEqual("".join(chunk.content for chunk in chunks), "Hello world")
+        # 1000 prompt tokens at $0.40 and 100 completion tokens at $1.60 per million
+        self.assertAlmostEqual(metrics.counters[key] - before, 0.00056)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "functions"))
+
+from preprocessing import create_pipeline
+
+URL = "https://example.com/article"
+
+
+class RemoveBoilerplateTest(unittest.TestCase):
+    def setUp(self):
+        self.pipeline = create_pipeline("website")
+
+    def test_keeps_sentences_mentioning_boilerplate_phrases(self):
+        lines = [
+            "Apple's market share on smartphones rose to 20% in 2023.",
+            "Investors who follow us saw returns of 12% last year.",
+            "The artist kept all rights reserved for the 1999 album.",
+        ]
+        self.assertEqual(self.pipeline.run("\n\n".join(lines), URL), "\n\n".join(lines))
+
+    def test_drops_standalone_boilerplate_lines(self):
+        text = "\n".join(
+            [
+                "Skip to main content",
+                "Revenue grew 35% to $4.2B.",
+                "Share on Twitter",
+                "Follow us",
+                "We use cookies to improve your experience.",
+                "© 2024 Example Inc. All rights reserved.",
+            ]
+        )
+        self.assertEqual(self.pipeline.run(text, URL), "Revenue grew 35% to $4.2B.")
+
+
+class CleanTranscriptTest(unittest.TestCase):
+    def setUp(self):
+        self.pipeline = create_pipeline("youtube")
+
+    def test_collapses_repeated_phrases(self):
+        self.assertEqual(
+            self.pipeline.run("so what we did so what we did was ship", URL), "so what we did was ship"
+        )
+
+    def test_keeps_repeated_numbers(self):
+        text = "sales were 1999 1999 units and 20 20 percent"
+        self.assertEqual(self.pipeline.run(text, URL), text)
+
+    def test_long_unpunctuated_transcript_is_fast(self):
+        text = " ".join(f"word{i % 50} and the thing" for i in range(3000))
+        started_at = time.perf_counter()
+        self.pipeline.run(text, URL)
+        self.assertLess(time.perf_counter() - started_at, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "functions"))
+
+from rate_limit import TokenBucket
+
+
+class TokenBucketTest(unittest.TestCase):
+    def test_does_not_refill_during_a_pause(self):
+        bucket = TokenBucket(rate=10, capacity=10)
+        started_at = time.monotonic()
+        bucket.pause(0.2)
+        for _ in range(3):
+            bucket.acquire()
+
+        # Refilled from the end of the pause, one token per 0.1s; a bucket that kept filling
+        # while paused would hand out two tokens as soon as the pause ends
+        self.assertGreaterEqual(time.monotonic() - started_at, 0.48)
+
+    def test_waits_for_the_pause_to_end(self):
+        bucket = TokenBucket(rate=1000, capacity=10)
+        started_at = time.monotonic()
+        bucket.pause(0.2)
+        bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - started_at, 0.2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import sys
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "functions"))
+
+os.environ.setdefault("NOTION_TOKEN", "test")
+os.environ.setdefault("NOTION_WEBSITES_DATABASE_ID", "websites")
+os.environ.setdefault("NOTION_VIDEOS_DATABASE_ID", "videos")
+
+from notion_client.errors import RequestTimeoutError
+
+import notion_database
+from notion_database import NotionDatabase, is_transient_notion_error
+from resilience import CircuitBreaker, CircuitOpenError, CircuitState, Provider, RetryBudget
+
+
+class FailingCall:
+    def __init__(self, error: Exception):
+        self.error = error
+        self.calls = 0
+
+    def __call__(self, **kwargs):
+        self.calls += 1
+        raise self.error
+
+
+def open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout_secs=0.05)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_rejects_calls_while_open(self):
+        breaker = open_breaker()
+        self.assertEqual(breaker.state, CircuitState.OPEN)
+        self.assertFalse(breaker.allow())
+
+        provider = Provider("test", timeout_secs=1, breaker=breaker)
+        call = FailingCall(TimeoutError())
+        with self.assertRaises(CircuitOpenError):
+            provider.call(call)
+        self.assertEqual(call.calls, 0)
+
+    def test_lets_a_single_probe_through_after_the_reset_timeout(self):
+        breaker = open_breaker()
+        time.sleep(0.06)
+
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, CircuitState.HALF_OPEN)
+        # Other callers keep failing fast while the probe is in flight
+        self.assertFalse(breaker.allow())
+
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitState.CLOSED)
+        self.assertTrue(breaker.allow())
+
+    def test_failed_probe_opens_the_circuit_again(self):
+        breaker = open_breaker()
+        time.sleep(0.06)
+
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitState.OPEN)
+        self.assertFalse(breaker.allow())
+
+    def test_inconclusive_probe_frees_the_probe_slot(self):
+        breaker = open_breaker()
+        time.sleep(0.06)
+        provider = Provider("test", timeout_secs=1, breaker=breaker)
+
+        # An invalid request says nothing about the provider's health
+        with self.assertRaises(ValueError):
+            provider.call(FailingCall(ValueError()))
+        self.assertEqual(breaker.state, CircuitState.HALF_OPEN)
+        self.assertTrue(breaker.allow())
+
+
+class RetryBudgetTest(unittest.TestCase):
+    def test_retries_stop_when_the_budget_is_spent(self):
+        provider = Provider(
+            "test", timeout_secs=1, max_attempts=3, base_delay_secs=0, budget=RetryBudget(ratio=0.5, capacity=1)
+        )
+
+        first = FailingCall(TimeoutError())
+        with self.assertRaises(TimeoutError):
+            provider.call(first)
+        # The only token in the budget pays for one retry
+        self.assertEqual(first.calls, 2)
+
+        second = FailingCall(TimeoutError())
+        with self.assertRaises(TimeoutError):
+            provider.call(second)
+        # Half a token is earned per call, not enough for another retry
+        self.assertEqual(second.calls, 1)
+
+    def test_permanent_errors_are_not_retried(self):
+        provider = Provider("test", timeout_secs=1, max_attempts=3, base_delay_secs=0)
+        call = FailingCall(ValueError())
+        with self.assertRaises(ValueError):
+            provider.call(call)
+        self.assertEqual(call.calls, 1)
+
+
+class NotionRequestTest(unittest.TestCase):
+    def setUp(self):
+        provider = Provider("notion", timeout_secs=1, base_delay_secs=0, is_transient=is_transient_notion_error)
+        patcher = mock.patch.object(notion_database, "notion_provider", provider)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.database = NotionDatabase(is_youtube=False)
+
+    def test_retries_idempotent_requests(self):
+        call = FailingCall(RequestTimeoutError())
+        with self.assertRaises(RequestTimeoutError):
+            self.database.request(call)
+        self.assertEqual(call.calls, 3)
+
+    def test_does_not_retry_writes(self):
+        # A write that timed out may already have been applied
+        call = FailingCall(RequestTimeoutError())
+        with self.assertRaises(RequestTimeoutError):
+            self.database.request(call, idempotent=False)
+        self.assertEqual(call.calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
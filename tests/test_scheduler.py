@@ -0,0 +1,73 @@
+import os
+import sys
+import threading
+import unittest
+from concurrent.futures import Future
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "functions"))
+
+for name in ["NOTION_TOKEN", "OPENAI_API_KEY", "APIFY_API_TOKEN"]:
+    os.environ.setdefault(name, "test")
+os.environ.setdefault("NOTION_WEBSITES_DATABASE_ID", "websites")
+os.environ.setdefault("NOTION_VIDEOS_DATABASE_ID", "videos")
+
+from scheduler import Priority, current_request, scheduled_as
+
+USER = "bulk-user"
+
+
+class RecordingNotion:
+    def __init__(self):
+        self.requests = []
+        self.written = threading.Event()
+
+    def set_page_metadata(self, page_id: str, **metadata) -> dict:
+        self.requests.append(current_request.get())
+        self.written.set()
+        return {"id": page_id}
+
+
+class BackgroundContextTest(unittest.TestCase):
+    def test_late_metadata_write_is_queued_as_background(self):
+        from pipeline import add_late_metadata
+
+        notion = RecordingNotion()
+        metadata = Future()
+        with scheduled_as(Priority.BACKGROUND, USER):
+            add_late_metadata(notion, {"id": "page"}, {"icon": None, "cover": None}, metadata)
+
+        # Completed from another thread, like the enrichment executor does
+        threading.Thread(target=metadata.set_result, args=({"icon": "icon.png"},)).start()
+        self.assertTrue(notion.written.wait(5))
+        self.assertEqual(notion.requests, [(Priority.BACKGROUND, USER)])
+
+    def test_metadata_lookup_runs_as_background(self):
+        from metadata import MetadataEnricher
+
+        enricher = MetadataEnricher(max_workers=1)
+        seen = []
+        enricher.favicon = lambda url: seen.append(current_request.get())
+        enricher.thumbnail = lambda url: None
+        with scheduled_as(Priority.BACKGROUND, USER):
+            enricher.submit("https://example.com/").result(timeout=5)
+        self.assertEqual(seen, [(Priority.BACKGROUND, USER)])
+
+    def test_scrape_strategies_run_as_background(self):
+        from langchain.schema import Document
+        from scrape_orchestrator import ScrapeOrchestrator
+
+        seen = []
+
+        def strategy(cancel_event: threading.Event) -> Document:
+            seen.append(current_request.get())
+            return Document(page_content="content")
+
+        orchestrator = ScrapeOrchestrator(hedge_delay_secs=0, max_workers=2)
+        with scheduled_as(Priority.BACKGROUND, USER):
+            orchestrator.run("https://example.com/", [("first", strategy), ("second", strategy)])
+        self.assertTrue(seen)
+        self.assertTrue(all(request == (Priority.BACKGROUND, USER) for request in seen))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import threading
+import unittest
+from concurrent.futures import Future
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "functions"))
+
+from langchain.schema import Document
+from scrape_orchestrator import AsyncStrategy, ScrapeOrchestrator
+
+URL = "https://example.com/article"
+
+
+def slow(cancel_event: threading.Event) -> Document:
+    cancel_event.wait(5)
+    return Document(page_content="slow")
+
+
+def failing(cancel_event: threading.Event) -> Document:
+    raise ConnectionError("Blocked")
+
+
+def fast(cancel_event: threading.Event) -> Document:
+    return Document(page_content="fast")
+
+
+def start_async(cancel_event: threading.Event) -> Future:
+    # Completed from another thread, like a run on the Apify runner's event loop
+    future = Future()
+    threading.Timer(0.1, future.set_result, [Document(page_content="async")]).start()
+    return future
+
+
+class ScrapeOrchestratorTest(unittest.TestCase):
+    def test_no_strategies_raises(self):
+        with self.assertRaises(ValueError):
+            ScrapeOrchestrator(hedge_delay_secs=1).run(URL, [])
+
+    def test_failure_launches_the_next_strategy_without_waiting(self):
+        orchestrator = ScrapeOrchestrator(hedge_delay_secs=0.5)
+        started_at = time.perf_counter()
+        document = orchestrator.run(URL, [("slow", slow), ("failing", failing), ("fast", fast)])
+        elapsed_secs = time.perf_counter() - started_at
+
+        # failing is hedged in after 0.5s; fast must follow its failure, not another hedge delay
+        self.assertEqual(document.page_content, "fast")
+        self.assertLess(elapsed_secs, 0.9)
+
+    def test_raises_the_last_error_when_every_strategy_fails(self):
+        with self.assertRaises(ConnectionError):
+            ScrapeOrchestrator(hedge_delay_secs=0.5).run(URL, [("failing", failing)])
+
+    def test_async_strategies_take_no_worker(self):
+        # The only worker is held by the slow strategy, the async one still completes
+        orchestrator = ScrapeOrchestrator(hedge_delay_secs=0, max_workers=1)
+        document = orchestrator.run(URL, [("slow", slow), ("async", AsyncStrategy(start_async))])
+        self.assertEqual(document.page_content, "async")
+
+
+if __name__ == "__main__":
+    unittest.main()
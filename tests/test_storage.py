@@ -0,0 +1,23 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "functions"))
+
+from storage import FirestoreStorage
+
+
+class FirestoreStorageTest(unittest.TestCase):
+    def test_client_is_created_on_first_use(self):
+        # main.py builds the job store at import time, where no credentials may be available
+        with mock.patch("firebase_admin.firestore.client") as client:
+            storage = FirestoreStorage("test_")
+            client.assert_not_called()
+            storage.client
+            storage.client
+        client.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "functions"))
+
+os.environ.setdefault("NOTION_TOKEN", "test")
+
+from url_index import NotionUrlIndex
+
+URL = "https://example.com/article"
+
+
+class FakeNotion:
+    # Like Notion, database queries leave out archived pages, which only pages.retrieve shows
+    database_id = "websites"
+
+    def __init__(self):
+        self.pages = {}
+        self.retrieved = 0
+        self.edits = 0
+
+    def save(self, page_id: str, url: str, archived: bool = False) -> None:
+        self.edits += 1
+        self.pages[page_id] = {
+            "id": page_id,
+            "url": f"https://www.notion.so/{page_id}",
+            "created_time": "2024-01-01T00:00:00.000Z",
+            "last_edited_time": f"2024-01-01T00:00:{self.edits:02d}.000Z",
+            "archived": archived,
+            "properties": {"Name": {"title": []}, "URL": {"url": url}},
+        }
+
+    def database_entry(self, page: dict, url: str | None = None) -> dict:
+        return {
+            "id": page["id"],
+            "title": "Untitled",
+            "url": url or page["properties"]["URL"]["url"],
+            "page_url": page["url"],
+            "created_time": page["created_time"],
+            "last_edited_time": page["last_edited_time"],
+            "fingerprint": None,
+        }
+
+    def iter_database_pages(self, edited_since: str | None = None):
+        return [
+            page
+            for page in self.pages.values()
+            if not page["archived"] and (edited_since is None or page["last_edited_time"] >= edited_since)
+        ]
+
+    def get_database_entry(self, url: str) -> dict | None:
+        for page in self.iter_database_pages():
+            if page["properties"]["URL"]["url"] == url:
+                return self.database_entry(page, url)
+        return None
+
+    def get_page(self, page_id: str) -> dict | None:
+        self.retrieved += 1
+        return self.pages.get(page_id)
+
+
+def create_index(notion: FakeNotion, entry_ttl_secs: float) -> NotionUrlIndex:
+    index = NotionUrlIndex(notion, refresh_interval_secs=3600, entry_ttl_secs=entry_ttl_secs)
+    index.refresh()
+    index.refreshed_at = float("inf")
+    return index
+
+
+class NotionUrlIndexTest(unittest.TestCase):
+    def test_fresh_entries_are_served_without_asking_notion(self):
+        notion = FakeNotion()
+        notion.save("page", URL)
+        index = create_index(notion, entry_ttl_secs=3600)
+
+        self.assertEqual(index.lookup(URL)["id"], "page")
+        self.assertEqual(notion.retrieved, 0)
+
+    def test_archived_page_is_no_longer_found(self):
+        notion = FakeNotion()
+        notion.save("page", URL)
+        index = create_index(notion, entry_ttl_secs=0)
+        notion.save("page", URL, archived=True)
+
+        self.assertIsNone(index.lookup(URL))
+        self.assertNotIn(URL, index.entries)
+
+    def test_deleted_page_is_no_longer_found(self):
+        notion = FakeNotion()
+        notion.save("page", URL)
+        index = create_index(notion, entry_ttl_secs=0)
+        del notion.pages["page"]
+
+        self.assertIsNone(index.lookup(URL))
+
+    def test_edited_url_moves_the_entry(self):
+        notion = FakeNotion()
+        notion.save("page", URL)
+        index = create_index(notion, entry_ttl_secs=3600)
+        notion.save("page", f"{URL}-moved")
+        index.refresh()
+
+        self.assertIsNone(index.lookup(URL))
+        self.assertEqual(index.lookup(f"{URL}-moved")["id"], "page")
+
+    def test_older_edit_does_not_move_the_entry_back(self):
+        notion = FakeNotion()
+        notion.save("page", URL)
+        old_entry = notion.database_entry(notion.pages["page"])
+        notion.save("page", f"{URL}-moved")
+        index = create_index(notion, entry_ttl_secs=3600)
+        index.add(old_entry)
+
+        self.assertNotIn(URL, index.entries)
+        self.assertIn(f"{URL}-moved", index.entries)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "functions"))
+
+for name in ["NOTION_TOKEN", "OPENAI_API_KEY", "APIFY_API_TOKEN"]:
+    os.environ.setdefault(name, "test")
+os.environ.setdefault("NOTION_WEBSITES_DATABASE_ID", "websites")
+os.environ.setdefault("NOTION_VIDEOS_DATABASE_ID", "videos")
+
+import utils
+from utils import YoutubeInterface
+
+VIDEO_URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+class YoutubeInterfaceTest(unittest.TestCase):
+    def test_stalled_transcript_fetch_times_out(self):
+        released = threading.Event()
+        self.addCleanup(released.set)
+
+        def stall(video_id: str):
+            released.wait(10)
+            return []
+
+        with mock.patch.object(utils.YouTubeTranscriptApi, "list_transcripts", stall), mock.patch.multiple(
+            utils.youtube_provider, timeout_secs=0.2, max_attempts=1
+        ):
+            started_at = time.perf_counter()
+            with self.assertRaises(TimeoutError):
+                YoutubeInterface().scrape_video(VIDEO_URL)
+        self.assertLess(time.perf_counter() - started_at, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()